@@ -0,0 +1,207 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+# On-disk cache for contract analysis results. Entries are keyed by a hash of
+# the normalized contract text, the analysis function and its prompt version
+# (the app adds the tenant, so results never cross customers), so the same
+# contract analyzed again (in another session, or after a rerun dropped
+# st.session_state) is answered from disk without calling Gemini.
+CACHE_ENABLED = os.getenv("ANALYSIS_CACHE_ENABLED", "true").lower() not in ("0", "false", "no")
+CACHE_PATH = os.getenv("ANALYSIS_CACHE_PATH", os.path.join(".cache", "analysis_cache.sqlite3"))
+CACHE_MAX_BYTES = int(float(os.getenv("ANALYSIS_CACHE_MAX_MB", "256")) * 1024 * 1024)
+CACHE_TTL_SECONDS = int(float(os.getenv("ANALYSIS_CACHE_TTL_HOURS", "168")) * 3600)
+
+
+def normalize_text(text):
+    """Collapse whitespace so re-extracted copies of a contract hash the same"""
+    return " ".join((text or "").split())
+
+
+class AnalysisCache:
+    """SQLite-backed LRU cache with a size limit and a TTL"""
+
+    def __init__(self, path=CACHE_PATH, max_bytes=CACHE_MAX_BYTES, ttl_seconds=CACHE_TTL_SECONDS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # One connection shared by the analysis worker threads, guarded by the lock
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS analysis_cache (
+                cache_key TEXT PRIMARY KEY,
+                function_name TEXT NOT NULL,
+                prompt_version TEXT NOT NULL,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_analysis_cache_last_access ON analysis_cache (last_access)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(function_name, text, prompt_version, *extra):
+        """Content-addressed key for one analysis of one contract"""
+        digest = hashlib.sha256()
+        for part in (function_name, prompt_version, normalize_text(text)) + tuple(str(e) for e in extra):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss or expired entry"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM analysis_cache WHERE cache_key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            value, created_at = row
+            if self.ttl_seconds and now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM analysis_cache WHERE cache_key = ?", (key,))
+                self._conn.commit()
+                self.evictions += 1
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE analysis_cache SET last_access = ? WHERE cache_key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+
+        return json.loads(value)
+
+    def set(self, key, function_name, prompt_version, value):
+        """Store a result and evict least recently used entries if over the size limit"""
+        payload = json.dumps(value, ensure_ascii=False)
+        size = len(payload.encode("utf-8"))
+        now = time.time()
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO analysis_cache "
+                "(cache_key, function_name, prompt_version, value, size, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, function_name, prompt_version, payload, size, now, now)
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        """Drop expired entries, then LRU entries until the cache fits in max_bytes"""
+        if self.ttl_seconds:
+            cursor = self._conn.execute(
+                "DELETE FROM analysis_cache WHERE created_at < ?", (now - self.ttl_seconds,)
+            )
+            self.evictions += max(cursor.rowcount, 0)
+
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM analysis_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        rows = self._conn.execute(
+            "SELECT cache_key, size FROM analysis_cache ORDER BY last_access ASC"
+        ).fetchall()
+        stale_keys = []
+        for cache_key, size in rows:
+            if total <= self.max_bytes:
+                break
+            stale_keys.append((cache_key,))
+            total -= size
+
+        self._conn.executemany("DELETE FROM analysis_cache WHERE cache_key = ?", stale_keys)
+        self.evictions += len(stale_keys)
+
+    def purge_stale_versions(self, prompt_versions):
+        """Delete entries produced by prompt templates that have since changed"""
+        removed = 0
+        with self._lock:
+            for function_name, version in prompt_versions.items():
+                cursor = self._conn.execute(
+                    "DELETE FROM analysis_cache WHERE function_name = ? AND prompt_version != ?",
+                    (function_name, version)
+                )
+                removed += max(cursor.rowcount, 0)
+            self._conn.commit()
+            self.evictions += removed
+        return removed
+
+    def stats(self):
+        """Hit, miss and eviction counters plus current size"""
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM analysis_cache"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "entries": entries,
+            "size_bytes": size
+        }
+
+
+class _NullCache:
+    """Stand-in used when caching is disabled or the cache file can't be opened"""
+
+    make_key = staticmethod(AnalysisCache.make_key)
+
+    def get(self, key):
+        return None
+
+    def set(self, key, function_name, prompt_version, value):
+        pass
+
+    def purge_stale_versions(self, prompt_versions):
+        return 0
+
+    def stats(self):
+        return {"hits": 0, "misses": 0, "evictions": 0, "hit_rate": 0.0, "entries": 0, "size_bytes": 0}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_analysis_cache(prompt_versions=None):
+    """Process-wide cache shared by all Streamlit sessions"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            if not CACHE_ENABLED:
+                _cache = _NullCache()
+            else:
+                try:
+                    _cache = AnalysisCache()
+                    if prompt_versions:
+                        removed = _cache.purge_stale_versions(prompt_versions)
+                        if removed:
+                            print(f"Analysis cache: removed {removed} entries from outdated prompts")
+                except Exception as e:
+                    print(f"Warning: Could not open analysis cache: {str(e)}")
+                    _cache = _NullCache()
+    return _cache
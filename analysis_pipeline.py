@@ -0,0 +1,171 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# Streamlit only lets threads that carry the script run context touch the
+# page (st.error, st.session_state). Import lazily so this module also works
+# outside of a Streamlit session, e.g. from scripts and benchmarks.
+try:
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+except ImportError:
+    add_script_run_ctx = None
+    get_script_run_ctx = None
+
+# Per-stage timeout (seconds) and worker count for the analysis fan-out
+STAGE_TIMEOUT = float(os.getenv("ANALYSIS_STAGE_TIMEOUT", "90"))
+MAX_STAGE_WORKERS = int(os.getenv("ANALYSIS_MAX_WORKERS", "5"))
+
+# Stage being run by the current worker thread, so work it fans out (chunk
+# calls) can stop once the stage has timed out or been abandoned
+_local = threading.local()
+
+
+class StageResult:
+    """Outcome of one analysis stage"""
+
+    def __init__(self, name):
+        self.name = name
+        self.status = "pending"  # pending, ok, error, timeout
+        self.result = None
+        self.error = None
+        self.started_at = None
+        self.elapsed = None
+        # Seconds the stage may run; chunked analyses widen it to their number of rounds
+        self.base_timeout = None
+        self.timeout = None
+        # Set when the pipeline stops waiting for this stage
+        self.abandoned = threading.Event()
+
+    @property
+    def ok(self):
+        return self.status == "ok"
+
+    def as_dict(self):
+        return {
+            "stage": self.name,
+            "status": self.status,
+            "seconds": round(self.elapsed, 3) if self.elapsed is not None else None,
+            "error": str(self.error) if self.error else None
+        }
+
+
+def bind_script_context(func):
+    """Wrap func so it runs with the calling Streamlit script context in any thread"""
+    ctx = get_script_run_ctx() if get_script_run_ctx is not None else None
+    if ctx is None:
+        return func
+
+    def wrapper(*args, **kwargs):
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+def stage_abandoned():
+    """True if the stage running in this thread has timed out or been abandoned"""
+    stage = getattr(_local, "stage", None)
+    return stage is not None and stage.abandoned.is_set()
+
+
+def scale_stage_timeout(rounds):
+    """Give the stage running in this thread `rounds` times the pipeline's per-stage timeout.
+
+    For work that runs as several sequential rounds of calls (a long contract
+    analyzed a few chunks at a time), each of which may take as long as a
+    whole single-call stage.
+    """
+    stage = getattr(_local, "stage", None)
+    if stage is not None and stage.timeout is not None:
+        stage.timeout = max(stage.timeout, stage.base_timeout * rounds)
+
+
+def _run_stage(stage, func, args, ctx):
+    """Run a single stage in a worker thread and time it"""
+    if ctx is not None and add_script_run_ctx is not None:
+        add_script_run_ctx(threading.current_thread(), ctx)
+
+    _local.stage = stage
+    stage.started_at = time.perf_counter()
+    try:
+        result = func(*args)
+    except Exception as e:
+        result, error, status = None, e, "error"
+    else:
+        error, status = None, "ok"
+    finally:
+        _local.stage = None
+    elapsed = time.perf_counter() - stage.started_at
+
+    # A stage that already timed out keeps its timeout status
+    if stage.status == "pending":
+        stage.result, stage.error, stage.status, stage.elapsed = result, error, status, elapsed
+    return stage
+
+
+def run_analysis_stages(stages, timeout=None, max_workers=None, on_complete=None):
+    """Run analysis stages concurrently.
+
+    `stages` is a list of (name, func, args) tuples. Each stage gets its own
+    timeout measured from the moment it starts running, widened by
+    scale_stage_timeout for stages that make several rounds of calls.
+    `on_complete` is called from the calling thread with (stage_result,
+    done_count, total) as soon as each stage finishes or times out, so the UI
+    can render partial results. Returns a dict of stage name -> StageResult.
+    """
+    timeout = STAGE_TIMEOUT if timeout is None else timeout
+    max_workers = max_workers or min(MAX_STAGE_WORKERS, len(stages)) or 1
+    ctx = get_script_run_ctx() if get_script_run_ctx is not None else None
+
+    results = {}
+    futures = {}
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="analysis")
+
+    try:
+        for name, func, args in stages:
+            stage = StageResult(name)
+            stage.base_timeout = stage.timeout = timeout
+            results[name] = stage
+            futures[executor.submit(_run_stage, stage, func, args, ctx)] = stage
+
+        pending = set(futures)
+        done_count = 0
+
+        while pending:
+            # Wake up for the next completion or the nearest stage deadline
+            now = time.perf_counter()
+            deadlines = [
+                futures[f].started_at + futures[f].timeout
+                for f in pending if futures[f].started_at is not None
+            ]
+            wait_for = max(0.0, min(deadlines) - now) if deadlines else timeout
+            finished, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+
+            for future in finished:
+                done_count += 1
+                if on_complete:
+                    on_complete(futures[future], done_count, len(futures))
+
+            # Abandon stages that have been running longer than their timeout
+            now = time.perf_counter()
+            for future in list(pending):
+                stage = futures[future]
+                if stage.started_at is not None and now - stage.started_at >= stage.timeout:
+                    pending.discard(future)
+                    stage.abandoned.set()
+                    stage.status = "timeout"
+                    stage.elapsed = now - stage.started_at
+                    stage.error = TimeoutError(f"{stage.name} timed out after {stage.timeout:.0f}s")
+                    done_count += 1
+                    if on_complete:
+                        on_complete(stage, done_count, len(futures))
+    finally:
+        # Don't block on stages that timed out; their threads finish in the
+        # background, and stop fanning out work once they see abandoned set
+        for stage in results.values():
+            if stage.status == "pending":
+                stage.abandoned.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return results
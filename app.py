@@ -1,21 +1,52 @@
 import streamlit as st
-import google.generativeai as genai
-from PyPDF2 import PdfReader
-import docx
 import os
 from dotenv import load_dotenv
 import pandas as pd
 import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime
-import json
-from translate import Translator
-from fpdf import FPDF
-import io
-import base64
-import tempfile
+import copy
 import streamlit.components.v1 as components
 from contract_reminders import add_reminders_to_app
+from llm_backend import get_backend
+from pdf_extraction import start_pdf_extraction
+from docx_extraction import extract_docx
+from ocr_fallback import ocr_available
+from extraction_cache import get_extraction_cache, content_key
+from upload_storage import spool_upload, file_sha256, text_preview
+from rate_limiter import get_rate_limiter, is_rate_limited
+from translation_engine import get_translation_engine
+from pdf_report import render_contract
+from report_charts import score_gauge, score_breakdown_chart, create_risk_opportunity_charts
+from report_cache import get_report_cache, report_key, REPORT_PRERENDER
+from batch_export import export_reports
+from report_translation import render_translated_report
+from usage_tracker import get_usage_index
+from analysis_pipeline import run_analysis_stages
+from analysis_cache import get_analysis_cache
+from clause_dedup import get_clause_index, analyze_with_reuse
+from contract_index import ContractIndex, get_contract_index
+from document_model import get_document_model, reference
+from response_parser import parse_structured_response, build_repair_prompt, StructuredOutputError
+from chunked_analysis import (
+    analyze_in_chunks,
+    merge_scores,
+    merge_risks_and_opportunities,
+    merge_clauses,
+    merge_clause_query,
+    merge_key_terms,
+    merge_summaries,
+    merge_combined
+)
+from prompts import (
+    CONTRACT_SCORE_PROMPT,
+    RISKS_OPPORTUNITIES_PROMPT,
+    CLAUSE_QUERY_PROMPT,
+    KEY_CLAUSES_PROMPT,
+    KEY_TERMS_PROMPT,
+    SUMMARY_PROMPT,
+    COMBINED_ANALYSIS_PROMPT,
+    PROMPT_VERSIONS
+)
 from auth import (
     init_session_state, 
     check_usage_limits,
@@ -35,9 +66,40 @@ load_dotenv()
 # Initialize session state
 init_session_state()
 
-# Configure Gemini API
-genai.configure(api_key=os.getenv('GOOGLE_API_KEY'))
-model = genai.GenerativeModel('gemini-1.5-pro')
+# LLM backend (Gemini, or the offline stub when LLM_BACKEND=stub)
+llm = get_backend()
+
+# Persistent caches of analysis results and extracted document text, shared across sessions
+analysis_cache = get_analysis_cache(PROMPT_VERSIONS)
+extraction_cache = get_extraction_cache()
+
+# Rendered PDF reports shared across sessions, prerendered in the background after analysis
+report_cache = get_report_cache()
+
+# Shared translation pool and persistent translation memory (TRANSLATION_PROVIDER=stub works offline)
+translation_engine = get_translation_engine()
+
+# Per-tenant index of analyzed sections, so templated contracts reuse earlier clause and key term analyses
+clause_index = get_clause_index({
+    'key_clauses': PROMPT_VERSIONS['analyze_contract_clauses'],
+    'key_terms': PROMPT_VERSIONS['extract_key_terms']
+})
+
+# "combined" sends the contract once for all analysis sections instead of once per section
+ANALYSIS_MODE = os.getenv('ANALYSIS_MODE', 'separate')
+
+# Chat sends the whole contract up to this size, otherwise the CHAT_TOP_K most relevant passages
+CHAT_FULL_TEXT_CHARS = int(os.getenv('CHAT_FULL_TEXT_CHARS', '4000'))
+CHAT_TOP_K = int(os.getenv('CHAT_TOP_K', '6'))
+
+# Render chat answers and generated contracts as they stream in
+STREAM_RESPONSES = os.getenv('STREAM_RESPONSES', 'true').lower() not in ('0', 'false', 'no')
+
+# Analyzed contracts remembered per session for batch report export
+ANALYZED_CONTRACTS_LIMIT = int(os.getenv('ANALYZED_CONTRACTS_LIMIT', '50'))
+
+# How often (seconds) the upload tab picks up pages extracted in the background
+EXTRACTION_PROGRESS_INTERVAL = float(os.getenv('EXTRACTION_PROGRESS_INTERVAL', '1'))
 
 # Supported languages
 LANGUAGES = {
@@ -193,109 +255,132 @@ def translate_text(text, target_lang):
     try:
         if not text or target_lang == 'en':
             return text
-            
-        # Using translate library for basic translation
-        translator = Translator(to_lang=target_lang)
         
-        # For longer texts, break into paragraphs and translate separately
-        if len(text) > 500:
-            paragraphs = text.split('\n\n')
-            translated_paragraphs = []
-            
-            for para in paragraphs:
-                if para.strip():
-                    translated_para = translator.translate(para[:500])  # Translate first 500 chars of each paragraph
-                    translated_paragraphs.append(translated_para)
-                else:
-                    translated_paragraphs.append('')
-                    
-            return '\n\n'.join(translated_paragraphs)
-        else:
-            return translator.translate(text)
+        # Long paragraphs are split into segments the provider accepts and translated
+        # concurrently; segments translated before come from the translation memory
+        return translation_engine.translate(text, target_lang)
     
     except Exception as e:
         st.error(f"Translation error: {str(e)}")
         return text  # Return original text if translation fails
 
-def extract_text_from_pdf(pdf_file):
-    """Extract text from PDF file"""
+def extract_text_from_pdf(pdf_file, cache_key=None, on_done=None):
+    """Start extracting text from a PDF file.
+    
+    The first pages are extracted before this returns and the rest continue in
+    the background (large PDFs are split into page ranges and extracted in a
+    process pool). Returns an ExtractionJob, or None if the file can't be read.
+    """
     try:
-        pdf_reader = PdfReader(pdf_file)
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text() + "\n"
-        return text
+        return start_pdf_extraction(pdf_file, key=cache_key, on_done=on_done)
     except Exception as e:
         st.error(f"Error extracting PDF text: {str(e)}")
-        return ""
+        return None
+
+def extract_uploaded_file(uploaded_file):
+    """Extract an uploaded PDF or DOCX, using the shared extraction cache.
+    
+    Returns (text, page_offsets, job). `job` is None when the text is complete;
+    otherwise text holds the first pages and the job extracts the rest.
+    
+    On a cache miss the file is spooled to disk and the extractors read it
+    through a memory map instead of a copy of its bytes. The spooled file is
+    deleted when extraction finishes, or with the session state if it ends first.
+    """
+    kind = 'pdf' if uploaded_file.name.endswith('.pdf') else 'docx'
+    sha256 = file_sha256(uploaded_file)
+    cache_key = content_key(sha256, kind)
+    cached = extraction_cache.get(cache_key)
+    if cached is not None:
+        return cached[0], cached[1], None
+    
+    upload = spool_upload(uploaded_file, sha256)
+    st.session_state.spooled_upload = upload
+    if kind == 'pdf':
+        job = extract_text_from_pdf(upload.path, cache_key, on_done=upload.release)
+        if job is None:
+            upload.release()
+            return "", [], None
+        text, page_offsets = job.snapshot()
+        if not job.done:
+            return text, page_offsets, job
+    else:
+        text, page_offsets = extract_text_from_docx(upload.path), None
+        upload.release()
+    
+    # Failed extractions are not cached so a retry parses the file again
+    if text:
+        extraction_cache.set(cache_key, text, page_offsets)
+    return text, page_offsets, None
+
+@st.fragment(run_every=EXTRACTION_PROGRESS_INTERVAL)
+def show_extraction_progress():
+    """Pick up pages extracted in the background and rerun the page once the document is complete"""
+    job = st.session_state.get('extraction_job')
+    if job is None:
+        return
+    
+    st.session_state.contract_text, st.session_state.page_offsets = job.snapshot()
+    if job.done:
+        st.session_state.extraction_job = None
+        # Failed or empty extractions are not cached, as in extract_uploaded_file
+        if job.error is not None:
+            st.session_state.extraction_error = str(job.error)
+        elif st.session_state.contract_text.strip():
+            extraction_cache.set(job.key, st.session_state.contract_text, st.session_state.page_offsets)
+        # Full rerun so the rest of the page (Analyze button, chat index) sees the whole text
+        st.rerun()
+    
+    st.progress(job.progress, text=f"Extracting text... {job.pages_done} of {job.page_count} pages")
 
 def extract_text_from_docx(docx_file):
-    """Extract text from DOCX file"""
+    """Extract text from DOCX file, including tables, notes, headers and footers"""
     try:
-        doc = docx.Document(docx_file)
-        text = ""
-        for paragraph in doc.paragraphs:
-            text += paragraph.text + "\n"
-        return text
+        # Streams the XML parts straight from the zip instead of loading python-docx's object model
+        return extract_docx(docx_file)
     except Exception as e:
         st.error(f"Error extracting DOCX text: {str(e)}")
         return ""
 
-def analyze_contract_score(text):
-    """Calculate dynamic contract score using Gemini model's analysis"""
-    prompt = f"""
-    Analyze this legal contract deeply and provide a scoring analysis with the following:
+def generate_structured(prompt, task):
+    """Generate a JSON response for an analysis task and parse it against the task's schema.
+    
+    If the response can't be used, the model is asked once to fix its own output
+    (without resending the contract). Raises StructuredOutputError if that fails too.
+    """
+    response = llm.generate(prompt, task=task)
+    try:
+        return parse_structured_response(response.text, task)
+    except StructuredOutputError as e:
+        repaired = llm.generate(build_repair_prompt(response.text, task, e), task=task)
+        return parse_structured_response(repaired.text, task)
 
-    1. Calculate an overall contract score (0-100) based on clarity, completeness, fairness, and risk level
-    2. Score the following categories individually (0-100):
-       - Clarity and Language
-       - Comprehensiveness
-       - Risk Protection
-       - Balanced Rights
-       - Compliance
-    3. Provide a brief explanation of the scoring (2-3 paragraphs)
+def current_tenant():
+    """Partition of the analysis cache and clause index for this session: the user's company, else their email"""
+    user = st.session_state.get('user')
+    return getattr(user, 'company', None) or st.session_state.get('email') or 'anonymous'
 
-    Return ONLY a JSON object with this exact format:
-    {{
-        "overall_score": <integer 0-100>,
-        "score_breakdown": {{
-            "clarity_and_language": <integer 0-100>,
-            "comprehensiveness": <integer 0-100>,
-            "risk_protection": <integer 0-100>,
-            "balanced_rights": <integer 0-100>,
-            "compliance": <integer 0-100>
-        }},
-        "summary": "<2-3 paragraph explanation>"
-    }}
+def _score_chunk(text):
+    return generate_structured(CONTRACT_SCORE_PROMPT.format(text=text), 'score')
 
-    Contract text: {text[:12000]}  # Use first 12000 chars to stay within token limits
-    """
+def analyze_contract_score(text):
+    """Calculate dynamic contract score using Gemini model's analysis"""
+    version = PROMPT_VERSIONS['analyze_contract_score']
+    cache_key = analysis_cache.make_key('analyze_contract_score', text, version, current_tenant())
+    cached = analysis_cache.get(cache_key)
+    if cached is not None:
+        return cached
     
     try:
-        response = model.generate_content(prompt)
-        cleaned_text = response.text.strip()
-        
-        # Extract JSON properly regardless of formatting
-        if cleaned_text.startswith("```json"):
-            cleaned_text = cleaned_text[7:].split("```")[0].strip()
-        elif cleaned_text.startswith("```"):
-            cleaned_text = cleaned_text[3:].split("```")[0].strip()
-        elif "```" in cleaned_text:
-            # Extract content between the first set of triple backticks
-            cleaned_text = cleaned_text.split("```")[1].strip()
-            
-        # Handle potential JSON object within a JSON string issue
-        try:
-            result = json.loads(cleaned_text)
-        except json.JSONDecodeError:
-            # Try to fix missing quotes around property names
-            import re
-            fixed_json = re.sub(r'([{,])\s*([a-zA-Z_][a-zA-Z0-9_]*)\s*:', r'\1"\2":', cleaned_text)
-            result = json.loads(fixed_json)
-        
+        # Long contracts are scored section by section and averaged
+        result = analyze_in_chunks(text, _score_chunk, merge_scores)
+        analysis_cache.set(cache_key, 'analyze_contract_score', version, result)
         return result
     
     except Exception as e:
+        # Throttling fails the stage instead of showing a placeholder result
+        if is_rate_limited(e):
+            raise
         st.error(f"Error analyzing contract score: {str(e)}")
         return {
             "overall_score": 50,
@@ -309,97 +394,25 @@ def analyze_contract_score(text):
             "summary": "Unable to analyze contract fully. Please try again or contact support if the issue persists."
         }
 
+def _risks_and_opportunities_chunk(text):
+    return generate_structured(RISKS_OPPORTUNITIES_PROMPT.format(text=text), 'risks_opportunities')
+
 def analyze_risks_and_opportunities(text):
     """Analyze contract risks and opportunities dynamically using Gemini model"""
-    prompt = f"""
-    Perform a comprehensive analysis of risks and opportunities in this legal contract.
-
-    Return ONLY a JSON object with this structure:
-    {{
-        "risks": {{
-            "risk_type_1": {{
-                "level": "<High/Medium/Low>",
-                "description": "<brief description>",
-                "potential_impact": "<impact description>",
-                "mitigation_suggestions": "<suggestions>"
-            }},
-            ... (up to 5 most important risks)
-        }},
-        "opportunities": {{
-            "opportunity_type_1": {{
-                "level": "<High/Medium/Low>",
-                "description": "<brief description>",
-                "potential_value": "<value description>",
-                "action_items": "<action items>"
-            }},
-            ... (up to 5 most important opportunities)
-        }}
-    }}
-    
-    Contract text: {text[:12000]}  # Use first 12000 chars to stay within token limits
-    """
+    version = PROMPT_VERSIONS['analyze_risks_and_opportunities']
+    cache_key = analysis_cache.make_key('analyze_risks_and_opportunities', text, version, current_tenant())
+    cached = analysis_cache.get(cache_key)
+    if cached is not None:
+        return cached
     
     try:
-        response = model.generate_content(prompt)
-        cleaned_text = response.text.strip()
-        
-        # Extract JSON properly regardless of formatting
-        if cleaned_text.startswith("```json"):
-            cleaned_text = cleaned_text[7:].split("```")[0].strip()
-        elif cleaned_text.startswith("```"):
-            cleaned_text = cleaned_text[3:].split("```")[0].strip()
-        elif "```" in cleaned_text:
-            cleaned_text = cleaned_text.split("```")[1].strip()
-        
-        # Handle potential JSON object within a JSON string issue
-        try:
-            result = json.loads(cleaned_text)
-        except json.JSONDecodeError as e:
-            # Try to fix common JSON issues
-            import re
-            
-            # Fixed string with better error handling
-            fixed_json = cleaned_text
-            
-            # Fix missing quotes around property names
-            fixed_json = re.sub(r'([{,])\s*([a-zA-Z_][a-zA-Z0-9_]*)\s*:', r'\1"\2":', fixed_json)
-            
-            # Handle trailing commas which are invalid in JSON
-            fixed_json = re.sub(r',\s*}', '}', fixed_json)
-            fixed_json = re.sub(r',\s*]', ']', fixed_json)
-            
-            # Fix missing quotes around string values
-            fixed_json = re.sub(r':\s*([^"{}\[\],\s][^{}\[\],\s]*)\s*([,}])', r': "\1"\2', fixed_json)
-            
-            try:
-                result = json.loads(fixed_json)
-            except json.JSONDecodeError:
-                # If still failing, try a more aggressive approach with strict JSON structure
-                st.warning("JSON parsing error, attempting recovery...")
-                
-                # Construct fallback response
-                result = {
-                    "risks": {
-                        "parsing_error": {
-                            "level": "Medium",
-                            "description": "Error parsing the analysis. Please try again.",
-                            "potential_impact": "Unable to properly assess risks",
-                            "mitigation_suggestions": "Please review the contract manually."
-                        }
-                    },
-                    "opportunities": {
-                        "parsing_error": {
-                            "level": "Medium",
-                            "description": "Error parsing the analysis. Please try again.",
-                            "potential_value": "Unable to properly assess opportunities",
-                            "action_items": "Please review the contract manually."
-                        }
-                    }
-                }
-        
+        result = analyze_in_chunks(text, _risks_and_opportunities_chunk, merge_risks_and_opportunities)
+        analysis_cache.set(cache_key, 'analyze_risks_and_opportunities', version, result)
         return result
     
     except Exception as e:
+        if is_rate_limited(e):
+            raise
         st.error(f"Error analyzing risks and opportunities: {str(e)}")
         return {
             "risks": {
@@ -420,147 +433,41 @@ def analyze_risks_and_opportunities(text):
             }
         }
 
-def create_risk_opportunity_charts(analysis_data):
-    """Create visualizations for risks and opportunities"""
-    # Extract data for visualization
-    risk_names = []
-    risk_levels_numeric = []
-    
-    opportunity_names = []
-    opportunity_levels_numeric = []
-    
-    # Convert risk levels to numeric values
-    level_mapping = {"High": 3, "Medium": 2, "Low": 1}
-    
-    # Extract risk data
-    for risk_name, risk_info in analysis_data["risks"].items():
-        risk_names.append(risk_name.replace("_", " ").title())
-        risk_levels_numeric.append(level_mapping.get(risk_info["level"], 2))
-    
-    # Extract opportunity data
-    for opp_name, opp_info in analysis_data["opportunities"].items():
-        opportunity_names.append(opp_name.replace("_", " ").title())
-        opportunity_levels_numeric.append(level_mapping.get(opp_info["level"], 2))
-    
-    # Combine data for a single chart
-    all_names = risk_names + opportunity_names
-    all_values = risk_levels_numeric + [-val for val in opportunity_levels_numeric]  # Negative for opportunities
-    all_types = ["Risk"] * len(risk_names) + ["Opportunity"] * len(opportunity_names)
-    
-    # Create dataframe for the chart
-    df = pd.DataFrame({
-        "Factor": all_names,
-        "Value": all_values,
-        "Type": all_types
-    })
-    
-    # Sort by absolute value (impact level)
-    df = df.sort_values(by="Value", key=abs, ascending=False)
-    
-    # Create horizontal bar chart
-    fig = px.bar(
-        df, 
-        y="Factor", 
-        x="Value", 
-        color="Type",
-        color_discrete_map={"Risk": "#f44336", "Opportunity": "#4caf50"},
-        title="Risks & Opportunities Analysis",
-        orientation='h',
-        height=max(300, len(all_names) * 50),  # Dynamic height based on number of items
-        labels={"Value": "Impact Level (Higher = Greater Impact)"}
-    )
-    
-    # Customize layout
-    fig.update_layout(
-        yaxis_title=None,
-        xaxis_title="Impact Level",
-        legend_title="Type",
-        font=dict(family="Arial", size=12),
-        margin=dict(l=10, r=10, t=40, b=10),
-        plot_bgcolor="white"
-    )
-    
-    # Return the figure
-    return fig
+def _key_clauses_chunk(text):
+    return generate_structured(KEY_CLAUSES_PROMPT.format(text=text), 'key_clauses')
 
 def analyze_contract_clauses(text, clause_query=None):
     """Analyze specific contract clauses based on user query or do general clause analysis"""
     if not text or len(text.strip()) < 10:
         return {"error": "No contract text provided"}
     
-    if clause_query:
-        prompt = f"""
-        Analyze the following specific aspect of the legal contract: "{clause_query}"
-        
-        Provide a detailed explanation of this clause/aspect, including:
-        1. Where it appears in the contract
-        2. What exactly it means in plain language
-        3. Potential implications or concerns
-        4. How it compares to standard industry practice
-        5. Recommendations for improvements if applicable
-        
-        Return ONLY a JSON object with this structure:
-        {{
-            "found": true/false,
-            "clause_text": "<exact text from contract if found>",
-            "explanation": "<plain language explanation>",
-            "implications": "<potential implications>",
-            "standard_practice": "<how it compares to standard practice>",
-            "recommendations": "<recommendations for improvements>"
-        }}
-        
-        Contract text: {text[:12000]}  # Use first 12000 chars to stay within token limits
-        """
-    else:
-        prompt = f"""
-        Provide a comprehensive analysis of the key clauses in this contract. Identify the 5-7 most important clauses and explain them.
-        
-        For each important clause, provide:
-        1. Clause name/type
-        2. Brief extract/summary of the clause content (literal text from the contract)
-        3. Plain language explanation of what this clause means
-        4. Any potential issues or concerns
-        
-        Return ONLY a JSON object with this structure:
-        {{
-            "key_clauses": [
-                {{
-                    "clause_type": "<type of clause>",
-                    "clause_extract": "<brief extract or summary>",
-                    "explanation": "<plain language explanation>",
-                    "concerns": "<potential issues or concerns>"
-                }},
-                ... (for up to 7 most important clauses)
-            ]
-        }}
-        
-        Contract text: {text[:12000]}  # Use first 12000 chars to stay within token limits
-        """
+    version = PROMPT_VERSIONS['analyze_contract_clauses']
+    cache_key = analysis_cache.make_key('analyze_contract_clauses', text, version, current_tenant(), clause_query or "")
+    cached = analysis_cache.get(cache_key)
+    if cached is not None:
+        return cached
     
     try:
-        response = model.generate_content(prompt)
-        cleaned_text = response.text.strip()
-        
-        # Extract JSON properly regardless of formatting
-        if cleaned_text.startswith("```json"):
-            cleaned_text = cleaned_text[7:].split("```")[0].strip()
-        elif cleaned_text.startswith("```"):
-            cleaned_text = cleaned_text[3:].split("```")[0].strip()
-        elif "```" in cleaned_text:
-            cleaned_text = cleaned_text.split("```")[1].strip()
+        if clause_query:
+            def clause_query_chunk(chunk):
+                return generate_structured(
+                    CLAUSE_QUERY_PROMPT.format(text=chunk, clause_query=clause_query), 'clause_query'
+                )
             
-        # Handle potential JSON object within a JSON string issue
-        try:
-            result = json.loads(cleaned_text)
-        except json.JSONDecodeError:
-            # Try to fix missing quotes around property names
-            import re
-            fixed_json = re.sub(r'([{,])\s*([a-zA-Z_][a-zA-Z0-9_]*)\s*:', r'\1"\2":', cleaned_text)
-            result = json.loads(fixed_json)
+            result = analyze_in_chunks(text, clause_query_chunk, merge_clause_query)
+        else:
+            # Sections that nearly match ones analyzed before reuse their explanations
+            result = analyze_with_reuse(
+                clause_index, current_tenant(), 'key_clauses', version,
+                text, _key_clauses_chunk, merge_clauses, 'key_clauses'
+            )
         
+        analysis_cache.set(cache_key, 'analyze_contract_clauses', version, result)
         return result
     
     except Exception as e:
+        if is_rate_limited(e):
+            raise
         st.error(f"Error analyzing contract clauses: {str(e)}")
         if clause_query:
             return {
@@ -583,57 +490,28 @@ def analyze_contract_clauses(text, clause_query=None):
                 ]
             }
 
+def _key_terms_chunk(text):
+    return generate_structured(KEY_TERMS_PROMPT.format(text=text), 'key_terms')
+
 def extract_key_terms(text):
     """Extract and explain key terms and definitions from the contract"""
-    prompt = f"""
-    Extract the key terms and definitions from this legal contract.
-    
-    For each key term, provide:
-    1. The term itself
-    2. Its definition as provided in the contract
-    3. A plain language explanation
-    4. Potential importance or implications
-    
-    Return ONLY a JSON object with this structure:
-    {{
-        "key_terms": [
-            {{
-                "term": "<term name>",
-                "definition": "<definition from contract>",
-                "explanation": "<plain language explanation>",
-                "importance": "<why this term matters>"
-            }},
-            ... (for up to 15 most important terms)
-        ]
-    }}
-    
-    Contract text: {text[:12000]}  # Use first 12000 chars to stay within token limits
-    """
+    version = PROMPT_VERSIONS['extract_key_terms']
+    cache_key = analysis_cache.make_key('extract_key_terms', text, version, current_tenant())
+    cached = analysis_cache.get(cache_key)
+    if cached is not None:
+        return cached
     
     try:
-        response = model.generate_content(prompt)
-        cleaned_text = response.text.strip()
-        
-        # Extract JSON properly regardless of formatting
-        if cleaned_text.startswith("```json"):
-            cleaned_text = cleaned_text[7:].split("```")[0].strip()
-        elif cleaned_text.startswith("```"):
-            cleaned_text = cleaned_text[3:].split("```")[0].strip()
-        elif "```" in cleaned_text:
-            cleaned_text = cleaned_text.split("```")[1].strip()
-            
-        # Handle potential JSON object within a JSON string issue
-        try:
-            result = json.loads(cleaned_text)
-        except json.JSONDecodeError:
-            # Try to fix missing quotes around property names
-            import re
-            fixed_json = re.sub(r'([{,])\s*([a-zA-Z_][a-zA-Z0-9_]*)\s*:', r'\1"\2":', cleaned_text)
-            result = json.loads(fixed_json)
-        
+        result = analyze_with_reuse(
+            clause_index, current_tenant(), 'key_terms', version,
+            text, _key_terms_chunk, merge_key_terms, 'key_terms'
+        )
+        analysis_cache.set(cache_key, 'extract_key_terms', version, result)
         return result
     
     except Exception as e:
+        if is_rate_limited(e):
+            raise
         st.error(f"Error extracting key terms: {str(e)}")
         return {
             "key_terms": [
@@ -646,66 +524,25 @@ def extract_key_terms(text):
             ]
         }
 
+def _summary_chunk(text):
+    return generate_structured(SUMMARY_PROMPT.format(text=text), 'summary')
+
 def generate_summary(text):
     """Generate a concise summary of the contract"""
-    prompt = f"""
-    Create a concise yet comprehensive summary of this legal contract.
-    
-    Include:
-    1. Contract type and parties involved
-    2. Main purpose and scope
-    3. Key rights and obligations
-    4. Important dates or deadlines
-    5. Notable or unusual provisions
-    
-    Return ONLY a JSON object with this structure:
-    {{
-        "contract_type": "<type of contract>",
-        "parties": ["<party 1>", "<party 2>", ...],
-        "purpose": "<main purpose of the contract>",
-        "key_provisions": [
-            "<provision 1>",
-            "<provision 2>",
-            ... (up to 5 key provisions)
-        ],
-        "important_dates": [
-            {{
-                "event": "<event description>",
-                "date": "<date or deadline>"
-            }},
-            ... (if applicable)
-        ],
-        "notable_aspects": "<any unusual or noteworthy aspects>",
-        "summary": "<4-5 sentence summary of the entire contract>"
-    }}
-    
-    Contract text: {text[:12000]}  # Use first 12000 chars to stay within token limits
-    """
+    version = PROMPT_VERSIONS['generate_summary']
+    cache_key = analysis_cache.make_key('generate_summary', text, version, current_tenant())
+    cached = analysis_cache.get(cache_key)
+    if cached is not None:
+        return cached
     
     try:
-        response = model.generate_content(prompt)
-        cleaned_text = response.text.strip()
-        
-        # Extract JSON properly regardless of formatting
-        if cleaned_text.startswith("```json"):
-            cleaned_text = cleaned_text[7:].split("```")[0].strip()
-        elif cleaned_text.startswith("```"):
-            cleaned_text = cleaned_text[3:].split("```")[0].strip()
-        elif "```" in cleaned_text:
-            cleaned_text = cleaned_text.split("```")[1].strip()
-            
-        # Handle potential JSON object within a JSON string issue
-        try:
-            result = json.loads(cleaned_text)
-        except json.JSONDecodeError:
-            # Try to fix missing quotes around property names
-            import re
-            fixed_json = re.sub(r'([{,])\s*([a-zA-Z_][a-zA-Z0-9_]*)\s*:', r'\1"\2":', cleaned_text)
-            result = json.loads(fixed_json)
-        
+        result = analyze_in_chunks(text, _summary_chunk, merge_summaries)
+        analysis_cache.set(cache_key, 'generate_summary', version, result)
         return result
     
     except Exception as e:
+        if is_rate_limited(e):
+            raise
         st.error(f"Error generating summary: {str(e)}")
         return {
             "contract_type": "Unknown",
@@ -717,262 +554,276 @@ def generate_summary(text):
             "summary": "Unable to generate a summary for this contract. Please try again or contact support if the issue persists."
         }
 
-def generate_pdf_report(contract_text, analysis_data, risks_opportunities, clause_analysis, summary_data, company_name=None):
-    """Generate a downloadable PDF report of the contract analysis"""
+def _combined_chunk(text):
+    return generate_structured(COMBINED_ANALYSIS_PROMPT.format(text=text), 'combined')
+
+def analyze_contract_combined(text):
+    """Run score, risks/opportunities, summary, clause and key term analysis in a single request"""
+    version = PROMPT_VERSIONS['analyze_contract_combined']
+    cache_key = analysis_cache.make_key('analyze_contract_combined', text, version, current_tenant())
+    cached = analysis_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
     try:
-        class PDF(FPDF):
-            def header(self):
-                # Logo (add this later)
-                # self.image('logo.png', 10, 8, 33)
-                # Arial bold 15
-                self.set_font('Arial', 'B', 15)
-                # Title
-                self.cell(0, 10, 'Contract Analysis Report', 0, 1, 'C')
-                # Line break
-                self.ln(5)
-                
-            def footer(self):
-                # Position at 1.5 cm from bottom
-                self.set_y(-15)
-                # Arial italic 8
-                self.set_font('Arial', 'I', 8)
-                # Page number
-                self.cell(0, 10, f'Page {self.page_no()}/{{nb}}', 0, 0, 'C')
-            
-            def sanitize_text(self, text):
-                """Sanitize text to avoid encoding issues"""
-                if text is None:
-                    return ""
-                # Replace bullets with '-'
-                text = text.replace('•', '-')
-                # Replace other problematic characters
-                text = text.replace('…', '...')
-                # Replace quotes
-                text = text.replace('"', '"').replace('"', '"')
-                text = text.replace(''', "'").replace(''', "'")
-                # Replace em dash and en dash
-                text = text.replace('—', '-').replace('–', '-')
-                return text
-                
-            def chapter_title(self, title):
-                # Arial 12
-                self.set_font('Arial', 'B', 12)
-                # Background color
-                self.set_fill_color(200, 220, 255)
-                # Title
-                self.cell(0, 6, self.sanitize_text(title), 0, 1, 'L', True)
-                # Line break
-                self.ln(4)
-                
-            def chapter_body(self, body, font_size=10):
-                # Arial font
-                self.set_font('Arial', '', font_size)
-                # Output justified text
-                self.multi_cell(0, 5, self.sanitize_text(body))
-                # Line break
-                self.ln()
-                
-            def add_section_title(self, title):
-                self.set_font('Arial', 'B', 11)
-                self.cell(0, 6, self.sanitize_text(title), 0, 1, 'L')
-                self.ln(2)
-            
-        # Create the PDF object
-        pdf = PDF()
-        pdf.alias_nb_pages()
-        pdf.add_page()
-        
-        # Add date and company
-        pdf.set_font("Arial", "", 10)
-        pdf.cell(190, 6, f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M')}", ln=True, align="R")
-        
-        # Add company name if available
-        if company_name:
-            pdf.cell(190, 6, f"Company: {company_name}", ln=True, align="L")
-        
-        # Add divider
-        pdf.line(10, pdf.get_y(), 200, pdf.get_y())
-        pdf.ln(5)
-        
-        # Add summary section
-        pdf.set_font("Arial", "B", 14)
-        pdf.cell(190, 10, "Contract Summary", ln=True)
-        pdf.set_font("Arial", "", 10)
-        
-        # Add summary details
-        pdf.set_font("Arial", "B", 11)
-        pdf.cell(190, 7, f"Contract Type: {summary_data.get('contract_type', 'N/A')}", ln=True)
-        pdf.cell(190, 7, "Parties Involved:", ln=True)
-        pdf.set_font("Arial", "", 10)
-        for party in summary_data.get('parties', ['Unknown']):
-            pdf.cell(190, 6, f"- {party}", ln=True)
-        
-        pdf.set_font("Arial", "B", 11)    
-        pdf.cell(190, 7, "Purpose:", ln=True)
-        pdf.set_font("Arial", "", 10)
-        pdf.multi_cell(190, 6, summary_data.get('purpose', 'Unknown'))
-        
-        pdf.ln(5)
-        
-        # Add scores section
-        pdf.set_font("Arial", "B", 14)
-        pdf.cell(190, 10, "Contract Score Analysis", ln=True)
-        
-        # Add overall score
-        pdf.set_font("Arial", "B", 12)
-        overall_score = analysis_data.get('overall_score', 0)
-        pdf.cell(190, 8, f"Overall Score: {overall_score}/100", ln=True)
-        
-        # Add score breakdown
-        pdf.set_font("Arial", "B", 11)
-        pdf.cell(190, 7, "Score Breakdown:", ln=True)
-        pdf.set_font("Arial", "", 10)
-        
-        score_breakdown = analysis_data.get('score_breakdown', {})
-        for category, score in score_breakdown.items():
-            pdf.cell(190, 6, f"- {category.replace('_', ' ').title()}: {score}/100", ln=True)
-        
-        # Add score explanation
-        pdf.set_font("Arial", "B", 11)
-        pdf.cell(190, 7, "Analysis Summary:", ln=True)
-        pdf.set_font("Arial", "", 10)
-        pdf.multi_cell(190, 6, analysis_data.get('summary', 'No analysis available.'))
-        
-        pdf.ln(5)
-        
-        # Add risks section
-        pdf.set_font("Arial", "B", 14)
-        pdf.cell(190, 10, "Risks Analysis", ln=True)
-        
-        # Add risks
-        pdf.set_font("Arial", "", 10)
-        for risk_name, risk_info in risks_opportunities.get('risks', {}).items():
-            pdf.set_font("Arial", "B", 11)
-            pdf.cell(190, 7, f"{risk_name.replace('_', ' ').title()} (Level: {risk_info.get('level', 'Medium')})", ln=True)
-            pdf.set_font("Arial", "", 10)
-            pdf.multi_cell(190, 6, f"Description: {risk_info.get('description', 'N/A')}")
-            pdf.multi_cell(190, 6, f"Impact: {risk_info.get('potential_impact', 'N/A')}")
-            pdf.multi_cell(190, 6, f"Mitigation: {risk_info.get('mitigation_suggestions', 'N/A')}")
-            pdf.ln(3)
-        
-        pdf.ln(5)
-        
-        # Add new page for opportunities
-        pdf.add_page()
-        
-        # Add opportunities section
-        pdf.set_font("Arial", "B", 14)
-        pdf.cell(190, 10, "Opportunities Analysis", ln=True)
-        
-        # Add opportunities
-        pdf.set_font("Arial", "", 10)
-        for opp_name, opp_info in risks_opportunities.get('opportunities', {}).items():
-            pdf.set_font("Arial", "B", 11)
-            pdf.cell(190, 7, f"{opp_name.replace('_', ' ').title()} (Level: {opp_info.get('level', 'Medium')})", ln=True)
-            pdf.set_font("Arial", "", 10)
-            pdf.multi_cell(190, 6, f"Description: {opp_info.get('description', 'N/A')}")
-            pdf.multi_cell(190, 6, f"Value: {opp_info.get('potential_value', 'N/A')}")
-            pdf.multi_cell(190, 6, f"Action Items: {opp_info.get('action_items', 'N/A')}")
-            pdf.ln(3)
-        
-        pdf.ln(5)
-        
-        # Add key provisions section
-        pdf.set_font("Arial", "B", 14)
-        pdf.cell(190, 10, "Key Provisions", ln=True)
-        
-        # Add provisions
-        pdf.set_font("Arial", "", 10)
-        for provision in summary_data.get('key_provisions', ['No key provisions identified.']):
-            pdf.multi_cell(190, 6, f"- {provision}")
-        
-        pdf.ln(5)
-        
-        # Add important dates if available
-        if summary_data.get('important_dates'):
-            pdf.set_font("Arial", "B", 14)
-            pdf.cell(190, 10, "Important Dates", ln=True)
-            pdf.set_font("Arial", "", 10)
-            for date_item in summary_data.get('important_dates', []):
-                pdf.multi_cell(190, 6, f"- {date_item.get('event', 'Event')}: {date_item.get('date', 'N/A')}")
-            pdf.ln(5)
-        
-        # Add key clauses section
-        pdf.add_page()
-        pdf.set_font("Arial", "B", 14)
-        pdf.cell(190, 10, "Key Clauses Analysis", ln=True)
-        
-        # Add clauses
-        if 'key_clauses' in clause_analysis:
-            for clause in clause_analysis.get('key_clauses', []):
-                pdf.set_font("Arial", "B", 11)
-                pdf.cell(190, 7, f"{clause.get('clause_type', 'Clause')}", ln=True)
-                
-                pdf.set_font("Arial", "I", 10)
-                pdf.multi_cell(190, 6, f"Extract: {clause.get('clause_extract', 'N/A')}")
-                
-                pdf.set_font("Arial", "", 10)
-                pdf.multi_cell(190, 6, f"Explanation: {clause.get('explanation', 'N/A')}")
-                
-                if clause.get('concerns'):
-                    pdf.set_font("Arial", "B", 10)
-                    pdf.cell(190, 6, "Concerns:", ln=True)
-                    pdf.set_font("Arial", "", 10)
-                    pdf.multi_cell(190, 6, clause.get('concerns', 'None'))
-                
-                pdf.ln(5)
-        
-        # Add disclaimer footer
-        pdf.set_y(-25)
-        pdf.set_font("Arial", "I", 8)
-        pdf.multi_cell(190, 4, "Disclaimer: This analysis is generated by AI and should not replace professional legal advice. Always consult with a qualified legal professional for important legal matters.")
-        
-        # Return the PDF as bytes
-        # Create a temporary file to avoid BytesIO issues
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-            pdf_path = tmp_file.name
-            
-        # Output PDF to the temporary file
-        pdf.output(pdf_path)
-        
-        # Read the file and return its bytes
-        with open(pdf_path, 'rb') as f:
-            pdf_bytes = f.read()
-            
-        # Clean up the temporary file
-        os.unlink(pdf_path)
+        result = analyze_in_chunks(text, _combined_chunk, merge_combined)
         
+        # Only cache responses that split into every section
+        if len(split_combined_analysis(result)) == len(ANALYSIS_STAGES):
+            analysis_cache.set(cache_key, 'analyze_contract_combined', version, result)
+        return result
+    
+    except Exception as e:
+        if is_rate_limited(e):
+            raise
+        st.error(f"Error running combined analysis: {str(e)}")
+        return None
+
+def split_combined_analysis(result):
+    """Split a combined analysis into the shapes the individual analysis functions return.
+    
+    Returns a dict keyed by session state name (analysis_results, risks_opportunities,
+    summary_data, clause_analysis, key_terms). Sections that are missing or malformed
+    are left out so the caller can re-run just those.
+    """
+    if not isinstance(result, dict):
+        return {}
+    
+    parts = {}
+    
+    score = result.get('score')
+    if isinstance(score, dict) and 'overall_score' in score:
+        parts['analysis_results'] = {
+            'overall_score': score.get('overall_score'),
+            'score_breakdown': score.get('score_breakdown', {}),
+            'summary': score.get('summary', '')
+        }
+    
+    risks = result.get('risks')
+    opportunities = result.get('opportunities')
+    if isinstance(risks, dict) and isinstance(opportunities, dict):
+        parts['risks_opportunities'] = {'risks': risks, 'opportunities': opportunities}
+    
+    summary = result.get('summary')
+    if isinstance(summary, dict) and summary:
+        parts['summary_data'] = summary
+    
+    if isinstance(result.get('key_clauses'), list):
+        parts['clause_analysis'] = {'key_clauses': result['key_clauses']}
+    
+    if isinstance(result.get('key_terms'), list):
+        parts['key_terms'] = {'key_terms': result['key_terms']}
+    
+    return parts
+
+def report_sections():
+    """The analysis results a report is built from, by name"""
+    return {
+        'analysis_results': st.session_state.analysis_results,
+        'risks_opportunities': st.session_state.risks_opportunities or {},
+        'clause_analysis': st.session_state.clause_analysis or {},
+        'summary_data': st.session_state.summary_data or {}
+    }
+
+def generate_pdf_report(sections, lang_code='en', company_name=None, cache_key=None):
+    """Generate a downloadable PDF report of the contract analysis
+    
+    Reports are rendered to bytes in memory and kept in the shared report
+    cache; a report already rendered (or being prerendered) is returned from it.
+    """
+    cache_key = cache_key or report_key(sections, lang_code, company_name)
+    cached = report_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    try:
+        pdf_bytes = render_translated_report(sections, lang_code, company_name)
+        report_cache.set(cache_key, pdf_bytes)
         return pdf_bytes
     
     except Exception as e:
         st.error(f"Error generating PDF report: {str(e)}")
         return None
 
-def chat_with_contract(text, question):
-    """Chat with the contract - ask specific questions and get AI-powered answers"""
+def remember_analyzed_contract():
+    """Keep this session's analyzed contracts (latest ANALYZED_CONTRACTS_LIMIT) for batch export"""
+    if not st.session_state.get('analysis_results'):
+        return
+    history = st.session_state.setdefault('analyzed_contracts', {})
+    name = st.session_state.get('contract_name') or f"Contract {len(history) + 1}"
+    history.pop(name, None)
+    history[name] = copy.deepcopy(report_sections())
+    while len(history) > ANALYZED_CONTRACTS_LIMIT:
+        history.pop(next(iter(history)))
+
+def prerender_report():
+    """Start rendering the report for the user's preferred language as soon as analysis is done"""
+    if not REPORT_PRERENDER or not st.session_state.get('analysis_results'):
+        return
+    # Snapshot, so later changes to session state can't race the render
+    sections = copy.deepcopy(report_sections())
+    lang_code = st.session_state.get('selected_language') or 'en'
+    report_cache.prerender(report_key(sections, lang_code, None), render_translated_report, sections, lang_code, None)
+
+def select_chat_context(text, question, index=None):
+    """Pick the contract passages most relevant to a question, with section references"""
+    # Short contracts are cheap enough to send whole
+    if len(text) <= CHAT_FULL_TEXT_CHARS:
+        return text
     
-    # Check if we have text to analyze
-    if not text or len(text.strip()) < 10:
-        return "Please upload a contract document first before asking questions."
-        
-    prompt = f"""
+    if index is None:
+        index = ContractIndex(text)
+    
+    hits = index.search(question, top_k=CHAT_TOP_K)
+    if not hits:
+        # Nothing matched the question's words; fall back to the opening of the contract
+        return text[:CHAT_FULL_TEXT_CHARS]
+    return index.format_passages(hits)
+
+def build_chat_prompt(text, question, index=None):
+    """Prompt for a question about the contract, with the relevant passages as context"""
+    context = select_chat_context(text, question, index)
+    
+    return f"""
     Based on the legal contract provided, please answer the following question:
     
     Question: {question}
     
-    Respond directly and factually based only on information present in the contract. If the answer cannot be determined from the contract, clearly state that. If relevant, mention the specific section(s) where the information is found.
+    Respond directly and factually based only on information present in the contract. If the answer cannot be determined from the contract, clearly state that. If relevant, mention the specific section(s) or clause number(s) where the information is found.
+    
+    The contract passages below are the ones most relevant to the question. Each is labelled with the section and clause it comes from.
     
-    Contract text: {text[:12000]}  # Use first 12000 chars to stay within token limits
+    Contract passages:
+    {context}
     """
+
+def chat_with_contract(text, question, index=None):
+    """Chat with the contract - ask specific questions and get AI-powered answers"""
+    
+    # Check if we have text to analyze
+    if not text or len(text.strip()) < 10:
+        return "Please upload a contract document first before asking questions."
+    
+    prompt = build_chat_prompt(text, question, index)
     
     try:
-        response = model.generate_content(prompt)
+        response = llm.generate(prompt, task='chat')
         return response.text.strip()
     
     except Exception as e:
         st.error(f"Error processing question: {str(e)}")
         return "I'm sorry, but I encountered an error while processing your question. Please try again or rephrase your question."
 
+def stream_chat_with_contract(text, question, index=None):
+    """Streaming version of chat_with_contract, yielding the answer as it arrives"""
+    if not text or len(text.strip()) < 10:
+        yield "Please upload a contract document first before asking questions."
+        return
+    
+    prompt = build_chat_prompt(text, question, index)
+    
+    try:
+        yield from llm.generate_stream(prompt, task='chat')
+    
+    except Exception as e:
+        st.error(f"Error processing question: {str(e)}")
+        yield "I'm sorry, but I encountered an error while processing your question. Please try again or rephrase your question."
+
+# Analysis stages run by "Analyze Contract": (session state key, label, function)
+ANALYSIS_STAGES = [
+    ("analysis_results", "Contract score", analyze_contract_score),
+    ("risks_opportunities", "Risks & opportunities", analyze_risks_and_opportunities),
+    ("summary_data", "Summary", generate_summary),
+    ("clause_analysis", "Key clauses", analyze_contract_clauses),
+    ("key_terms", "Key terms", extract_key_terms)
+]
+
+# Tab index (in show_contract_analysis_interface) where each stage's result appears
+ANALYSIS_STAGE_TABS = {
+    "analysis_results": 0,
+    "risks_opportunities": 1,
+    "summary_data": 5,
+    "clause_analysis": 2,
+    "key_terms": 3
+}
+
+def run_contract_analysis(text, analysis_tabs, combined=False):
+    """Run all analysis stages concurrently, storing each result as soon as it finishes"""
+    labels = {key: label for key, label, _ in ANALYSIS_STAGES}
+    
+    # One status line per stage, shown in the tab where its results will appear
+    stage_notes = {}
+    for key, label, _ in ANALYSIS_STAGES:
+        with analysis_tabs[ANALYSIS_STAGE_TABS[key]]:
+            stage_notes[key] = st.empty()
+            stage_notes[key].info(f"{label}: analyzing...")
+    
+    progress = st.progress(0.0, text="Analyzing contract... This may take a minute...")
+    timings = []
+    stages = ANALYSIS_STAGES
+    
+    # A report rendered for the previous analysis no longer applies
+    st.session_state.report_pdf = None
+    
+    if combined:
+        # One request for everything; any part that comes back unusable is
+        # re-run below with its own prompt
+        combined_stage = run_analysis_stages([("combined", analyze_contract_combined, (text,))])["combined"]
+        timings.append(combined_stage.as_dict())
+        parts = split_combined_analysis(combined_stage.result) if combined_stage.ok else {}
+        
+        for key, value in parts.items():
+            st.session_state[key] = value
+            stage_notes[key].success(f"{labels[key]} ready ({combined_stage.elapsed:.1f}s, combined request)")
+        
+        stages = [stage for stage in ANALYSIS_STAGES if stage[0] not in parts]
+        progress.progress(len(parts) / len(ANALYSIS_STAGES), text="Combined analysis finished")
+    
+    offset = len(ANALYSIS_STAGES) - len(stages)
+    
+    def on_stage_complete(stage, done, total):
+        label = labels[stage.name]
+        if stage.ok:
+            st.session_state[stage.name] = stage.result
+            stage_notes[stage.name].success(f"{label} ready ({stage.elapsed:.1f}s)")
+        else:
+            # Don't leave results from a previously analyzed contract behind
+            st.session_state[stage.name] = None
+            stage_notes[stage.name].error(f"{label} failed: {stage.error}")
+        done += offset
+        progress.progress(done / len(ANALYSIS_STAGES), text=f"Analyzed {done} of {len(ANALYSIS_STAGES)}: {label}")
+    
+    results = {}
+    if stages:
+        results = run_analysis_stages(
+            [(key, func, (text,)) for key, _, func in stages],
+            on_complete=on_stage_complete
+        )
+        timings.extend(results[key].as_dict() for key, _, _ in stages)
+    
+    # Keep per-stage timings so we can see which prompt dominates wall-clock time
+    st.session_state.analysis_timings = timings
+    progress.empty()
+    
+    link_clause_references(text)
+    remember_analyzed_contract()
+    prerender_report()
+    
+    return all(result.ok for result in results.values())
+
+def link_clause_references(text):
+    """Tag each key clause with the clause of the contract it was quoted from (e.g. "Clause 8.1")"""
+    clause_analysis = st.session_state.get('clause_analysis')
+    if not clause_analysis:
+        return
+    
+    model = get_document_model(st.session_state, text)
+    for clause in clause_analysis.get('key_clauses', []):
+        node = model.locate(clause.get('clause_extract'))
+        if node is not None:
+            clause['clause_id'] = node.id
+            clause['clause_ref'] = reference(node)
+
 def show_contract_analysis_interface():
     """Display the contract analysis interface"""
     if 'contract_text' not in st.session_state:
@@ -1020,44 +871,72 @@ def show_contract_analysis_interface():
         uploaded_file = st.file_uploader("Upload Contract (PDF or DOCX)", type=["pdf", "docx"])
         
         if uploaded_file:
-            # Extract text based on file type
-            with st.spinner("Extracting text from document..."):
-                if uploaded_file.name.endswith('.pdf'):
-                    st.session_state.contract_text = extract_text_from_pdf(uploaded_file)
-                elif uploaded_file.name.endswith('.docx'):
-                    st.session_state.contract_text = extract_text_from_docx(uploaded_file)
+            # Extract text once per upload; reruns reuse the session copy
+            if st.session_state.get('extracted_file_id') != uploaded_file.file_id:
+                # Stop extracting a previously uploaded file
+                if st.session_state.get('extraction_job') is not None:
+                    st.session_state.extraction_job.cancel()
+                
+                with st.spinner("Extracting text from document..."):
+                    (
+                        st.session_state.contract_text,
+                        st.session_state.page_offsets,
+                        st.session_state.extraction_job
+                    ) = extract_uploaded_file(uploaded_file)
+                    st.session_state.extracted_file_id = uploaded_file.file_id
+                    st.session_state.contract_name = uploaded_file.name
+                    st.session_state.extraction_error = None
             
-            if st.session_state.contract_text:
-                st.success(f"Text extracted successfully from {uploaded_file.name}")
+            extraction_job = st.session_state.get('extraction_job')
+
+            if extraction_job is not None and not st.session_state.contract_text:
+                # The first pages had no text (a scanned cover, blank pages); keep
+                # picking up the rest until the job finishes
+                st.info(f"No text in the first pages of {uploaded_file.name} yet, extracting the rest...")
+                show_extraction_progress()
+            elif st.session_state.contract_text:
+                if extraction_job is None:
+                    st.success(f"Text extracted successfully from {uploaded_file.name}")
+                    if st.session_state.get('extraction_error'):
+                        st.warning(f"Only part of the document could be extracted: {st.session_state.extraction_error}")
+                    
+                    # Passage index for chat, rebuilt only when the text changes
+                    get_contract_index(st.session_state, st.session_state.contract_text)
+                else:
+                    # Large PDF: the first pages are ready, the rest is still being extracted
+                    st.info(f"Showing the first pages of {uploaded_file.name} while the rest is extracted.")
+                    show_extraction_progress()
                 
-                # Show a preview of the extracted text
+                # Show a preview of the extracted text; only its start is sent to the browser
                 with st.expander("Preview Extracted Text"):
-                    st.text_area("Contract Text", st.session_state.contract_text, height=200, disabled=True)
+                    preview = text_preview(st.session_state.contract_text)
+                    st.text_area("Contract Text", preview, height=200, disabled=True)
+                    if len(preview) < len(st.session_state.contract_text):
+                        st.caption(f"Showing the first {len(preview):,} of "
+                                   f"{len(st.session_state.contract_text):,} characters.")
+                
+                combined_mode = st.checkbox(
+                    "Combined analysis (one request, fewer tokens)",
+                    value=ANALYSIS_MODE == 'combined',
+                    key="combined_analysis_mode"
+                )
                 
-                # Analyze button
-                if st.button("Analyze Contract", key="analyze_contract_btn"):
+                # Analysis needs the whole document
+                if extraction_job is not None:
+                    st.caption("Analysis will be available once the whole document has been extracted.")
+                elif st.button("Analyze Contract", key="analyze_contract_btn"):
                     # Check usage limits before analysis
                     if check_usage_limits('analysis'):
-                        with st.spinner("Analyzing contract... This may take a minute..."):
-                            # Run contract analysis in parallel
-                            score_analysis = analyze_contract_score(st.session_state.contract_text)
-                            risks_opps = analyze_risks_and_opportunities(st.session_state.contract_text)
-                            summary = generate_summary(st.session_state.contract_text)
-                            
-                            # Store results in session state
-                            st.session_state.analysis_results = score_analysis
-                            st.session_state.risks_opportunities = risks_opps
-                            st.session_state.summary_data = summary
-                            
-                            # Analyze key clauses as well
-                            st.session_state.clause_analysis = analyze_contract_clauses(st.session_state.contract_text)
-                            
-                            # Extract key terms
-                            st.session_state.key_terms = extract_key_terms(st.session_state.contract_text)
-                            
+                        # Run contract analysis in parallel
+                        if run_contract_analysis(st.session_state.contract_text, analysis_tabs, combined=combined_mode):
                             st.success("Analysis complete! Navigate through the tabs to see the results.")
+                        else:
+                            st.warning("Some parts of the analysis did not finish. Completed results are shown in the tabs.")
                     else:
                         st.warning("You have reached your daily analysis limit. Please upgrade to continue.")
+            elif uploaded_file.name.endswith('.pdf') and not ocr_available():
+                st.error("Failed to extract text from the document. If it is a scanned PDF, text recognition "
+                         "(Tesseract) is not available on this server. Please try a different file.")
             else:
                 st.error("Failed to extract text from the document. Please try a different file.")
         
@@ -1072,29 +951,7 @@ def show_contract_analysis_interface():
                 # Create a gauge chart for overall score
                 overall_score = st.session_state.analysis_results.get('overall_score', 0)
                 
-                fig = go.Figure(go.Indicator(
-                    mode="gauge+number",
-                    value=overall_score,
-                    domain={'x': [0, 1], 'y': [0, 1]},
-                    title={'text': "Overall Score"},
-                    gauge={
-                        'axis': {'range': [0, 100]},
-                        'bar': {'color': "darkblue"},
-                        'steps': [
-                            {'range': [0, 40], 'color': "red"},
-                            {'range': [40, 70], 'color': "orange"},
-                            {'range': [70, 90], 'color': "lightgreen"},
-                            {'range': [90, 100], 'color': "green"},
-                        ],
-                        'threshold': {
-                            'line': {'color': "black", 'width': 4},
-                            'thickness': 0.75,
-                            'value': overall_score
-                        }
-                    }
-                ))
-                
-                fig.update_layout(height=300, margin=dict(l=20, r=20, t=30, b=20))
+                fig = score_gauge(overall_score)
                 st.plotly_chart(fig, use_container_width=True)
             
             with col2:
@@ -1104,47 +961,41 @@ def show_contract_analysis_interface():
                 score_breakdown = st.session_state.analysis_results.get('score_breakdown', {})
                 
                 # Create a horizontal bar chart for score breakdown
-                categories = []
-                scores = []
-                
-                for category, score in score_breakdown.items():
-                    categories.append(category.replace('_', ' ').title())
-                    scores.append(score)
-                
-                # Create dataframe for the chart
-                df = pd.DataFrame({
-                    "Category": categories,
-                    "Score": scores
-                })
-                
-                # Sort by score
-                df = df.sort_values(by="Score", ascending=True)
-                
-                # Create bar chart
-                fig = px.bar(
-                    df, 
-                    y="Category", 
-                    x="Score", 
-                    orientation='h',
-                    text="Score",
-                    range_x=[0, 100],
-                    color="Score",
-                    color_continuous_scale=["red", "orange", "lightgreen", "green"]
-                )
-                
-                fig.update_layout(
-                    height=300,
-                    margin=dict(l=20, r=20, t=30, b=20),
-                    coloraxis_showscale=False
-                )
-                
-                fig.update_traces(texttemplate='%{text}', textposition='outside')
+                fig = score_breakdown_chart(score_breakdown)
                 
                 st.plotly_chart(fig, use_container_width=True)
             
             # Display summary
             st.markdown("### Analysis Summary")
             st.markdown(st.session_state.analysis_results.get('summary', 'No summary available.'))
+        
+        # Per-stage timings from the last analysis run
+        if st.session_state.get('analysis_timings'):
+            with st.expander("Analysis timings"):
+                st.dataframe(pd.DataFrame(st.session_state.analysis_timings), use_container_width=True)
+                
+                cache_stats = analysis_cache.stats()
+                st.caption(
+                    f"Analysis cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+                    f"{cache_stats['evictions']} evictions, {cache_stats['entries']} entries "
+                    f"({cache_stats['size_bytes'] / 1024:.0f} KB)"
+                )
+                
+                reuse_stats = clause_index.stats()
+                if reuse_stats['sections']:
+                    st.caption(
+                        f"Clause reuse: {reuse_stats['reused_sections']} of {reuse_stats['sections']} sections "
+                        f"matched earlier analyses ({reuse_stats['reuse_rate']:.0%} of contract text not resent)"
+                    )
+                
+                limiter_stats = get_rate_limiter().stats()
+                if limiter_stats:
+                    st.caption(
+                        f"LLM requests: {limiter_stats['in_flight']} in flight, {limiter_stats['queue_depth']} queued "
+                        f"(limit {limiter_stats['concurrency_limit']}), wait avg {limiter_stats['wait_avg_s']:.2f}s "
+                        f"p95 {limiter_stats['wait_p95_s']:.2f}s, {limiter_stats['throttled']} throttled, "
+                        f"{limiter_stats['retries']} retries"
+                    )
     
     with analysis_tabs[1]:
         if 'risks_opportunities' in st.session_state and st.session_state.risks_opportunities:
@@ -1237,7 +1088,10 @@ def show_contract_analysis_interface():
             
             if 'key_clauses' in st.session_state.clause_analysis:
                 for i, clause in enumerate(st.session_state.clause_analysis['key_clauses']):
-                    with st.expander(f"{clause.get('clause_type', f'Clause {i+1}')}"):
+                    clause_title = clause.get('clause_type', f'Clause {i+1}')
+                    if clause.get('clause_ref'):
+                        clause_title = f"{clause_title} ({clause['clause_ref']})"
+                    with st.expander(clause_title):
                         st.markdown(f"""
                         <div class="ai-message">
                         <strong>Extract:</strong> {clause.get('clause_extract', 'No extract available.')}
@@ -1333,19 +1187,37 @@ def show_contract_analysis_interface():
                 if st.button("Submit Question", key="ask_contract_btn"):
                     # Check usage limits for queries
                     if check_usage_limits('queries'):
-                        with st.spinner("Analyzing your question..."):
-                            answer = chat_with_contract(st.session_state.contract_text, user_question)
-                            
-                            # Display the question and answer
-                            st.markdown("#### Your Question:")
-                            st.markdown(f"> {user_question}")
+                        contract_index = get_contract_index(st.session_state, st.session_state.contract_text)
+                        
+                        # Display the question and answer
+                        st.markdown("#### Your Question:")
+                        st.markdown(f"> {user_question}")
+                        
+                        st.markdown("#### Answer:")
+                        if STREAM_RESPONSES:
+                            # Render the answer as it arrives; write_stream returns the full text
+                            answer = st.write_stream(stream_chat_with_contract(
+                                st.session_state.contract_text,
+                                user_question,
+                                contract_index
+                            ))
+                        else:
+                            with st.spinner("Analyzing your question..."):
+                                answer = chat_with_contract(
+                                    st.session_state.contract_text,
+                                    user_question,
+                                    contract_index
+                                )
                             
-                            st.markdown("#### Answer:")
                             st.markdown(f"""
                             <div class="ai-message">
                             {answer}
                             </div>
                             """, unsafe_allow_html=True)
+                        
+                        if 'chat_history' not in st.session_state:
+                            st.session_state.chat_history = []
+                        st.session_state.chat_history.append((user_question, answer.strip()))
                     else:
                         st.warning("You have reached your daily query limit. Please upgrade to continue.")
             
@@ -1368,11 +1240,14 @@ def show_contract_analysis_interface():
         if 'analysis_results' in st.session_state and st.session_state.analysis_results and st.session_state.contract_text:
             st.markdown("### Export Analysis Report")
             
-            # Language selection for translation
+            # Language selection for translation; defaults to the user's preferred language,
+            # which is the report prerendered after analysis
+            language_codes = list(LANGUAGES.values())
+            preferred = st.session_state.get('selected_language') or 'en'
             selected_language = st.selectbox(
                 "Select report language:", 
                 list(LANGUAGES.keys()),
-                index=0
+                index=language_codes.index(preferred) if preferred in language_codes else 0
             )
             
             # Company name input
@@ -1380,44 +1255,94 @@ def show_contract_analysis_interface():
             
             # Generate report button
             if st.button("Generate PDF Report", key="generate_report_btn"):
-                # Check usage limits for report generation
-                if check_usage_limits('reports'):
+                # Get selected language code
+                lang_code = LANGUAGES[selected_language]
+                sections = report_sections()
+                cache_key = report_key(sections, lang_code, company_name)
+                exported = st.session_state.setdefault('exported_reports', set())
+                
+                # Check usage limits for report generation; exporting the same report again is free
+                if cache_key in exported or check_usage_limits('reports'):
                     with st.spinner("Generating comprehensive PDF report..."):
-                        # Get selected language code
-                        lang_code = LANGUAGES[selected_language]
-                        
-                        # Translate if needed
-                        if lang_code != 'en':
-                            # Here we would translate key parts of the report
-                            # For simplicity, we're skipping actual translation in this demo
-                            st.info(f"Report will be generated in {selected_language}")
-                        
-                        # Generate the PDF
-                        pdf_bytes = generate_pdf_report(
-                            st.session_state.contract_text,
-                            st.session_state.analysis_results,
-                            st.session_state.risks_opportunities,
-                            st.session_state.clause_analysis,
-                            st.session_state.summary_data,
-                            company_name
-                        )
-                        
-                        if pdf_bytes:
-                            # Create a download button for the PDF
-                            b64_pdf = base64.b64encode(pdf_bytes).decode('utf-8')
-                            current_date = datetime.now().strftime("%Y%m%d")
-                            pdf_name = f"contract_analysis_{current_date}.pdf"
-                            
-                            href = f'<a class="download-btn" href="data:application/pdf;base64,{b64_pdf}" download="{pdf_name}">Download PDF Report</a>'
-                            st.markdown(href, unsafe_allow_html=True)
+                        pdf_bytes = generate_pdf_report(sections, lang_code, company_name, cache_key)
+                    
+                    if pdf_bytes:
+                        exported.add(cache_key)
+                        current_date = datetime.now().strftime("%Y%m%d")
+                        # Kept in session state so the download button survives reruns
+                        st.session_state.report_pdf = (f"contract_analysis_{current_date}.pdf", pdf_bytes)
                 else:
                     st.warning("You have reached your daily report generation limit. Please upgrade to continue.")
+            
+            # Served over HTTP by Streamlit's media endpoint rather than embedded in the page
+            if st.session_state.get('report_pdf'):
+                pdf_name, pdf_bytes = st.session_state.report_pdf
+                st.download_button(
+                    "Download PDF Report", pdf_bytes, file_name=pdf_name,
+                    mime="application/pdf", key="download_report_btn"
+                )
+            
+            show_batch_export(selected_language, company_name)
         else:
             st.info("Please upload and analyze a contract first to generate a report.")
 
-def generate_contract(contract_type, details):
-    """Generate a contract based on type and details"""
-    prompt = f"""
+def show_batch_export(selected_language, company_name):
+    """Export the reports of several contracts analyzed in this session as one ZIP (premium)"""
+    history = st.session_state.get('analyzed_contracts') or {}
+    if len(history) < 2:
+        return
+    
+    st.markdown("### Batch Export")
+    if st.session_state.subscription_type != 'paid':
+        st.info("Batch export of several contracts is available on the premium plan.")
+        return
+    
+    selected = st.multiselect("Contracts to export:", list(history.keys()), default=list(history.keys()))
+    if st.button("Export Selected Reports (ZIP)", key="batch_export_btn") and selected:
+        lang_code = LANGUAGES[selected_language]
+        previous = st.session_state.get('batch_archive')
+        if previous is not None:
+            previous.release()
+        
+        progress = st.progress(0.0, text="Rendering reports...")
+        
+        def on_report(done, total, name):
+            progress.progress(done / total, text=f"Rendered {done} of {total} reports ({name})")
+        
+        try:
+            archive = export_reports(
+                [(name, history[name]) for name in selected],
+                lang_code,
+                company_name,
+                cache=report_cache,
+                key_for=lambda sections: report_key(sections, lang_code, company_name),
+                progress=on_report
+            )
+        except Exception as e:
+            progress.empty()
+            st.session_state.batch_archive = None
+            st.error(f"Error exporting reports: {str(e)}")
+            return
+        
+        progress.empty()
+        st.session_state.batch_archive = archive
+        if archive.failed:
+            st.warning(f"Could not render reports for: {', '.join(archive.failed)}")
+    
+    archive = st.session_state.get('batch_archive')
+    if archive is not None and archive.names:
+        # The archive stays on disk and is only read when the button is clicked
+        st.download_button(
+            f"Download {len(archive.names)} Reports ({archive.size / 1024 / 1024:.1f} MB)",
+            archive.read,
+            file_name=f"contract_reports_{datetime.now().strftime('%Y%m%d')}.zip",
+            mime="application/zip",
+            key="download_batch_btn"
+        )
+
+def build_contract_prompt(contract_type, details):
+    """Prompt for generating a contract of the given type"""
+    return f"""
     Generate a professional {contract_type} contract. Include the following details:
     
     {details}
@@ -1426,14 +1351,28 @@ def generate_contract(contract_type, details):
     Include standard legal language, definitions section, rights and obligations, termination terms, and other
     appropriate sections for this type of contract.
     """
+
+def generate_contract(contract_type, details):
+    """Generate a contract based on type and details"""
+    prompt = build_contract_prompt(contract_type, details)
     
     try:
-        response = model.generate_content(prompt)
+        response = llm.generate(prompt, task='contract_generation')
         return response.text.strip()
     except Exception as e:
         st.error(f"Error generating contract: {str(e)}")
         return "Failed to generate contract. Please try again or contact support."
 
+def stream_generate_contract(contract_type, details):
+    """Streaming version of generate_contract, yielding the contract as it is written"""
+    prompt = build_contract_prompt(contract_type, details)
+    
+    try:
+        yield from llm.generate_stream(prompt, task='contract_generation')
+    except Exception as e:
+        st.error(f"Error generating contract: {str(e)}")
+        yield "Failed to generate contract. Please try again or contact support."
+
 def show_contract_generator():
     """Display the contract generator tab"""
     st.header("Contract Generator 📝")
@@ -1525,10 +1464,18 @@ def show_contract_generator():
     # Generate button
     if st.button("Generate Contract", key="gen_contract_btn"):
         if check_usage_limits('generation'):
-            with st.spinner("Generating your contract... This may take a moment..."):
-                generated_contract = generate_contract(selected_type, details)
-                st.session_state.generated_contract = generated_contract
-                st.success("Contract generated successfully!")
+            st.session_state.generated_contract_pdf = None
+            if STREAM_RESPONSES:
+                # Show the contract as it is written, then hand over to the editor below
+                stream_placeholder = st.empty()
+                with stream_placeholder.container():
+                    generated_contract = st.write_stream(stream_generate_contract(selected_type, details))
+                stream_placeholder.empty()
+                st.session_state.generated_contract = generated_contract.strip()
+            else:
+                with st.spinner("Generating your contract... This may take a moment..."):
+                    st.session_state.generated_contract = generate_contract(selected_type, details)
+            st.success("Contract generated successfully!")
         else:
             st.warning("You have reached your daily generation limit. Please upgrade to continue.")
     
@@ -1549,33 +1496,18 @@ def show_contract_generator():
                 with st.spinner("Creating PDF..."):
                     # Create PDF
                     try:
-                        pdf = FPDF()
-                        pdf.add_page()
-                        pdf.set_font("Arial", "B", 12)
-                        pdf.cell(190, 10, selected_type, ln=True, align="C")
-                        pdf.ln(5)
-                        
-                        pdf.set_font("Arial", "", 10)
-                        # Split text into lines and add to PDF
-                        lines = st.session_state.generated_contract.split('\n')
-                        for line in lines:
-                            if line.strip():  # Skip empty lines
-                                if line.strip().isupper():  # Section headers
-                                    pdf.set_font("Arial", "B", 10)
-                                    pdf.ln(2)
-                                    pdf.cell(190, 6, line, ln=True)
-                                    pdf.set_font("Arial", "", 10)
-                                else:
-                                    pdf.multi_cell(190, 5, line)
-                                    
-                        # Create download button
-                        pdf_bytes = pdf.output(dest='S').encode('latin-1')
-                        b64_pdf = base64.b64encode(pdf_bytes).decode('utf-8')
-                        href = f'<a href="data:application/pdf;base64,{b64_pdf}" download="{selected_type.replace(" ", "_")}.pdf">Click to download PDF</a>'
-                        st.markdown(href, unsafe_allow_html=True)
-                        st.success("PDF created! Click the link above to download.")
+                        st.session_state.generated_contract_pdf = render_contract(
+                            selected_type, st.session_state.generated_contract
+                        )
+                        st.success("PDF created! Use the button below to download it.")
                     except Exception as e:
                         st.error(f"Error creating PDF: {str(e)}")
+            
+            if st.session_state.get('generated_contract_pdf'):
+                st.download_button(
+                    "Download PDF", st.session_state.generated_contract_pdf,
+                    file_name=f"{selected_type.replace(' ', '_')}.pdf", mime="application/pdf"
+                )
 
 def show_home_page():
     """Display the home page"""
@@ -1993,6 +1925,21 @@ def show_account_page():
                 st.session_state.usage_counts.get('analysis', 0),
                 st.session_state.usage_counts.get('generation', 0)
             ), unsafe_allow_html=True)
+        
+        # Token usage and latency of this user's LLM calls, from running totals of the usage log
+        st.subheader("AI Usage (Last 30 Days)")
+        
+        usage_rows = get_usage_index().summary(st.session_state.email or "anonymous", days=30)
+        if usage_rows:
+            usage_summary = pd.DataFrame(usage_rows).drop(columns=["users"])
+            usage_summary["feature"] = usage_summary["feature"].str.replace("_", " ").str.title()
+            st.dataframe(usage_summary, use_container_width=True, hide_index=True)
+            st.caption(
+                f"{int(usage_summary['calls'].sum())} AI requests, "
+                f"{int(usage_summary['input_tokens'].sum() + usage_summary['output_tokens'].sum()):,} tokens"
+            )
+        else:
+            st.info("No AI usage recorded yet.")
     
     with account_tabs[3]:
         st.header("Preferences")
@@ -0,0 +1,159 @@
+import os
+import re
+import time
+import zipfile
+import tempfile
+import threading
+import weakref
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from report_translation import render_translated_report
+
+# Batch export of analysis reports into one ZIP archive. Reports are rendered
+# in a process pool (FPDF layout is pure Python and CPU bound) and each PDF is
+# written into the archive, on disk, as soon as it is ready, so at most a few
+# PDFs are in memory at any time: new renders are only submitted while the
+# rendered-but-unwritten bytes stay under BATCH_EXPORT_MAX_MEMORY_MB. Reports
+# already in the shared report cache are written without rendering.
+BATCH_EXPORT_WORKERS = int(os.getenv("BATCH_EXPORT_WORKERS", str(min(2, os.cpu_count() or 1))))
+BATCH_EXPORT_MAX_MEMORY_BYTES = int(float(os.getenv("BATCH_EXPORT_MAX_MEMORY_MB", "64")) * 1024 * 1024)
+# Size assumed for a report before any has been rendered
+INITIAL_REPORT_ESTIMATE = 512 * 1024
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=BATCH_EXPORT_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+    return _executor
+
+
+def _reset_executor():
+    """Drop a broken pool so the next call starts a fresh one"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def archive_name(name, used):
+    """File name inside the archive for a contract, made unique"""
+    stem = re.sub(r"[^\w\-. ]+", "_", os.path.splitext(name)[0]).strip() or "contract"
+    candidate = f"{stem}_analysis.pdf"
+    suffix = 2
+    while candidate in used:
+        candidate = f"{stem}_analysis_{suffix}.pdf"
+        suffix += 1
+    used.add(candidate)
+    return candidate
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class BatchArchive:
+    """A finished ZIP of reports on disk, deleted when released or garbage collected"""
+
+    def __init__(self, path, names, failed, elapsed):
+        self.path = path
+        self.names = names
+        self.failed = failed
+        self.elapsed = elapsed
+        self.size = os.path.getsize(path)
+        self._finalizer = weakref.finalize(self, _remove, path)
+
+    def read(self):
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def release(self):
+        self._finalizer()
+
+
+def export_reports(contracts, lang_code="en", company_name=None, cache=None, key_for=None,
+                   progress=None, max_memory_bytes=None):
+    """Render the reports of several analyzed contracts into one ZIP.
+
+    contracts is a list of (name, sections). With a report cache, key_for(sections)
+    gives the cache key of a contract's report and rendered reports are stored
+    back. progress(done, total, name) is called after each report is written.
+    Returns a BatchArchive; reports that fail to render are listed in .failed.
+    """
+    max_memory_bytes = max_memory_bytes or BATCH_EXPORT_MAX_MEMORY_BYTES
+    start = time.perf_counter()
+    total = len(contracts)
+    used = set()
+    names = []
+    failed = []
+    largest = INITIAL_REPORT_ESTIMATE
+
+    fd, path = tempfile.mkstemp(suffix=".zip", prefix="reports_")
+    os.close(fd)
+    try:
+        # PDFs are already compressed; storing them avoids a pointless deflate pass
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_STORED) as archive:
+            def write(name, data):
+                entry = archive_name(name, used)
+                archive.writestr(entry, data)
+                names.append(entry)
+                if progress is not None:
+                    progress(len(names) + len(failed), total, name)
+
+            pending = []
+            for name, sections in contracts:
+                key = key_for(sections) if cache is not None else None
+                data = cache.get(key) if cache is not None else None
+                if data is not None:
+                    write(name, data)
+                else:
+                    pending.append((name, sections, key))
+
+            executor = _get_executor() if pending else None
+            in_flight = {}
+            queue = list(reversed(pending))
+            while queue or in_flight:
+                # Keep at most max_memory_bytes of PDFs in flight, and at least one
+                limit = max(1, min(BATCH_EXPORT_WORKERS * 2, max_memory_bytes // largest))
+                while queue and len(in_flight) < limit:
+                    name, sections, key = queue.pop()
+                    future = executor.submit(render_translated_report, sections, lang_code, company_name)
+                    in_flight[future] = (name, key)
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, key = in_flight.pop(future)
+                    try:
+                        data = future.result()
+                    except Exception as e:
+                        print(f"Batch export: report for {name} failed: {str(e)}")
+                        failed.append(name)
+                        if progress is not None:
+                            progress(len(names) + len(failed), total, name)
+                        if isinstance(e, BrokenProcessPool):
+                            _reset_executor()
+                            executor = _get_executor()
+                        continue
+                    largest = max(largest, len(data))
+                    if cache is not None:
+                        cache.set(key, data)
+                    write(name, data)
+                    del data
+    except Exception:
+        _remove(path)
+        raise
+
+    return BatchArchive(path, names, failed, time.perf_counter() - start)
@@ -0,0 +1,122 @@
+"""Measure end-to-end analysis throughput on the offline stub backend.
+
+    python benchmarks/bench_analysis_flow.py [--sessions 8] [--contracts 4] [--latency-ms 800]
+                                             [--rpm 600] [--throttle-rate 0.05]
+
+Each simulated session analyzes its contracts one after another, running the
+five analysis stages the way the app does (concurrent stages, long contracts
+split into chunks, every response parsed against its schema) with all calls
+going through the shared rate limiter. No network access or API key is needed.
+"""
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from llm_backend import StubBackend, RateLimitedBackend, set_backend
+from rate_limiter import RateLimiter
+from analysis_pipeline import run_analysis_stages
+from chunked_analysis import (
+    analyze_in_chunks,
+    merge_scores,
+    merge_risks_and_opportunities,
+    merge_clauses,
+    merge_key_terms,
+    merge_summaries
+)
+from prompts import (
+    CONTRACT_SCORE_PROMPT,
+    RISKS_OPPORTUNITIES_PROMPT,
+    KEY_CLAUSES_PROMPT,
+    KEY_TERMS_PROMPT,
+    SUMMARY_PROMPT
+)
+from response_parser import parse_structured_response
+from benchmarks.sample_contracts import make_contract
+
+# Stage name -> (task, prompt template, merge function), as in app.ANALYSIS_STAGES
+STAGES = {
+    "analysis_results": ("score", CONTRACT_SCORE_PROMPT, merge_scores),
+    "risks_opportunities": ("risks_opportunities", RISKS_OPPORTUNITIES_PROMPT, merge_risks_and_opportunities),
+    "clause_analysis": ("key_clauses", KEY_CLAUSES_PROMPT, merge_clauses),
+    "key_terms": ("key_terms", KEY_TERMS_PROMPT, merge_key_terms),
+    "summary_data": ("summary", SUMMARY_PROMPT, merge_summaries)
+}
+
+
+def make_stage(backend, task, template, merge):
+    def analyze_chunk(text):
+        response = backend.generate(template.format(text=text), task=task)
+        return parse_structured_response(response.text, task)
+
+    def stage(text):
+        return analyze_in_chunks(text, analyze_chunk, merge)
+
+    return stage
+
+
+def analyze_contract(backend, text):
+    stages = [
+        (name, make_stage(backend, task, template, merge), (text,))
+        for name, (task, template, merge) in STAGES.items()
+    ]
+    start = time.perf_counter()
+    results = run_analysis_stages(stages)
+    elapsed = time.perf_counter() - start
+    failed = sum(1 for stage in results.values() if not stage.ok)
+    return elapsed, failed
+
+
+def run_session(backend, contracts):
+    return [analyze_contract(backend, text) for text in contracts]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=8, help="Concurrent user sessions")
+    parser.add_argument("--contracts", type=int, default=4, help="Contracts analyzed per session")
+    parser.add_argument("--sections", type=int, default=16, help="Sections per synthetic contract")
+    parser.add_argument("--latency-ms", type=float, default=800)
+    parser.add_argument("--jitter-ms", type=float, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rpm", type=float, default=600, help="Rate limit, requests per minute (0 = unlimited)")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of stub calls answered with a 429")
+    args = parser.parse_args()
+
+    limiter = RateLimiter(rpm=args.rpm)
+    backend = RateLimitedBackend(
+        StubBackend(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, seed=args.seed,
+                    throttle_rate=args.throttle_rate),
+        limiter
+    )
+    set_backend(backend)
+    contracts = [make_contract(args.sections, seed=i) for i in range(args.contracts)]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.sessions) as pool:
+        sessions = list(pool.map(lambda _: run_session(backend, contracts), range(args.sessions)))
+    wall = time.perf_counter() - start
+
+    latencies = np.array([elapsed for session in sessions for elapsed, _ in session])
+    failed = sum(failed for session in sessions for _, failed in session)
+    analyzed = len(latencies)
+
+    print(f"{args.sessions} sessions x {args.contracts} contracts of {len(contracts[0])} chars, "
+          f"stub latency {args.latency_ms:.0f}+-{args.jitter_ms:.0f}ms")
+    print(f"  wall clock          {wall:8.2f}s")
+    print(f"  throughput          {analyzed / wall * 60:8.1f} contracts/min")
+    print(f"  per contract        p50 {np.percentile(latencies, 50):.2f}s  p95 {np.percentile(latencies, 95):.2f}s")
+    print(f"  failed stages       {failed}")
+    stats = limiter.stats()
+    print(f"  rate limiter        {stats['requests']} requests, {stats['throttled']} throttled, "
+          f"{stats['retries']} retries, final concurrency {stats['concurrency_limit']}")
+    print(f"  queue wait          avg {stats['wait_avg_s']:.2f}s  p95 {stats['wait_p95_s']:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Time and parent-process memory of exporting many reports into one ZIP.
+
+    python benchmarks/bench_batch_export.py [--contracts 40] [--clauses 200] [--workers 2]
+                                            [--max-memory-mb 64]
+
+The naive export renders every report in this process, keeps the PDFs in a
+list and builds the ZIP in a BytesIO. export_reports renders in a process
+pool and writes each PDF to a ZIP on disk as soon as it arrives. Peak
+Python allocations of this process are measured with tracemalloc; worker
+processes are not included.
+"""
+import io
+import os
+import sys
+import time
+import zipfile
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from report_translation import render_translated_report
+from benchmarks.sample_contracts import make_analysis
+
+SECTION_NAMES = ("analysis_results", "risks_opportunities", "clause_analysis", "summary_data")
+
+
+def naive_export(contracts):
+    pdfs = [(name, render_translated_report(sections, "en")) for name, sections in contracts]
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, data in pdfs:
+            archive.writestr(f"{name}.pdf", data)
+    return buffer.getvalue()
+
+
+def measure(label, function):
+    """Time an untraced run, then trace a second run for memory (tracing slows Python code down)"""
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    result = function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:<14} {elapsed:6.2f}s  peak {peak / 1024 / 1024:7.2f}MB")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--contracts", type=int, default=40)
+    parser.add_argument("--clauses", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--max-memory-mb", type=float, default=64)
+    args = parser.parse_args()
+
+    # The pool is sized from the environment when batch_export is imported
+    os.environ["BATCH_EXPORT_WORKERS"] = str(args.workers)
+    from batch_export import export_reports
+
+    contracts = [
+        (f"contract_{i}", dict(zip(SECTION_NAMES, make_analysis(clauses=args.clauses, seed=i))))
+        for i in range(args.contracts)
+    ]
+    print(f"{args.contracts} reports of {args.clauses} clauses, {args.workers} workers")
+    measure("naive", lambda: naive_export(contracts))
+    archive = measure("export_reports", lambda: export_reports(
+        contracts, max_memory_bytes=int(args.max_memory_mb * 1024 * 1024)
+    ))
+    print(f"  archive        {archive.size / 1024 / 1024:.2f}MB, {len(archive.names)} reports, "
+          f"{len(archive.failed)} failed")
+    archive.release()
+
+
+if __name__ == "__main__":
+    main()
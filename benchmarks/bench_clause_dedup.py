@@ -0,0 +1,114 @@
+"""Measure clause and key term reuse across contracts drawn from one template.
+
+    python benchmarks/bench_clause_dedup.py [--contracts 10] [--sections 16] [--changed 0]
+                                            [--threshold 0.9]
+
+The first contract is analyzed from scratch; every later one is a copy of the
+template with different party names and reflowed line breaks (a contract
+reused on the customer's own paper, or re-extracted from another file
+format), so the exact-text analysis cache misses. `--changed` sections are
+also rewritten; any rewritten section makes that contract a full key clause
+analysis, while key terms are analyzed again only for the rewritten sections
+and those naming the parties. Key clause and key term analysis run through
+analyze_with_reuse on the offline stub backend, and the prompt tokens sent
+are compared with analyzing every contract in full.
+"""
+import os
+import sys
+import time
+import re
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm_backend import StubBackend
+from clause_dedup import ClauseIndex, analyze_with_reuse
+from chunked_analysis import analyze_in_chunks, split_sections, merge_clauses, merge_key_terms
+from prompts import KEY_CLAUSES_PROMPT, KEY_TERMS_PROMPT
+from response_parser import parse_structured_response
+from benchmarks.sample_contracts import make_contract, CLAUSE_SENTENCES
+
+TASKS = {
+    "key_clauses": (KEY_CLAUSES_PROMPT, merge_clauses),
+    "key_terms": (KEY_TERMS_PROMPT, merge_key_terms)
+}
+
+
+def make_variants(count, sections, changed, seed=0):
+    """The template plus count - 1 reflowed copies with new parties and `changed` rewritten sections"""
+    rng = random.Random(seed)
+    template = make_contract(sections, seed=seed)
+    variants = [template]
+    for i in range(1, count):
+        parts = split_sections(template.replace("Acme Corp", f"Customer {i} Inc"))
+        for position in rng.sample(range(1, len(parts)), min(changed, len(parts) - 1)):
+            heading = parts[position].split("\n", 1)[0]
+            body = " ".join(rng.choice(CLAUSE_SENTENCES) for _ in range(12))
+            parts[position] = f"{heading}\n\n{body}\n\n"
+        # Different line wrapping, as a PDF and a DOCX of the same contract extract
+        variants.append(re.sub(r"(\S+) (\S+) (\S+) ", r"\1 \2\n\3 ", "".join(parts), count=i * 20))
+    return variants
+
+
+class CountingBackend:
+    """Counts prompt tokens sent to the wrapped backend"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.prompt_tokens = 0
+
+    def generate(self, prompt, task=None):
+        response = self.backend.generate(prompt, task=task)
+        self.prompt_tokens += response.prompt_tokens
+        return response
+
+
+def chunk_function(backend, task):
+    template, _ = TASKS[task]
+
+    def analyze_chunk(text):
+        return parse_structured_response(backend.generate(template.format(text=text), task=task).text, task)
+
+    return analyze_chunk
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--contracts", type=int, default=10)
+    parser.add_argument("--sections", type=int, default=16)
+    parser.add_argument("--changed", type=int, default=0, help="Sections rewritten in each variant")
+    parser.add_argument("--threshold", type=float, default=0.9)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    args = parser.parse_args()
+
+    contracts = make_variants(args.contracts, args.sections, args.changed)
+    stub = StubBackend(latency_ms=args.latency_ms, jitter_ms=0)
+
+    baseline = CountingBackend(stub)
+    for text in contracts:
+        for task, (_, merge) in TASKS.items():
+            analyze_in_chunks(text, chunk_function(baseline, task), merge)
+
+    with tempfile.TemporaryDirectory() as directory:
+        index = ClauseIndex(path=os.path.join(directory, "index.sqlite3"), threshold=args.threshold)
+        reusing = CountingBackend(stub)
+        start = time.perf_counter()
+        for text in contracts:
+            for task, (_, merge) in TASKS.items():
+                analyze_with_reuse(index, "bench", task, "v1", text, chunk_function(reusing, task), merge, task)
+        elapsed = time.perf_counter() - start
+        stats = index.stats()
+
+    print(f"{args.contracts} contracts of {len(contracts[0])} chars, {args.changed} sections changed per variant")
+    print(f"  sections reused     {stats['reused_sections']}/{stats['sections']}")
+    print(f"  reuse rate (chars)  {stats['reuse_rate']:.1%}")
+    print(f"  prompt tokens       {reusing.prompt_tokens} vs {baseline.prompt_tokens} without reuse "
+          f"({1 - reusing.prompt_tokens / baseline.prompt_tokens:.1%} saved)")
+    print(f"  index overhead      {elapsed * 1000 / (2 * args.contracts):.1f}ms per analysis "
+          f"(stub latency {args.latency_ms:.0f}ms)")
+
+
+if __name__ == "__main__":
+    main()
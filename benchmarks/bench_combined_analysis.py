@@ -0,0 +1,89 @@
+"""Compare prompt tokens and latency of the five-call analysis flow against
+the single combined analysis request.
+
+    python benchmarks/bench_combined_analysis.py [--contract file.txt] [--live]
+
+Without --live only input tokens are measured, with the backend's
+count_tokens (the Gemini API, or a 4-characters-per-token estimate for
+LLM_BACKEND=stub). With --live both flows are actually run and latency and
+output tokens are reported.
+"""
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+from prompts import (
+    CONTRACT_SCORE_PROMPT,
+    RISKS_OPPORTUNITIES_PROMPT,
+    KEY_CLAUSES_PROMPT,
+    KEY_TERMS_PROMPT,
+    SUMMARY_PROMPT,
+    COMBINED_ANALYSIS_PROMPT
+)
+from llm_backend import get_backend
+from benchmarks.sample_contracts import make_contract
+
+# Task name -> prompt template
+FIVE_CALL_PROMPTS = {
+    "score": CONTRACT_SCORE_PROMPT,
+    "risks_opportunities": RISKS_OPPORTUNITIES_PROMPT,
+    "summary": SUMMARY_PROMPT,
+    "key_clauses": KEY_CLAUSES_PROMPT,
+    "key_terms": KEY_TERMS_PROMPT
+}
+
+
+def run_prompt(backend, prompt, task):
+    start = time.perf_counter()
+    response = backend.generate(prompt, task=task)
+    return time.perf_counter() - start, response.output_tokens
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--contract", help="Plain text contract to analyze (default: synthetic MSA)")
+    parser.add_argument("--live", action="store_true", help="Call Gemini and measure latency")
+    args = parser.parse_args()
+
+    load_dotenv()
+    text = open(args.contract, encoding="utf-8").read() if args.contract else make_contract()
+    text = text[:12000]
+
+    backend = get_backend()
+
+    five_prompts = {name: template.format(text=text) for name, template in FIVE_CALL_PROMPTS.items()}
+    combined_prompt = COMBINED_ANALYSIS_PROMPT.format(text=text)
+
+    five_tokens = {name: backend.count_tokens(prompt) for name, prompt in five_prompts.items()}
+    combined_tokens = backend.count_tokens(combined_prompt)
+    source = f"{backend.name} backend"
+
+    print(f"Input tokens ({source})")
+    for name, tokens in five_tokens.items():
+        print(f"  {name:<22}{tokens:>8}")
+    print(f"  {'five-call total':<22}{sum(five_tokens.values()):>8}")
+    print(f"  {'combined':<22}{combined_tokens:>8}")
+    print(f"  saving: {1 - combined_tokens / sum(five_tokens.values()):.0%}")
+
+    if args.live:
+        # Five-call flow runs concurrently, as the app does
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(five_prompts)) as pool:
+            five_results = list(pool.map(lambda item: run_prompt(backend, item[1], item[0]), five_prompts.items()))
+        five_wall = time.perf_counter() - start
+        combined_wall, combined_output = run_prompt(backend, combined_prompt, "combined")
+
+        print("Latency")
+        print(f"  five-call wall clock   {five_wall:8.2f}s "
+              f"(output tokens {sum(r[1] for r in five_results)})")
+        print(f"  combined               {combined_wall:8.2f}s (output tokens {combined_output})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Measure passage index build time, retrieval latency and chat prompt size.
+
+    python benchmarks/bench_contract_index.py [--contract file.txt] [--queries 200]
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from contract_index import ContractIndex
+from benchmarks.sample_contracts import make_contract
+
+QUESTIONS = [
+    "What are the payment terms in this contract?",
+    "When can this agreement be terminated?",
+    "What is the cap on the supplier's liability?",
+    "Who owns the intellectual property in the deliverables?",
+    "What happens if there's a breach of contract?",
+    "How is personal data protected?",
+    "Which law governs the agreement?",
+    "Are there service credits for missed service levels?"
+]
+
+
+def bench(text, queries, top_k):
+    start = time.perf_counter()
+    index = ContractIndex(text)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    latencies = []
+    context_chars = []
+    for i in range(queries):
+        question = QUESTIONS[i % len(QUESTIONS)]
+        start = time.perf_counter()
+        hits = index.search(question, top_k=top_k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        context_chars.append(len(index.format_passages(hits)))
+
+    latencies = np.array(latencies)
+    print(f"{len(text):>9} chars {len(index):>6} passages  build {build_ms:7.1f}ms  "
+          f"query p50 {np.percentile(latencies, 50):.3f}ms p99 {np.percentile(latencies, 99):.3f}ms  "
+          f"context {int(np.mean(context_chars))} chars (was {min(len(text), 12000)})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--contract", help="Plain text contract (default: synthetic MSAs of several sizes)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=6)
+    args = parser.parse_args()
+
+    if args.contract:
+        bench(open(args.contract, encoding="utf-8").read(), args.queries, args.top_k)
+    else:
+        for sections in (4, 16, 64, 256):
+            bench(make_contract(sections), args.queries, args.top_k)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Compare streaming DOCX extraction with the old python-docx loop for speed and peak RSS.
+
+    python benchmarks/bench_docx_extraction.py [--sections 50 200 800] [--docx file.docx]
+
+Each extractor runs in a fresh process so its peak RSS (VmHWM) is not
+polluted by the other one. Synthetic documents are built with python-docx
+and include a fee schedule table in every section.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import docx
+
+from docx_extraction import extract_docx
+from benchmarks.sample_contracts import make_contract
+
+
+def make_docx(sections, path):
+    """Write a contract of `sections` sections, each followed by a 6x4 fee table"""
+    document = docx.Document()
+    document.sections[0].header.paragraphs[0].text = "CONFIDENTIAL"
+    for block in make_contract(sections).split("\n\n"):
+        document.add_paragraph(block)
+        if block.isupper():
+            table = document.add_table(rows=6, cols=4)
+            for i, row in enumerate(table.rows):
+                for j, cell in enumerate(row.cells):
+                    cell.text = f"Service level {i}.{j}: 99.{i}% availability, credit {j * 5}%"
+    document.save(path)
+
+
+def legacy_extract(path):
+    """The previous extract_text_from_docx loop"""
+    doc = docx.Document(path)
+    text = ""
+    for paragraph in doc.paragraphs:
+        text += paragraph.text + "\n"
+    return text
+
+
+def streaming_extract(path):
+    return extract_docx(path)
+
+
+def peak_rss_kb():
+    """High-water RSS of this process (Linux). Unlike ru_maxrss it is reset by exec."""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1])
+    return 0
+
+
+def measure(name, path):
+    """Run one extractor (in a child process); return seconds, peak RSS growth (MB) and text length"""
+    extractor = legacy_extract if name == "legacy" else streaming_extract
+    baseline = peak_rss_kb()
+    start = time.perf_counter()
+    text = extractor(path)
+    elapsed = time.perf_counter() - start
+    return elapsed, (peak_rss_kb() - baseline) / 1024, len(text)
+
+
+def run_isolated(name, path):
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(measure, name, path).result()
+
+
+def report(label, path):
+    size_mb = os.path.getsize(path) / 1024 / 1024
+    legacy_time, legacy_rss, legacy_chars = run_isolated("legacy", path)
+    stream_time, stream_rss, stream_chars = run_isolated("streaming", path)
+    print(f"{label:>14} {size_mb:7.2f}MB  legacy {legacy_time:6.2f}s {legacy_rss:7.1f}MB {legacy_chars:>9} chars  "
+          f"streaming {stream_time:6.2f}s {stream_rss:7.1f}MB {stream_chars:>9} chars  "
+          f"{legacy_time / stream_time:5.1f}x faster")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sections", type=int, nargs="+", default=[50, 200, 800])
+    parser.add_argument("--docx", help="Benchmark this file instead of synthetic documents")
+    args = parser.parse_args()
+
+    if args.docx:
+        report(os.path.basename(args.docx), args.docx)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        for sections in args.sections:
+            path = os.path.join(directory, f"contract_{sections}.docx")
+            make_docx(sections, path)
+            report(f"{sections} sections", path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Measure PDF text extraction throughput (pages/sec) against the old serial loop.
+
+    python benchmarks/bench_pdf_extraction.py [--pages 50 150 300] [--workers 4] [--repeat 3]
+
+Synthetic PDFs are generated with fpdf from the sample contract text, so no
+corpus needs to be downloaded.
+"""
+import io
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fpdf import FPDF
+from PyPDF2 import PdfReader
+
+from pdf_extraction import extract_pdf
+from benchmarks.sample_contracts import make_contract
+
+
+def make_pdf(pages):
+    """A PDF of roughly `pages` pages of contract text"""
+    pdf = FPDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.set_font("Arial", size=10)
+    lines = make_contract(sections=max(1, pages * 2)).splitlines()
+    pdf.add_page()
+    for line in lines:
+        if pdf.page_no() > pages:
+            break
+        pdf.multi_cell(0, 5, line.encode("latin-1", "replace").decode("latin-1"))
+    output = pdf.output(dest="S")
+    # fpdf 1.7 returns str, fpdf2 returns bytes
+    return output.encode("latin-1") if isinstance(output, str) else bytes(output)
+
+
+def legacy_extract(data):
+    """The previous extract_text_from_pdf loop"""
+    pdf_reader = PdfReader(io.BytesIO(data))
+    text = ""
+    for page in pdf_reader.pages:
+        text += page.extract_text() + "\n"
+    return text
+
+
+def best_of(repeat, func, *args):
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[50, 150, 300])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    # Start the worker processes before timing anything
+    extract_pdf(make_pdf(30), workers=args.workers)
+
+    print(f"{'pages':>6} {'legacy p/s':>11} {'serial p/s':>11} {'parallel p/s':>13} {'speedup':>8}")
+    for pages in args.pages:
+        data = make_pdf(pages)
+        page_count = len(PdfReader(io.BytesIO(data)).pages)
+
+        legacy_time, legacy_text = best_of(args.repeat, legacy_extract, data)
+        serial_time, (serial_text, _) = best_of(args.repeat, extract_pdf, data, 1)
+        parallel_time, (parallel_text, offsets) = best_of(args.repeat, extract_pdf, data, args.workers)
+
+        assert legacy_text == serial_text == parallel_text, "extracted text differs"
+        assert len(offsets) == page_count
+
+        print(f"{page_count:>6} {page_count / legacy_time:>11.1f} {page_count / serial_time:>11.1f} "
+              f"{page_count / parallel_time:>13.1f} {legacy_time / parallel_time:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Time and size of non-Latin reports with the embedded-font cache, cold vs warm.
+
+    python benchmarks/bench_pdf_fonts.py [--clauses 40] [--reports 5] [--language ru]
+
+Renders the same report in a non-Latin script several times in one process.
+The first render parses the font (and, with fontTools installed, builds the
+glyph subset); later renders reuse the cached metrics and subset. The
+sanitize step is also timed: the old chain of str.replace calls, str.translate
+with a maketrans table, and pdf_report.sanitize.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# A fresh cache directory, so the first render is really cold
+os.environ.setdefault("PDF_FONT_CACHE_DIR", tempfile.mkdtemp(prefix="font_cache_"))
+
+import pdf_fonts
+from pdf_report import render_report, sanitize
+from benchmarks.sample_contracts import make_analysis
+
+SAMPLE_TEXT = {
+    "ru": "Поставщик обязуется передать товар покупателю в сроки, предусмотренные договором. ",
+    "el": "Ο προμηθευτής υποχρεούται να παραδώσει τα αγαθά εντός της προθεσμίας της σύμβασης. ",
+    "hi": "आपूर्तिकर्ता अनुबंध में निर्दिष्ट समय के भीतर माल वितरित करने के लिए बाध्य है। ",
+    "zh-CN": "供应商应在合同规定的期限内向买方交付货物。",
+}
+
+
+def replace_chain(text):
+    """The previous sanitize_text body"""
+    text = text.replace('•', '-')
+    text = text.replace('…', '...')
+    text = text.replace('“', '"').replace('”', '"')
+    text = text.replace('‘', "'").replace('’', "'")
+    text = text.replace('—', '-').replace('–', '-')
+    return text
+
+
+def localized_analysis(clauses, language):
+    """Sample analysis with its prose swapped for text in the target script"""
+    analysis, risks, clause_analysis, summary = make_analysis(clauses=clauses, risks=max(7, clauses // 10))
+    sample = SAMPLE_TEXT[language]
+    summary["purpose"] = sample * 3
+    analysis["summary"] = sample * 4
+    for info in list(risks["risks"].values()) + list(risks["opportunities"].values()):
+        for field in info:
+            if field != "level":
+                info[field] = sample
+    for clause in clause_analysis["key_clauses"]:
+        clause["explanation"] = sample * 2
+    return analysis, risks, clause_analysis, summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clauses", type=int, default=40)
+    parser.add_argument("--reports", type=int, default=5)
+    parser.add_argument("--language", choices=sorted(SAMPLE_TEXT), default="ru")
+    args = parser.parse_args()
+
+    regular, bold = pdf_fonts.find_font(args.language)
+    if regular is None:
+        print(f"No font installed for '{args.language}'; see pdf_fonts.LANGUAGE_FONTS")
+        return
+    print(f"font {regular} ({os.path.getsize(regular) / 1024:.0f}KB), "
+          f"subsetting {'on' if pdf_fonts.font_subset is not None else 'off (fontTools not installed)'}")
+
+    sections = localized_analysis(args.clauses, args.language)
+    for i in range(args.reports):
+        start = time.perf_counter()
+        data = render_report(*sections, language=args.language)
+        elapsed = time.perf_counter() - start
+        print(f"report {i + 1}  {'cold' if i == 0 else 'warm'}  {elapsed * 1000:7.1f}ms  {len(data) / 1024:7.1f}KB")
+    print(f"subset cache {pdf_fonts.get_font_subsets().stats()}")
+
+    text = "“Party” — the supplier’s obligations • see clause 4… " * 2000
+    table = str.maketrans({"•": "-", "…": "...", "“": '"', "”": '"', "‘": "'", "’": "'", "—": "-", "–": "-"})
+    plain = "The supplier shall deliver the goods within thirty days of the order. " * 1500
+    for label, sample in (("plain", plain), ("typographic", text)):
+        for name, func in (("replace chain", replace_chain), ("str.translate", lambda t: t.translate(table)),
+                           ("sanitize", sanitize)):
+            start = time.perf_counter()
+            for _ in range(20):
+                func(sample)
+            print(f"sanitize {label:12s} {name:14s} {(time.perf_counter() - start) / 20 * 1000:6.2f}ms "
+                  f"per {len(sample)} chars")
+
+
+if __name__ == "__main__":
+    main()
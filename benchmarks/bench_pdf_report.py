@@ -0,0 +1,67 @@
+"""Peak memory and time of exporting a report: tempfile + base64 link vs in-memory bytes.
+
+    python benchmarks/bench_pdf_report.py [--clauses 10 200 1000]
+
+The legacy export wrote the PDF to a temporary file, read it back, base64
+encoded it and embedded it in a data URI (which Streamlit then sent over the
+websocket). The new export renders to bytes in memory and hands them to
+st.download_button. Peak Python allocations are measured with tracemalloc,
+starting from the laid-out document, so only the export step is compared.
+"""
+import os
+import sys
+import time
+import base64
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_report import build_report, pdf_bytes
+from benchmarks.sample_contracts import make_analysis
+
+
+def legacy_export(pdf):
+    """The previous generate_pdf_report ending plus the Export tab's download link"""
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
+        pdf_path = tmp_file.name
+    pdf.output(pdf_path)
+    with open(pdf_path, "rb") as f:
+        data = f.read()
+    os.unlink(pdf_path)
+    b64_pdf = base64.b64encode(data).decode("utf-8")
+    href = f'<a class="download-btn" href="data:application/pdf;base64,{b64_pdf}" download="report.pdf">Download PDF Report</a>'
+    return data, href
+
+
+def memory_export(pdf):
+    return pdf_bytes(pdf), None
+
+
+def measure(export, clauses):
+    pdf = build_report(*make_analysis(clauses=clauses, risks=max(7, clauses // 10)))
+    tracemalloc.start()
+    start = time.perf_counter()
+    data, _ = export(pdf)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1024 / 1024, len(data) / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clauses", type=int, nargs="+", default=[10, 200, 1000])
+    args = parser.parse_args()
+
+    for clauses in args.clauses:
+        legacy_time, legacy_peak, size = measure(legacy_export, clauses)
+        memory_time, memory_peak, _ = measure(memory_export, clauses)
+        print(f"{clauses:5d} clauses  {size:6.2f}MB PDF  "
+              f"legacy {legacy_time * 1000:7.1f}ms peak {legacy_peak:6.2f}MB  "
+              f"in-memory {memory_time * 1000:7.1f}ms peak {memory_peak:6.2f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Latency added to a PDF report by its charts, on a figure cache miss and hit.
+
+    python benchmarks/bench_report_charts.py [--clauses 40] [--reports 3]
+
+Renders the same report without charts, then with charts against an empty
+figure cache (every chart rendered by kaleido), then again with the cache
+warm (charts only hashed and embedded). Needs kaleido and the browser it
+drives; without them only the no-chart baseline and the cost of hashing the
+figure specs (the part of a cache hit before embedding) are reported.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# An empty cache directory, so the first pass really renders
+os.environ.setdefault("CHART_CACHE_DIR", tempfile.mkdtemp(prefix="chart_cache_"))
+
+import report_charts
+from pdf_report import render_report
+from benchmarks.sample_contracts import make_analysis
+
+
+def timed(func, repeat):
+    """Median seconds of func() over repeat runs"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return sorted(times)[len(times) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clauses", type=int, default=40)
+    parser.add_argument("--reports", type=int, default=3)
+    args = parser.parse_args()
+
+    analysis, risks, clauses, summary = make_analysis(clauses=args.clauses, risks=max(7, args.clauses // 10))
+    baseline = timed(lambda: render_report(analysis, risks, clauses, summary), args.reports)
+    print(f"no charts          {baseline * 1000:8.1f}ms")
+
+    if report_charts.get_figure_cache().unavailable:
+        figures = [report_charts.score_gauge(analysis["overall_score"]),
+                   report_charts.score_breakdown_chart(analysis["score_breakdown"]),
+                   report_charts.create_risk_opportunity_charts(risks)]
+        hashing = timed(lambda: [report_charts.figure_key(fig, 800, 600) for fig in figures], args.reports)
+        print(f"spec hashing       {hashing * 1000:8.1f}ms  (3 charts)")
+        print("kaleido is not installed (or can't start its browser): cache miss and hit not measured")
+        return
+
+    def with_charts():
+        figures = report_charts.report_figures(analysis, risks)
+        return render_report(analysis, risks, clauses, summary, figures=figures)
+
+    # Each miss needs an empty cache, so misses are measured once
+    miss = timed(with_charts, 1)
+    if not report_charts.get_figure_cache().stats()["renders"]:
+        print("kaleido could not render the charts (see the warning above)")
+        return
+    hit = timed(with_charts, args.reports)
+    size = len(with_charts())
+    print(f"charts, cache miss {miss * 1000:8.1f}ms  (+{(miss - baseline) * 1000:.1f}ms)")
+    print(f"charts, cache hit  {hit * 1000:8.1f}ms  (+{(hit - baseline) * 1000:.1f}ms)  {size / 1024:.0f}KB PDF")
+    print(f"figure cache {report_charts.get_figure_cache().stats()}")
+
+
+if __name__ == "__main__":
+    main()
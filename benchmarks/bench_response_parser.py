@@ -0,0 +1,93 @@
+"""Run the malformed-response corpus through the structured-output parser and
+time it against the fence-strip-and-regex approach it replaced.
+
+    python benchmarks/bench_response_parser.py [--repeat 2000]
+
+Exits non-zero if any corpus entry is not parsed (or rejected) as expected.
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from response_parser import parse_structured_response, StructuredOutputError
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "malformed_responses.json")
+
+
+def legacy_parse(response_text):
+    """The per-function parsing app.py used before response_parser"""
+    cleaned_text = response_text.strip()
+    if cleaned_text.startswith("```json"):
+        cleaned_text = cleaned_text[7:].split("```")[0].strip()
+    elif cleaned_text.startswith("```"):
+        cleaned_text = cleaned_text[3:].split("```")[0].strip()
+    elif "```" in cleaned_text:
+        cleaned_text = cleaned_text.split("```")[1].strip()
+    try:
+        return json.loads(cleaned_text)
+    except json.JSONDecodeError:
+        fixed_json = re.sub(r'([{,])\s*([a-zA-Z_][a-zA-Z0-9_]*)\s*:', r'\1"\2":', cleaned_text)
+        return json.loads(fixed_json)
+
+
+def check_corpus(corpus):
+    failures = 0
+    legacy_ok = 0
+    for case in corpus:
+        try:
+            parse_structured_response(case["response"], case["task"])
+            parsed = True
+            error = ""
+        except StructuredOutputError as e:
+            parsed = False
+            error = str(e)
+        try:
+            legacy_parse(case["response"])
+            legacy_ok += case["ok"]
+        except Exception:
+            pass
+
+        status = "ok" if parsed == case["ok"] else "FAIL"
+        failures += status == "FAIL"
+        print(f"  {status:<5}{case['name']:<52}{'parsed' if parsed else 'rejected: ' + error}")
+
+    expected_ok = sum(case["ok"] for case in corpus)
+    print(f"parser: {len(corpus) - failures}/{len(corpus)} as expected; "
+          f"legacy parser handled {legacy_ok}/{expected_ok} recoverable responses")
+    return failures
+
+
+def time_parser(name, func, corpus, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for case in corpus:
+            try:
+                func(case)
+            except Exception:
+                pass
+    per_call = (time.perf_counter() - start) / (repeat * len(corpus)) * 1e6
+    print(f"  {name:<10}{per_call:8.1f} us/response")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    corpus = json.load(open(CORPUS_PATH, encoding="utf-8"))
+    failures = check_corpus(corpus)
+
+    print("Timing (whole corpus)")
+    time_parser("parser", lambda case: parse_structured_response(case["response"], case["task"]), corpus, args.repeat)
+    time_parser("legacy", lambda case: legacy_parse(case["response"]), corpus, args.repeat)
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Compare the translation engine with the old serial paragraph loop on the stub provider.
+
+    python benchmarks/bench_translation.py [--sections 8] [--latency-ms 150] [--workers 4] [--reports 3]
+
+The old loop translated one paragraph at a time and sent only the first 500
+characters of each. The engine translates every segment, concurrently, and
+serves repeats from the translation memory, so the later reports (which share
+most of their boilerplate) are mostly free.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from translation_engine import StubProvider, TranslationEngine, TranslationMemory
+from benchmarks.sample_contracts import make_contract
+
+
+def legacy_translate(provider, text, target_lang):
+    """The previous translate_text loop"""
+    if len(text) <= 500:
+        return provider.translate(text, target_lang)
+    return "\n\n".join(
+        provider.translate(para[:500], target_lang) if para.strip() else "" for para in text.split("\n\n")
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sections", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=150)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--reports", type=int, default=3, help="Reports translated one after another")
+    args = parser.parse_args()
+
+    texts = [make_contract(args.sections, seed=i) for i in range(args.reports)]
+
+    legacy_provider = StubProvider(latency_ms=args.latency_ms)
+    start = time.perf_counter()
+    legacy = [legacy_translate(legacy_provider, text, "fr") for text in texts]
+    legacy_time = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as directory:
+        provider = StubProvider(latency_ms=args.latency_ms)
+        engine = TranslationEngine(provider, TranslationMemory(os.path.join(directory, "memory.sqlite3")),
+                                   workers=args.workers)
+        start = time.perf_counter()
+        translated = [engine.translate(text, "fr") for text in texts]
+        engine_time = time.perf_counter() - start
+        stats = engine.stats()
+
+    source_chars = sum(len(text) for text in texts)
+    print(f"{args.reports} reports of ~{len(texts[0])} chars, stub latency {args.latency_ms:.0f}ms")
+    print(f"  legacy   {legacy_time:6.2f}s  {legacy_provider.calls:4d} calls  "
+          f"{sum(len(t) for t in legacy) / source_chars:5.1%} output vs input chars")
+    print(f"  engine   {engine_time:6.2f}s  {provider.calls:4d} calls  "
+          f"{sum(len(t) for t in translated) / source_chars:5.1%} output vs input chars  "
+          f"memory {stats['hits']} hits / {stats['misses']} misses")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Synthetic contracts for the benchmark scripts in this directory."""
+import random
+
+SECTION_TITLES = [
+    "DEFINITIONS",
+    "SCOPE OF SERVICES",
+    "FEES AND PAYMENT",
+    "TERM AND TERMINATION",
+    "CONFIDENTIALITY",
+    "INTELLECTUAL PROPERTY",
+    "WARRANTIES",
+    "LIMITATION OF LIABILITY",
+    "INDEMNIFICATION",
+    "SERVICE LEVELS",
+    "DATA PROTECTION",
+    "INSURANCE",
+    "FORCE MAJEURE",
+    "DISPUTE RESOLUTION",
+    "GOVERNING LAW",
+    "MISCELLANEOUS"
+]
+
+CLAUSE_SENTENCES = [
+    "The Supplier shall perform the Services with reasonable skill and care in accordance with Good Industry Practice.",
+    "The Customer shall pay each undisputed invoice within thirty (30) days of receipt.",
+    "Either party may terminate this Agreement on ninety (90) days' written notice to the other party.",
+    "Each party shall keep the other party's Confidential Information strictly confidential.",
+    "All Intellectual Property Rights in the Deliverables shall vest in the Customer upon payment in full.",
+    "The Supplier's total aggregate liability shall not exceed the Fees paid in the twelve (12) months preceding the claim.",
+    "The Supplier shall indemnify the Customer against all losses arising from any breach of this Agreement.",
+    "Service credits shall be the Customer's sole remedy for failure to meet the Service Levels.",
+    "Personal Data shall be processed only on documented instructions from the Customer.",
+    "Neither party shall be liable for any delay caused by a Force Majeure Event.",
+    "Any dispute shall first be referred to the parties' senior executives for resolution.",
+    "This Agreement shall be governed by and construed in accordance with the laws of England and Wales."
+]
+
+
+def make_contract(sections=16, clauses_per_section=6, seed=0):
+    """Build a numbered, MSA-style contract of roughly 1 KB per clause"""
+    rng = random.Random(seed)
+    lines = [
+        "MASTER SERVICES AGREEMENT",
+        "",
+        "This Master Services Agreement is made between Acme Corp (the \"Customer\") "
+        "and Globex Ltd (the \"Supplier\").",
+        ""
+    ]
+    for number in range(1, sections + 1):
+        title = SECTION_TITLES[(number - 1) % len(SECTION_TITLES)]
+        lines.append(f"{number}. {title}")
+        lines.append("")
+        for clause in range(1, clauses_per_section + 1):
+            body = " ".join(rng.choice(CLAUSE_SENTENCES) for _ in range(rng.randint(4, 8)))
+            lines.append(f"{number}.{clause} {body}")
+            lines.append("")
+    lines.extend([
+        "IN WITNESS WHEREOF the parties have executed this Agreement on the date first written above.",
+        "",
+        "Signed for and on behalf of Acme Corp: ____________________",
+        "Signed for and on behalf of Globex Ltd: ____________________"
+    ])
+    return "\n".join(lines)
+
+
+def make_analysis(clauses=10, risks=7, seed=0):
+    """Analysis results shaped like the app's session state, for report benchmarks.
+
+    Returns (analysis_results, risks_opportunities, clause_analysis, summary_data).
+    """
+    rng = random.Random(seed)
+
+    def prose(sentences):
+        return " ".join(rng.choice(CLAUSE_SENTENCES) for _ in range(sentences))
+
+    levels = ["High", "Medium", "Low"]
+    analysis_results = {
+        "overall_score": 72,
+        "score_breakdown": {"fairness": 70, "clarity": 80, "risk_allocation": 60, "completeness": 75},
+        "summary": prose(6)
+    }
+    risks_opportunities = {
+        "risks": {
+            f"{SECTION_TITLES[i % len(SECTION_TITLES)].lower()}_risk_{i}": {
+                "level": levels[i % 3], "description": prose(3),
+                "potential_impact": prose(2), "mitigation_suggestions": prose(2)
+            } for i in range(risks)
+        },
+        "opportunities": {
+            f"{SECTION_TITLES[i % len(SECTION_TITLES)].lower()}_opportunity_{i}": {
+                "level": levels[i % 3], "description": prose(3),
+                "potential_value": prose(2), "action_items": prose(2)
+            } for i in range(risks)
+        }
+    }
+    clause_analysis = {
+        "key_clauses": [
+            {
+                "clause_type": SECTION_TITLES[i % len(SECTION_TITLES)].title(),
+                "clause_extract": prose(2), "explanation": prose(4), "concerns": prose(2),
+                "clause_ref": f"Clause {i + 1}.1"
+            } for i in range(clauses)
+        ]
+    }
+    summary_data = {
+        "contract_type": "Master Services Agreement",
+        "parties": ["Acme Corp", "Globex Ltd"],
+        "purpose": prose(2),
+        "key_provisions": [prose(1) for _ in range(8)],
+        "important_dates": [{"event": "Commencement", "date": "2024-01-01"}],
+        "summary": prose(5)
+    }
+    return analysis_results, risks_opportunities, clause_analysis, summary_data
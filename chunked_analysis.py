@@ -0,0 +1,295 @@
+import os
+import re
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from analysis_pipeline import bind_script_context, stage_abandoned, scale_stage_timeout
+from document_model import DocumentModel
+
+# Contracts longer than CHUNK_CHARS are split on the top-level sections of
+# their document model (headings, clauses outside any heading and the
+# signature block), each chunk is analyzed on its own and the results are merged. All chunk calls in
+# the process share one bounded pool, so a 200-page contract (or several
+# sessions analyzing at once) can't have more than CHUNK_MAX_WORKERS requests
+# in flight. Each analysis only queues CHUNK_MAX_PER_REQUEST chunks at a time,
+# so one long contract can't fill the queue ahead of everyone else, and stops
+# queuing (and cancels what hasn't started) once its stage times out. The
+# stage's timeout is multiplied by the number of such rounds of chunks, so
+# a 200-page contract isn't abandoned for needing many sequential calls.
+CHUNK_CHARS = int(os.getenv("ANALYSIS_CHUNK_CHARS", "12000"))
+CHUNK_MAX_WORKERS = int(os.getenv("ANALYSIS_CHUNK_WORKERS", "4"))
+CHUNK_MAX_PER_REQUEST = int(os.getenv("ANALYSIS_CHUNK_PER_REQUEST", "2"))
+# How often (seconds) a waiting analysis checks whether its stage was abandoned
+CHUNK_POLL_SECONDS = 0.5
+
+# Caps on merged list sizes, matching what the prompts ask for per chunk
+MAX_MERGED_RISKS = 7
+MAX_MERGED_CLAUSES = 10
+MAX_MERGED_TERMS = 25
+MAX_MERGED_PROVISIONS = 8
+
+LEVEL_RANK = {"High": 3, "Medium": 2, "Low": 1}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=CHUNK_MAX_WORKERS, thread_name_prefix="chunk")
+    return _executor
+
+
+def split_sections(text):
+    """Split text into top-level sections, keeping each heading with its body"""
+    starts = DocumentModel(text).section_starts()
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+    starts.append(len(text))
+    return [text[a:b] for a, b in zip(starts, starts[1:]) if text[a:b].strip()]
+
+
+def _split_oversized(section, max_chars):
+    """Split a section longer than max_chars on paragraph, then line, then hard boundaries"""
+    pieces = []
+    current = ""
+    for paragraph in re.split(r"(\n\s*\n)", section):
+        if len(current) + len(paragraph) <= max_chars:
+            current += paragraph
+            continue
+        if current.strip():
+            pieces.append(current)
+        current = paragraph
+        while len(current) > max_chars:
+            cut = current.rfind("\n", 0, max_chars)
+            if cut <= 0:
+                cut = current.rfind(" ", 0, max_chars)
+            if cut <= 0:
+                cut = max_chars
+            pieces.append(current[:cut])
+            current = current[cut:]
+    if current.strip():
+        pieces.append(current)
+    return pieces
+
+
+def split_contract(text, max_chars=None):
+    """Split a contract into chunks of at most max_chars, on section boundaries where possible"""
+    max_chars = max_chars or CHUNK_CHARS
+    if len(text) <= max_chars:
+        return [text]
+
+    chunks = []
+    current = ""
+    for section in split_sections(text):
+        if len(section) > max_chars:
+            if current.strip():
+                chunks.append(current)
+            current = ""
+            chunks.extend(_split_oversized(section, max_chars))
+        elif len(current) + len(section) > max_chars:
+            chunks.append(current)
+            current = section
+        else:
+            current += section
+    if current.strip():
+        chunks.append(current)
+    return chunks
+
+
+def analyze_in_chunks(text, analyze_chunk, merge, max_chars=None):
+    """Map analyze_chunk over the contract's chunks concurrently and merge the results.
+
+    Short contracts are analyzed with a single call. If any chunk fails, the
+    chunks not yet started are cancelled and its error is raised: a merge of
+    the other chunks would be cached as the analysis of the whole contract.
+
+    The analysis stage running this call gets one stage timeout per round of
+    CHUNK_MAX_PER_REQUEST chunks. If it still times out, the remaining chunks
+    are cancelled and TimeoutError is raised.
+    """
+    chunks = split_contract(text, max_chars)
+    if len(chunks) == 1:
+        return analyze_chunk(chunks[0])
+
+    scale_stage_timeout(math.ceil(len(chunks) / CHUNK_MAX_PER_REQUEST))
+
+    executor = _get_executor()
+    worker = bind_script_context(analyze_chunk)
+    queued = list(range(len(chunks)))
+    running = {}
+    outcomes = {}
+    try:
+        while queued or running:
+            if stage_abandoned():
+                raise TimeoutError(f"Abandoned after {len(outcomes)} of {len(chunks)} chunks")
+            while queued and len(running) < CHUNK_MAX_PER_REQUEST:
+                index = queued.pop(0)
+                running[executor.submit(worker, chunks[index])] = index
+            finished, _ = wait(running, timeout=CHUNK_POLL_SECONDS, return_when=FIRST_COMPLETED)
+            for future in finished:
+                outcomes[running.pop(future)] = future.result()
+    finally:
+        # Chunks already being analyzed finish in the background; queued ones never start
+        for future in running:
+            future.cancel()
+
+    return merge([(chunk, outcomes[index]) for index, chunk in enumerate(chunks)])
+
+
+def _dedupe_key(value):
+    return re.sub(r"[^a-z0-9]+", " ", str(value).lower()).strip()
+
+
+def merge_scores(chunk_results):
+    """Length-weighted average of chunk scores, over the chunks that have each score"""
+    overall = 0.0
+    overall_weight = 0
+    breakdown = {}
+    weights = {}
+    summaries = []
+    for chunk, result in chunk_results:
+        weight = len(chunk)
+        if result.get("overall_score") is not None:
+            overall += float(result["overall_score"]) * weight
+            overall_weight += weight
+        for category, score in result.get("score_breakdown", {}).items():
+            breakdown[category] = breakdown.get(category, 0.0) + float(score) * weight
+            weights[category] = weights.get(category, 0) + weight
+        if result.get("summary"):
+            summaries.append(result["summary"])
+
+    merged = {
+        "score_breakdown": {
+            category: round(total / weights[category]) for category, total in breakdown.items()
+        },
+        "summary": "\n\n".join(summaries[:3])
+    }
+    if overall_weight:
+        merged["overall_score"] = round(overall / overall_weight)
+    return merged
+
+
+def _merge_ranked(groups, limit):
+    """Merge dicts of name -> {level, ...}, keeping the highest level for duplicate names"""
+    merged = {}
+    for group in groups:
+        for name, info in (group or {}).items():
+            key = _dedupe_key(name)
+            current = merged.get(key)
+            if current is None or LEVEL_RANK.get(info.get("level"), 2) > LEVEL_RANK.get(current[1].get("level"), 2):
+                merged[key] = (name, info)
+    ranked = sorted(merged.values(), key=lambda item: -LEVEL_RANK.get(item[1].get("level"), 2))
+    return dict(ranked[:limit])
+
+
+def merge_risks_and_opportunities(chunk_results):
+    results = [result for _, result in chunk_results]
+    return {
+        "risks": _merge_ranked((r.get("risks") for r in results), MAX_MERGED_RISKS),
+        "opportunities": _merge_ranked((r.get("opportunities") for r in results), MAX_MERGED_RISKS)
+    }
+
+
+def _merge_list(lists, key_field, limit):
+    """Concatenate lists of dicts, dropping entries whose key_field was already seen"""
+    seen = set()
+    merged = []
+    for items in lists:
+        for item in items or []:
+            key = _dedupe_key(item.get(key_field, ""))
+            if key and key not in seen:
+                seen.add(key)
+                merged.append(item)
+    return merged[:limit]
+
+
+def merge_clauses(chunk_results):
+    return {
+        "key_clauses": _merge_list(
+            (result.get("key_clauses") for _, result in chunk_results), "clause_type", MAX_MERGED_CLAUSES
+        )
+    }
+
+
+def merge_clause_query(chunk_results):
+    """Combine the chunks where a searched clause was found"""
+    found = [result for _, result in chunk_results if result.get("found")]
+    if not found:
+        return chunk_results[0][1]
+
+    merged = dict(found[0])
+    merged["clause_text"] = "\n...\n".join(r.get("clause_text", "") for r in found if r.get("clause_text"))
+    return merged
+
+
+def merge_key_terms(chunk_results):
+    return {
+        "key_terms": _merge_list(
+            (result.get("key_terms") for _, result in chunk_results), "term", MAX_MERGED_TERMS
+        )
+    }
+
+
+def merge_summaries(chunk_results):
+    """The first chunk names the contract and parties; later chunks add provisions and dates"""
+    results = [result for _, result in chunk_results]
+    first = results[0]
+
+    parties = []
+    provisions = []
+    dates = []
+    notable = []
+    for result in results:
+        for party in result.get("parties", []):
+            if _dedupe_key(party) not in map(_dedupe_key, parties):
+                parties.append(party)
+        for provision in result.get("key_provisions", []):
+            if _dedupe_key(provision) not in map(_dedupe_key, provisions):
+                provisions.append(provision)
+        for date_item in result.get("important_dates", []):
+            if date_item not in dates:
+                dates.append(date_item)
+        if result.get("notable_aspects"):
+            notable.append(result["notable_aspects"])
+
+    return {
+        "contract_type": first.get("contract_type", "Unknown"),
+        "parties": parties or ["Unknown"],
+        "purpose": first.get("purpose", ""),
+        "key_provisions": provisions[:MAX_MERGED_PROVISIONS],
+        "important_dates": dates,
+        "notable_aspects": " ".join(notable),
+        "summary": first.get("summary", "")
+    }
+
+
+def merge_combined(chunk_results):
+    """Merge combined-analysis responses section by section.
+
+    Each section is merged from the chunks whose response has it; a section
+    no chunk returned is left out, so the caller re-runs just that stage.
+    """
+    def present(name):
+        return [(chunk, result[name]) for chunk, result in chunk_results if result.get(name) is not None]
+
+    merged = {}
+    if present("score"):
+        merged["score"] = merge_scores(present("score"))
+    for name in ("risks", "opportunities"):
+        if present(name):
+            merged[name] = _merge_ranked((group for _, group in present(name)), MAX_MERGED_RISKS)
+    if present("summary"):
+        merged["summary"] = merge_summaries(present("summary"))
+    if present("key_clauses"):
+        merged["key_clauses"] = _merge_list(
+            (items for _, items in present("key_clauses")), "clause_type", MAX_MERGED_CLAUSES
+        )
+    if present("key_terms"):
+        merged["key_terms"] = _merge_list(
+            (items for _, items in present("key_terms")), "term", MAX_MERGED_TERMS
+        )
+    return merged
@@ -0,0 +1,472 @@
+import os
+import re
+import json
+import time
+import uuid
+import zlib
+import hashlib
+import sqlite3
+import threading
+
+import numpy as np
+
+from chunked_analysis import split_sections, analyze_in_chunks
+
+# Near-duplicate detection of contracts across uploads. Customers upload
+# many contracts drawn from the same templates, or the same contract again as
+# another file, so a new contract often matches one analyzed before except
+# for formatting, party names or other sections the analysis took nothing
+# from. Every analyzed contract is indexed section by section with MinHash
+# signatures of the sections' word shingles, and each key clause and key term
+# is tied to the section it came from: a clause by its quoted extract, a term
+# by the section defining it.
+#
+# Key terms are reused section by section: a section unchanged word for word
+# since an earlier analysis keeps that analysis's terms, and only the changed
+# sections are sent to the model (an amended contract reuses everything but
+# the amendments). Key clauses are reused only when the new contract has as
+# many sections as one earlier contract and, section by section, is similar
+# to it: the estimated Jaccard similarity of each pair of sections, weighted
+# by length, reaches CLAUSE_DEDUP_THRESHOLD. That prompt picks the most
+# important clauses of the whole contract, so a partial match can't be
+# completed by analyzing the changed sections alone. Every section a clause
+# was taken from must also be unchanged word for word (so a liability cap
+# going from 12 to 6 months is analyzed again) and still contain its extract.
+#
+# Anything else is analyzed in full, as without the index. Signatures are
+# banded for locality-sensitive hashing (LSH), so a lookup only compares
+# against the few sections that share a band. The index is stored in SQLite
+# and partitioned by tenant: one customer's analyses are never reused for
+# another's contracts.
+CLAUSE_DEDUP_ENABLED = os.getenv("CLAUSE_DEDUP_ENABLED", "true").lower() not in ("0", "false", "no")
+CLAUSE_DEDUP_PATH = os.getenv("CLAUSE_DEDUP_PATH", os.path.join(".cache", "clause_index.sqlite3"))
+CLAUSE_DEDUP_THRESHOLD = float(os.getenv("CLAUSE_DEDUP_THRESHOLD", "0.9"))
+CLAUSE_DEDUP_TTL_SECONDS = int(float(os.getenv("CLAUSE_DEDUP_TTL_DAYS", "90")) * 86400)
+
+SHINGLE_WORDS = 5
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+MERSENNE_PRIME = (1 << 31) - 1
+
+# Fixed seed: signatures are persisted, so the permutations must never change
+_rng = np.random.RandomState(20240611)
+_PERM_A = _rng.randint(1, MERSENNE_PRIME, size=NUM_PERM).astype(np.uint64)
+_PERM_B = _rng.randint(0, MERSENNE_PRIME, size=NUM_PERM).astype(np.uint64)
+
+# Field tying an item to the contract text it was taken from, per task
+ITEM_ANCHORS = {
+    "key_clauses": "clause_extract",
+    "key_terms": "term",
+}
+# Shorter quotes could match in almost any section (terms are placed by their definition)
+MIN_ANCHOR_CHARS = 12
+# Words following a term where the contract defines it
+DEFINING_WORDS = ("means", "shall mean", "has the meaning", "shall have the meaning", "refers to", "includes")
+# Tasks whose items are reused section by section rather than for whole contracts
+SECTION_REUSE_FIELDS = ("key_terms",)
+
+
+def _words(text):
+    return re.findall(r"[a-z0-9]+", (text or "").lower())
+
+
+def _normalized(text):
+    return " ".join(_words(text))
+
+
+def _digest(normalized):
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def minhash(text):
+    """MinHash signature (NUM_PERM uint32 values) of the word shingles of text"""
+    words = _words(text)
+    if len(words) < SHINGLE_WORDS:
+        shingles = {" ".join(words)}
+    else:
+        shingles = {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+    hashes = np.fromiter(
+        (zlib.crc32(s.encode("utf-8")) % MERSENNE_PRIME for s in shingles), dtype=np.uint64, count=len(shingles)
+    )
+    permuted = (_PERM_A[:, None] * hashes[None, :] + _PERM_B[:, None]) % MERSENNE_PRIME
+    return permuted.min(axis=1).astype(np.uint32)
+
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of two signatures"""
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+
+def _band_keys(signature):
+    return [(band, signature[band * ROWS:(band + 1) * ROWS].tobytes()) for band in range(BANDS)]
+
+
+def _anchor_text(item, anchor):
+    """Normalized quote or term of an item, or None if it is missing or too short to place"""
+    text = _normalized(item.get(anchor) if isinstance(item, dict) else None)
+    if anchor == "term":
+        return text or None
+    return text if len(text) >= MIN_ANCHOR_CHARS else None
+
+
+def _contains(normalized_section, quote, anchor):
+    """Whether a section contains an item's quote (a term only as whole words)"""
+    if anchor == "term":
+        return f" {quote} " in f" {normalized_section} "
+    return quote in normalized_section
+
+
+def _item_position(quote, anchor, normalized_sections):
+    """Section an item was taken from: a term's is the one defining it, else the first using it"""
+    if quote is None:
+        return None
+    containing = [i for i, section in enumerate(normalized_sections) if _contains(section, quote, anchor)]
+    if anchor == "term":
+        for i in containing:
+            if any(_contains(normalized_sections[i], f"{quote} {words}", anchor) for words in DEFINING_WORDS):
+                return i
+    return containing[0] if containing else None
+
+
+def _reusable(items, normalized_section, anchor, stored_digest):
+    """Whether a stored section's items still hold for a new section"""
+    if not items:
+        # Nothing was taken from it when the (matching) contract was analyzed
+        return True
+    if _digest(normalized_section) != stored_digest:
+        return False
+    for item in items:
+        quote = _anchor_text(item, anchor)
+        if quote is None or not _contains(normalized_section, quote, anchor):
+            return False
+    return True
+
+
+class ClauseIndex:
+    """SQLite-backed MinHash/LSH index of analyzed contracts, section by section"""
+
+    def __init__(self, path=CLAUSE_DEDUP_PATH, threshold=CLAUSE_DEDUP_THRESHOLD, ttl_seconds=CLAUSE_DEDUP_TTL_SECONDS):
+        self.path = path
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.sections = 0
+        self.reused_sections = 0
+        self.chars = 0
+        self.reused_chars = 0
+        # (tenant, task, version) -> (signatures by row id, LSH buckets, digests by row id,
+        # row ids by analysis in order, latest row id by digest)
+        self._partitions = {}
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # One connection shared by the analysis worker threads, guarded by the lock
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS clause_sections (
+                id INTEGER PRIMARY KEY,
+                tenant TEXT NOT NULL,
+                task TEXT NOT NULL,
+                prompt_version TEXT NOT NULL,
+                analysis_id TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                signature BLOB NOT NULL,
+                digest TEXT NOT NULL,
+                items TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_clause_sections_partition ON clause_sections (tenant, task, prompt_version)"
+        )
+        if ttl_seconds:
+            # Whole analyses expire together: a partly deleted one could never match again
+            self._conn.execute(
+                "DELETE FROM clause_sections WHERE analysis_id IN "
+                "(SELECT analysis_id FROM clause_sections GROUP BY analysis_id HAVING MAX(last_used) < ?)",
+                (time.time() - ttl_seconds,)
+            )
+        self._conn.commit()
+
+    def _partition(self, tenant, task, version):
+        """Signatures and LSH buckets of one tenant's sections, loaded on first use (caller holds the lock)"""
+        key = (tenant, task, version)
+        partition = self._partitions.get(key)
+        if partition is None:
+            signatures = {}
+            buckets = {}
+            digests = {}
+            analyses = {}
+            latest = {}
+            rows = self._conn.execute(
+                "SELECT id, signature, analysis_id, digest FROM clause_sections "
+                "WHERE tenant = ? AND task = ? AND prompt_version = ? ORDER BY analysis_id, position",
+                key
+            )
+            for row_id, blob, analysis_id, digest in rows:
+                signature = np.frombuffer(blob, dtype=np.uint32)
+                signatures[row_id] = signature
+                digests[row_id] = digest
+                analyses.setdefault(analysis_id, []).append(row_id)
+                latest[digest] = max(row_id, latest.get(digest, 0))
+                for band_key in _band_keys(signature):
+                    buckets.setdefault(band_key, []).append(row_id)
+            partition = self._partitions[key] = (signatures, buckets, digests, analyses, latest)
+        return partition
+
+    def lookup(self, tenant, task, version, sections, signatures=None, anchor=None):
+        """Items per section from an earlier analysis of a near-identical contract, or None.
+
+        The earlier contract must have as many sections and be similar enough
+        section by section; sections items were taken from must be unchanged
+        and still contain each item's quote (field `anchor`).
+        """
+        signatures = [minhash(s) for s in sections] if signatures is None else signatures
+        normalized = [_normalized(s) for s in sections]
+        weights = [len(s) for s in sections]
+        total = sum(weights) or 1
+        with self._lock:
+            indexed, buckets, digests, analyses, _ = self._partition(tenant, task, version)
+            row_analysis = {}
+            candidates = set()
+            for signature in signatures:
+                for band_key in _band_keys(signature):
+                    candidates.update(buckets.get(band_key, ()))
+            for analysis_id, row_ids in analyses.items():
+                if len(row_ids) == len(sections) and candidates.intersection(row_ids):
+                    for row_id in row_ids:
+                        row_analysis[row_id] = analysis_id
+
+            scored = []
+            for analysis_id in set(row_analysis.values()):
+                row_ids = analyses[analysis_id]
+                score = sum(similarity(signature, indexed[row_id]) * weight
+                            for signature, row_id, weight in zip(signatures, row_ids, weights)) / total
+                if score >= self.threshold:
+                    scored.append((score, analysis_id))
+
+            for _, analysis_id in sorted(scored, reverse=True):
+                row_ids = analyses[analysis_id]
+                stored = dict(self._conn.execute(
+                    "SELECT id, items FROM clause_sections WHERE analysis_id = ?", (analysis_id,)
+                ).fetchall())
+                if len(stored) != len(row_ids):
+                    continue
+                items = [json.loads(stored[row_id]) for row_id in row_ids]
+                if all(_reusable(found, section, anchor, digests[row_id])
+                       for found, section, row_id in zip(items, normalized, row_ids)):
+                    self._conn.execute(
+                        "UPDATE clause_sections SET last_used = ? WHERE analysis_id = ?", (time.time(), analysis_id)
+                    )
+                    self._conn.commit()
+                    return items
+        return None
+
+    def lookup_sections(self, tenant, task, version, sections, anchor=None):
+        """Items per section from the latest earlier analysis of the same section, or None per section.
+
+        A section matches only if it is unchanged word for word and still
+        contains each item's quote or term (field `anchor`).
+        """
+        normalized = [_normalized(s) for s in sections]
+        found = [None] * len(sections)
+        with self._lock:
+            _, _, digests, _, latest = self._partition(tenant, task, version)
+            row_ids = {position: latest[_digest(section)] for position, section in enumerate(normalized)
+                       if _digest(section) in latest}
+            if not row_ids:
+                return found
+            placeholders = ", ".join("?" * len(set(row_ids.values())))
+            stored = dict(self._conn.execute(
+                f"SELECT id, items FROM clause_sections WHERE id IN ({placeholders})", sorted(set(row_ids.values()))
+            ).fetchall())
+            used = []
+            for position, row_id in row_ids.items():
+                if row_id not in stored:
+                    continue
+                items = json.loads(stored[row_id])
+                if _reusable(items, normalized[position], anchor, digests[row_id]):
+                    found[position] = items
+                    used.append(row_id)
+            if used:
+                self._conn.execute(
+                    "UPDATE clause_sections SET last_used = ? WHERE analysis_id IN (SELECT analysis_id FROM "
+                    f"clause_sections WHERE id IN ({', '.join('?' * len(used))}))", [time.time()] + used
+                )
+                self._conn.commit()
+        return found
+
+    def add(self, tenant, task, version, sections, items, signatures=None):
+        """Index a freshly analyzed contract with the items attributed to each of its sections"""
+        signatures = [minhash(s) for s in sections] if signatures is None else signatures
+        analysis_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            indexed, buckets, digests, analyses, latest = self._partition(tenant, task, version)
+            rows = []
+            for position, (section, section_items, signature) in enumerate(zip(sections, items, signatures)):
+                digest = _digest(_normalized(section))
+                cursor = self._conn.execute(
+                    "INSERT INTO clause_sections "
+                    "(tenant, task, prompt_version, analysis_id, position, signature, digest, items, "
+                    "created_at, last_used) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (tenant, task, version, analysis_id, position, signature.tobytes(), digest,
+                     json.dumps(section_items, ensure_ascii=False), now, now)
+                )
+                rows.append((cursor.lastrowid, signature, digest))
+            self._conn.commit()
+            for row_id, signature, digest in rows:
+                indexed[row_id] = signature
+                digests[row_id] = digest
+                analyses.setdefault(analysis_id, []).append(row_id)
+                latest[digest] = row_id
+                for band_key in _band_keys(signature):
+                    buckets.setdefault(band_key, []).append(row_id)
+
+    def record(self, sections, reused_sections, chars, reused_chars):
+        with self._lock:
+            self.sections += sections
+            self.reused_sections += reused_sections
+            self.chars += chars
+            self.reused_chars += reused_chars
+
+    def purge_stale_versions(self, prompt_versions):
+        """Delete analyses made with prompt templates that have since changed"""
+        removed = 0
+        with self._lock:
+            for task, version in prompt_versions.items():
+                cursor = self._conn.execute(
+                    "DELETE FROM clause_sections WHERE task = ? AND prompt_version != ?", (task, version)
+                )
+                removed += max(cursor.rowcount, 0)
+            self._conn.commit()
+            self._partitions.clear()
+        return removed
+
+    def stats(self):
+        """Sections and characters checked and reused since startup.
+
+        reuse_rate is by characters, which tracks the prompt tokens saved.
+        """
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM clause_sections").fetchone()[0]
+            return {
+                "sections": self.sections,
+                "reused_sections": self.reused_sections,
+                "chars": self.chars,
+                "reused_chars": self.reused_chars,
+                "reuse_rate": round(self.reused_chars / self.chars, 3) if self.chars else 0.0,
+                "entries": entries
+            }
+
+
+class _NullIndex:
+    """Stand-in used when deduplication is disabled or the index can't be opened"""
+
+    def lookup(self, tenant, task, version, sections, signatures=None, anchor=None):
+        return None
+
+    def lookup_sections(self, tenant, task, version, sections, anchor=None):
+        return [None] * len(sections)
+
+    def add(self, tenant, task, version, sections, items, signatures=None):
+        pass
+
+    def record(self, sections, reused_sections, chars, reused_chars):
+        pass
+
+    def purge_stale_versions(self, prompt_versions):
+        return 0
+
+    def stats(self):
+        return {"sections": 0, "reused_sections": 0, "chars": 0, "reused_chars": 0, "reuse_rate": 0.0, "entries": 0}
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_clause_index(prompt_versions=None):
+    """Process-wide index shared by all Streamlit sessions"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            if not CLAUSE_DEDUP_ENABLED:
+                _index = _NullIndex()
+            else:
+                try:
+                    _index = ClauseIndex()
+                    if prompt_versions:
+                        removed = _index.purge_stale_versions(prompt_versions)
+                        if removed:
+                            print(f"Clause index: removed {removed} sections from outdated prompts")
+                except Exception as e:
+                    print(f"Warning: Could not open clause index: {str(e)}")
+                    _index = _NullIndex()
+    return _index
+
+
+def attribute_items(items, anchor, sections):
+    """Items of an analysis grouped by the section their quote or term comes from.
+
+    Returns None when there is nothing to index: no items at all (an empty
+    answer says nothing about the contract) or an item that can't be placed
+    in any section, which a later lookup couldn't check.
+    """
+    if not items:
+        return None
+    normalized = [_normalized(s) for s in sections]
+    grouped = [[] for _ in sections]
+    for item in items:
+        position = _item_position(_anchor_text(item, anchor), anchor, normalized)
+        if position is None:
+            return None
+        grouped[position].append(item)
+    return grouped
+
+
+def analyze_with_reuse(index, tenant, task, version, text, analyze_chunk, merge, field):
+    """Run a list-producing analysis (key clauses, key terms), reusing the results of earlier contracts.
+
+    Key terms of unchanged sections are reused and only the other sections
+    are analyzed; key clauses are reused only for a near-identical contract.
+    Reused and fresh items are merged in document order with `merge`, and
+    freshly analyzed contracts are indexed for later ones.
+    """
+    sections = split_sections(text)
+    signatures = [minhash(section) for section in sections]
+    anchor = ITEM_ANCHORS.get(field)
+
+    if field in SECTION_REUSE_FIELDS:
+        stored = index.lookup_sections(tenant, task, version, sections, anchor)
+    else:
+        items = index.lookup(tenant, task, version, sections, signatures, anchor)
+        stored = [None] * len(sections) if items is None else items
+    reused = [section for section, found in zip(sections, stored) if found is not None]
+    index.record(len(sections), len(reused), len(text), sum(len(section) for section in reused))
+    if len(reused) == len(sections):
+        return merge([(section, {field: found}) for section, found in zip(sections, stored)])
+
+    changed = [section for section, found in zip(sections, stored) if found is None]
+    fresh = analyze_in_chunks(text if not reused else "".join(changed), analyze_chunk, merge)
+    grouped = attribute_items(fresh.get(field), anchor, changed)
+    if not reused:
+        if grouped is not None:
+            index.add(tenant, task, version, sections, grouped, signatures)
+        return fresh
+
+    if grouped is None:
+        # Fresh items that can't be placed go where the first changed section was
+        pieces = [(section, {field: found}) for section, found in zip(sections, stored) if found is not None]
+        pieces.insert(stored.index(None), ("".join(changed), fresh))
+        return merge(pieces)
+
+    grouped = iter(grouped)
+    items = [found if found is not None else next(grouped) for found in stored]
+    index.add(tenant, task, version, sections, items, signatures)
+    return merge([(section, {field: found}) for section, found in zip(sections, items)])
@@ -0,0 +1,191 @@
+import re
+import hashlib
+
+import numpy as np
+
+from pdf_extraction import page_at
+from document_model import CLAUSE, SECTION_BOUNDARY, get_document_model
+
+# BM25 passage index over one contract, used to send chat_with_contract only
+# the passages relevant to a question instead of the first 12,000 characters.
+# Postings are stored column-wise (term -> passages) in flat NumPy arrays with
+# the BM25 weight of each posting precomputed, so a query is a handful of
+# array slices and one bincount.
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Passages are built from paragraphs, merged until they are at least
+# MIN_PASSAGE_CHARS and split if they exceed MAX_PASSAGE_CHARS
+MIN_PASSAGE_CHARS = 300
+MAX_PASSAGE_CHARS = 1500
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or shall that the their this to was were will with
+which what when where who whom any all such other than then there these those under upon into our your
+""".split())
+
+
+def tokenize(text):
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def _split_passages(text):
+    """Split text into (start, end) spans of roughly paragraph-sized passages"""
+    spans = []
+    start = None
+    end = 0
+    for match in re.finditer(r"\S(?:.*?\S)?(?=\n\s*\n|\s*\Z)", text, re.DOTALL):
+        if start is None:
+            start = match.start()
+        end = match.end()
+        if end - start >= MIN_PASSAGE_CHARS:
+            spans.append((start, end))
+            start = None
+    if start is not None:
+        spans.append((start, end))
+
+    # Break up very long paragraphs (e.g. text extracted without blank lines)
+    passages = []
+    for start, end in spans:
+        while end - start > MAX_PASSAGE_CHARS:
+            cut = text.rfind(" ", start + MIN_PASSAGE_CHARS, start + MAX_PASSAGE_CHARS)
+            cut = cut if cut > start else start + MAX_PASSAGE_CHARS
+            passages.append((start, cut))
+            start = cut
+        passages.append((start, end))
+    return passages
+
+
+def _model_labels(model, spans):
+    """Section heading and clause ID of each passage, from the document model"""
+    labels = []
+    for start, _ in spans:
+        section = model.section_at(start)
+        node = model.node_at(start)
+        label = section.title if section else None
+        if node is not None and node.kind == CLAUSE:
+            label = f"{label} | clause {node.id}" if label else f"clause {node.id}"
+        labels.append(label)
+    return labels
+
+
+def _section_labels(text, spans):
+    """Heading of the section each passage starts in"""
+    headings = []
+    for match in SECTION_BOUNDARY.finditer(text):
+        line_end = text.find("\n", match.start())
+        headings.append((match.start(), text[match.start():line_end if line_end != -1 else len(text)].strip()))
+
+    labels = []
+    position = 0
+    current = None
+    for start, _ in spans:
+        while position < len(headings) and headings[position][0] <= start:
+            current = headings[position][1]
+            position += 1
+        labels.append(current[:80] if current else None)
+    return labels
+
+
+class ContractIndex:
+    """BM25 index over the passages of a single contract"""
+
+    def __init__(self, text, page_offsets=None, model=None):
+        self.text = text
+        # Start offset of each PDF page, so passages can be cited by page
+        self.page_offsets = page_offsets or None
+        self.text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        self.spans = _split_passages(text)
+        self.sections = _model_labels(model, self.spans) if model is not None else _section_labels(text, self.spans)
+
+        vocabulary = {}
+        term_ids = []
+        passage_ids = []
+        lengths = np.zeros(len(self.spans), dtype=np.float32)
+
+        for passage_id, (start, end) in enumerate(self.spans):
+            tokens = tokenize(text[start:end])
+            lengths[passage_id] = len(tokens)
+            for token in tokens:
+                term_ids.append(vocabulary.setdefault(token, len(vocabulary)))
+                passage_ids.append(passage_id)
+
+        self.vocabulary = vocabulary
+        num_passages = max(len(self.spans), 1)
+        num_terms = len(vocabulary)
+
+        term_ids = np.asarray(term_ids, dtype=np.int32)
+        passage_ids = np.asarray(passage_ids, dtype=np.int32)
+
+        # Term frequency per (term, passage) pair, sorted by term (CSC layout)
+        pair_keys = term_ids.astype(np.int64) * num_passages + passage_ids
+        unique_pairs, tf = np.unique(pair_keys, return_counts=True)
+        posting_terms = (unique_pairs // num_passages).astype(np.int32)
+        self.postings = (unique_pairs % num_passages).astype(np.int32)
+        self.indptr = np.zeros(num_terms + 1, dtype=np.int64)
+        np.cumsum(np.bincount(posting_terms, minlength=num_terms), out=self.indptr[1:])
+
+        # Precompute the BM25 weight of every posting
+        doc_freq = np.diff(self.indptr).astype(np.float32)
+        idf = np.log1p((num_passages - doc_freq + 0.5) / (doc_freq + 0.5))
+        avg_length = float(lengths.mean()) if len(lengths) and lengths.mean() > 0 else 1.0
+        tf = tf.astype(np.float32)
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[self.postings] / avg_length)
+        self.weights = idf[posting_terms] * tf * (BM25_K1 + 1) / (tf + norm)
+
+    def __len__(self):
+        return len(self.spans)
+
+    def search(self, query, top_k=6):
+        """Return up to top_k (passage_id, score) pairs, best first"""
+        ids = [self.vocabulary[t] for t in set(tokenize(query)) if t in self.vocabulary]
+        if not ids or not self.spans:
+            return []
+
+        postings = np.concatenate([self.postings[self.indptr[i]:self.indptr[i + 1]] for i in ids])
+        weights = np.concatenate([self.weights[self.indptr[i]:self.indptr[i + 1]] for i in ids])
+        scores = np.bincount(postings, weights=weights, minlength=len(self.spans))
+
+        top_k = min(top_k, int(np.count_nonzero(scores)))
+        if top_k == 0:
+            return []
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+        best = best[np.argsort(-scores[best])]
+        return [(int(i), float(scores[i])) for i in best]
+
+    def passage(self, passage_id):
+        start, end = self.spans[passage_id]
+        return self.text[start:end]
+
+    def pages(self, passage_id):
+        """(first, last) 1-based page numbers of a passage, or None without page offsets"""
+        if not self.page_offsets:
+            return None
+        start, end = self.spans[passage_id]
+        return page_at(self.page_offsets, start), page_at(self.page_offsets, end - 1)
+
+    def format_passages(self, hits):
+        """Render hits in document order with their section reference"""
+        blocks = []
+        for passage_id, _ in sorted(hits):
+            start, end = self.spans[passage_id]
+            section = self.sections[passage_id] or "Preamble"
+            pages = self.pages(passage_id)
+            if pages is None:
+                location = f"characters {start}-{end}"
+            elif pages[0] == pages[1]:
+                location = f"page {pages[0]}"
+            else:
+                location = f"pages {pages[0]}-{pages[1]}"
+            blocks.append(f"[{section} | {location}]\n{self.passage(passage_id)}")
+        return "\n\n".join(blocks)
+
+
+def get_contract_index(session_state, text):
+    """Index for text, cached in session state next to contract_text and page_offsets"""
+    index = session_state.get("contract_index")
+    if index is None or index.text_hash != hashlib.sha256(text.encode("utf-8")).hexdigest():
+        index = ContractIndex(text, session_state.get("page_offsets"), get_document_model(session_state, text))
+        session_state["contract_index"] = index
+    return index
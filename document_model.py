@@ -0,0 +1,283 @@
+import re
+import hashlib
+
+import numpy as np
+
+# Segmentation of an extracted contract into headings, numbered clauses,
+# definitions and the signature block. The model is built once per contract
+# and stored in session state, so prompt builders, chat retrieval and the PDF
+# report can refer to clauses by ID ("4.2", "4.2(a)", "def:Services") and map
+# any character offset back to its clause with a binary search instead of
+# re-scanning the text.
+#
+# Nodes use __slots__ and the spans also live in flat NumPy offset arrays, so
+# a 300-page contract with a few thousand clauses stays small.
+HEADING = "heading"
+CLAUSE = "clause"
+DEFINITION = "definition"
+SIGNATURE = "signature"
+
+# Start of a top-level section: "ARTICLE 5", "Section 12", "7. TERMINATION",
+# "SCHEDULE 2" or an all-caps heading line
+SECTION_BOUNDARY = re.compile(
+    r"^(?=[ \t]*(?:"
+    r"(?:ARTICLE|Article|SECTION|Section|CLAUSE|Clause|SCHEDULE|Schedule|EXHIBIT|Exhibit|ANNEX|Annex|APPENDIX|Appendix)\s+[\dIVXLC]+\b"
+    r"|\d{1,3}\.[ \t]+\S"
+    r"|[A-Z][A-Z0-9 ,&\-]{3,}[ \t]*$"
+    r"))",
+    re.MULTILINE
+)
+
+# "4.2", "4.2.1" or "4.2." at the start of a line
+NUMBERED_CLAUSE = re.compile(r"[ \t]*(\d{1,3}(?:\.\d{1,3})+)\.?[ \t]+\S")
+# "(a)", "(iv)", "(3)" at the start of a line
+LETTERED_CLAUSE = re.compile(r"[ \t]*\(([a-z]{1,2}|[ivxl]{1,5}|\d{1,2})\)[ \t]+\S")
+# "7. Text of a top-level clause" (a heading if short and unpunctuated)
+TOP_LEVEL_NUMBER = re.compile(r"[ \t]*(\d{1,3})\.[ \t]+\S")
+# "ARTICLE 5", "Section 12", "SCHEDULE 2"
+KEYWORD_NUMBER = re.compile(
+    r"[ \t]*(ARTICLE|Article|SECTION|Section|CLAUSE|Clause|SCHEDULE|Schedule|EXHIBIT|Exhibit|"
+    r"ANNEX|Annex|APPENDIX|Appendix)\s+([\dIVXLC]+)\b"
+)
+# Keywords whose numbers share the clause numbering ("Article 5" contains clause 5.1)
+CLAUSE_KEYWORDS = ("article", "section", "clause")
+# '"Services" means ...' or an inline '(the "Supplier")'
+DEFINITION_PATTERN = re.compile(
+    r"[\"“]([^\"”\n]{1,80})[\"”]\s+(?:shall\s+)?"
+    r"(?:means?|has the meaning|have the meaning|refers to|shall include|includes)\b"
+    r"|\((?:the\s+|each\s+a\s+|together\s+the\s+)?[\"“]([^\"”\n]{1,60})[\"”]\)"
+)
+SIGNATURE_START = re.compile(
+    r"[ \t]*(?:IN WITNESS WHEREOF|In witness whereof|SIGNED\b|Signed (?:by|for|on behalf)|EXECUTED\b|"
+    r"Executed (?:as|by)|Signatures?\s*:|By:\s*_{3,})"
+)
+# Lone "Signed" / "By:" lines only start the signature block near the end
+SIGNATURE_TAIL_FRACTION = 0.7
+
+MAX_TITLE_CHARS = 80
+
+
+class Node:
+    """One heading, clause, definition or signature block"""
+
+    __slots__ = ("index", "id", "kind", "number", "title", "start", "end", "parent")
+
+    def __init__(self, index, node_id, kind, number, title, start, end, parent):
+        self.index = index
+        self.id = node_id
+        self.kind = kind
+        self.number = number
+        self.title = title
+        self.start = start
+        self.end = end
+        self.parent = parent
+
+    def __repr__(self):
+        return f"Node({self.id!r}, {self.kind}, {self.start}-{self.end})"
+
+
+def _is_heading_line(line):
+    """A "7. ..." line is a heading if it is short and reads like a title"""
+    stripped = line.strip()
+    if len(stripped) > MAX_TITLE_CHARS:
+        return False
+    body = re.sub(r"^\d{1,3}\.\s*", "", stripped)
+    if body.isupper():
+        return True
+    return not body.endswith((".", ";", ",", ":")) and (body.istitle() or len(body.split()) <= 6)
+
+
+def _heading_id(line, top_level):
+    """(number, id) of a heading line; unnumbered headings get (None, None)"""
+    if top_level:
+        return top_level.group(1), top_level.group(1)
+    keyword = KEYWORD_NUMBER.match(line)
+    if keyword is None:
+        return None, None
+    word, number = keyword.group(1).lower(), keyword.group(2)
+    return number, number if word in CLAUSE_KEYWORDS else f"{word}-{number}"
+
+
+class DocumentModel:
+    """Headings, clauses, definitions and signature block of one contract"""
+
+    def __init__(self, text):
+        self.text = text
+        self.text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        self.nodes = []
+        self.by_id = {}
+        self.definitions = {}
+        self._segment()
+
+        order = sorted(range(len(self.nodes)), key=lambda i: (self.nodes[i].start, -self.nodes[i].end))
+        self.nodes = [self.nodes[i] for i in order]
+        remap = {old: new for new, old in enumerate(order)}
+        for index, node in enumerate(self.nodes):
+            node.index = index
+            node.parent = remap[node.parent] if node.parent is not None else None
+
+        self.starts = np.fromiter((n.start for n in self.nodes), dtype=np.int64, count=len(self.nodes))
+        self.ends = np.fromiter((n.end for n in self.nodes), dtype=np.int64, count=len(self.nodes))
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def _add(self, kind, number, title, start, end, parent, node_id):
+        # Numbering restarts in schedules and annexes; keep IDs unique
+        unique_id = node_id
+        suffix = 2
+        while unique_id in self.by_id:
+            unique_id = f"{node_id}#{suffix}"
+            suffix += 1
+        node = Node(len(self.nodes), unique_id, kind, number, title, start, end, parent)
+        self.nodes.append(node)
+        self.by_id[unique_id] = node
+        return node
+
+    def _segment(self):
+        text = self.text
+        length = len(text)
+        heading = None
+        clauses = {}  # clause number -> node, for parent lookups
+        current_clause = None
+        open_blocks = []  # nodes whose end is set when the next block starts
+        signature = None
+        headings = 0
+
+        for match in re.finditer(r"[^\n]*\n?", text):
+            line = match.group()
+            start = match.start()
+            if not line.strip():
+                continue
+
+            if SIGNATURE_START.match(line) and (
+                line.lstrip().upper().startswith("IN WITNESS") or start >= length * SIGNATURE_TAIL_FRACTION
+            ):
+                signature = start
+                break
+
+            title = line.strip()[:MAX_TITLE_CHARS]
+            numbered = NUMBERED_CLAUSE.match(line)
+            lettered = LETTERED_CLAUSE.match(line)
+            top_level = TOP_LEVEL_NUMBER.match(line)
+
+            if numbered:
+                number = numbered.group(1)
+                parent_number = number.rsplit(".", 1)[0]
+                parent = clauses.get(parent_number) or heading
+                node = self._add(CLAUSE, number, title, start, length, parent.index if parent else None, number)
+                clauses[number] = node
+                self._close(open_blocks, start, keep=parent)
+                open_blocks.append(node)
+                current_clause = node
+            elif lettered and current_clause is not None:
+                number = lettered.group(1)
+                parent = current_clause
+                node = self._add(
+                    CLAUSE, number, title, start, length, parent.index, f"{parent.id}({number})"
+                )
+                self._close(open_blocks, start, keep=parent)
+                open_blocks.append(node)
+            elif SECTION_BOUNDARY.match(line) and (not top_level or _is_heading_line(line)):
+                number, node_id = _heading_id(line, top_level)
+                headings += 1
+                self._close(open_blocks, start)
+                if heading is not None:
+                    heading.end = start
+                heading = self._add(HEADING, number, title, start, length, None, node_id or f"s{headings}")
+                if node_id == number and number:
+                    clauses[number] = heading
+                current_clause = None
+                open_blocks = []
+            elif top_level:
+                # "7. The Supplier shall ..." - a top-level clause without its own heading line
+                number = top_level.group(1)
+                node = self._add(CLAUSE, number, title, start, length, heading.index if heading else None, number)
+                clauses[number] = node
+                self._close(open_blocks, start)
+                open_blocks.append(node)
+                current_clause = node
+
+            for definition in DEFINITION_PATTERN.finditer(line):
+                term = (definition.group(1) or definition.group(2)).strip()
+                if term.lower() in self.definitions:
+                    continue
+                owner = open_blocks[-1] if open_blocks else heading
+                node = self._add(
+                    DEFINITION, None, term, start + definition.start(), start + len(line.rstrip("\n")),
+                    owner.index if owner else None, f"def:{term}"
+                )
+                self.definitions[term.lower()] = node
+
+        end = signature if signature is not None else length
+        self._close(open_blocks, end)
+        if heading is not None:
+            heading.end = end
+        if signature is not None:
+            self._add(SIGNATURE, None, "Signature block", signature, length, None, "signature")
+
+    @staticmethod
+    def _close(open_blocks, end, keep=None):
+        """End the open blocks at `end`, except `keep` and its ancestors still open"""
+        while open_blocks and open_blocks[-1] is not keep:
+            open_blocks.pop().end = end
+
+    def section_starts(self):
+        """Start offsets of the top-level blocks: headings, clauses outside any heading and the signature block"""
+        return [node.start for node in self.nodes if node.parent is None and node.kind != DEFINITION]
+
+    def node_at(self, offset):
+        """Innermost heading, clause or signature block containing offset"""
+        i = int(np.searchsorted(self.starts, offset, side="right")) - 1
+        while i >= 0:
+            node = self.nodes[i]
+            if node.end > offset and node.kind != DEFINITION:
+                return node
+            i = node.parent if node.end <= offset and node.parent is not None else i - 1
+        return None
+
+    def section_at(self, offset):
+        """Heading of the section containing offset"""
+        node = self.node_at(offset)
+        while node is not None and node.kind != HEADING:
+            node = self.nodes[node.parent] if node.parent is not None else None
+        return node
+
+    def locate(self, extract):
+        """Clause containing a quoted extract (e.g. a clause_extract from the analysis)"""
+        extract = (extract or "").strip().strip("\"'“”.")
+        if not extract:
+            return None
+        offset = self.text.find(extract)
+        if offset == -1:
+            # Models often re-flow whitespace or trim a quote; fall back to the opening words
+            words = extract.split()[:8]
+            if len(words) < 4:
+                return None
+            match = re.search(r"\s+".join(re.escape(w) for w in words), self.text)
+            if match is None:
+                return None
+            offset = match.start()
+        return self.node_at(offset)
+
+
+def reference(node):
+    """Human-readable reference for a node: "Clause 4.2", "Section 5", "Signature block" """
+    if node is None:
+        return None
+    if node.kind == SIGNATURE:
+        return "Signature block"
+    if node.kind == DEFINITION:
+        return f'Definition of "{node.title}"'
+    if node.kind == HEADING:
+        return f"Section {node.number}" if node.number else node.title
+    return f"Clause {node.id}"
+
+
+def get_document_model(session_state, text):
+    """Model for text, cached in session state next to contract_text"""
+    model = session_state.get("document_model")
+    if model is None or model.text_hash != hashlib.sha256(text.encode("utf-8")).hexdigest():
+        model = DocumentModel(text)
+        session_state["document_model"] = model
+    return model
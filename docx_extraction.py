@@ -0,0 +1,131 @@
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+
+# Streaming DOCX text extraction. Instead of building python-docx's object
+# model for the whole document, the WordprocessingML parts are iterparsed
+# straight from the zip and cleared as soon as each paragraph or table has
+# been emitted, so peak memory stays flat however large the file is.
+#
+# Output is one line per paragraph (like the old doc.paragraphs loop) plus
+# one "cell | cell | cell" line per table row, in reading order. Footnotes,
+# endnotes, headers and footers follow the body.
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+P = W + "p"
+R = W + "r"
+T = W + "t"
+TAB = W + "tab"
+BR = W + "br"
+CR = W + "cr"
+TBL = W + "tbl"
+TR = W + "tr"
+TC = W + "tc"
+BODY = W + "body"
+
+# Footnote/endnote separators are "notes" without any text
+NOTE_PARTS = ("word/footnotes.xml", "word/endnotes.xml")
+HEADER_FOOTER_PART = re.compile(r"^word/(header|footer)\d*\.xml$")
+
+CELL_SEPARATOR = " | "
+
+
+def _iter_part_lines(stream, container_tag=None):
+    """Yield the paragraph and table-row lines of one XML part in reading order.
+
+    container_tag is the element whose children are cleared after each
+    top-level paragraph or table (w:body for the main document); parts
+    without it (notes, headers) are small enough to keep.
+    """
+    container = None
+    paragraphs = []  # stack of text buffers; nested paragraphs come from text boxes
+    rows = []  # stack of cell lists, one per open table row (tables can nest)
+    cells = []  # stack of paragraph lists, one per open table cell
+    depth = 0  # open paragraphs + tables below the container
+    runs = 0  # open runs; w:tab outside one is a tab stop (w:pPr/w:tabs), not text
+
+    for event, element in ET.iterparse(stream, events=("start", "end")):
+        tag = element.tag
+        if event == "start":
+            if tag == P:
+                paragraphs.append([])
+                depth += 1
+            elif tag == R:
+                runs += 1
+            elif tag == TBL:
+                depth += 1
+            elif tag == TR:
+                rows.append([])
+            elif tag == TC:
+                cells.append([])
+            elif tag == container_tag and container is None:
+                container = element
+            continue
+
+        if tag == T:
+            if paragraphs and element.text:
+                paragraphs[-1].append(element.text)
+        elif tag == R:
+            runs -= 1
+        elif tag == TAB:
+            if paragraphs and runs:
+                paragraphs[-1].append("\t")
+        elif tag in (BR, CR):
+            if paragraphs and runs:
+                paragraphs[-1].append("\n")
+        elif tag == P:
+            line = "".join(paragraphs.pop())
+            depth -= 1
+            if cells:
+                cells[-1].append(line)
+            else:
+                yield line
+        elif tag == TC:
+            text = " ".join(part for part in cells.pop() if part)
+            if rows:
+                rows[-1].append(text)
+        elif tag == TR:
+            line = CELL_SEPARATOR.join(rows.pop())
+            if cells:
+                # Row of a nested table: becomes part of the outer cell
+                cells[-1].append(line)
+            elif line.strip(" |"):
+                yield line
+        elif tag == TBL:
+            depth -= 1
+        else:
+            continue
+
+        # Free everything parsed so far once a top-level block is complete
+        if depth == 0 and container is not None and tag in (P, TBL):
+            container.clear()
+
+
+def iter_docx_lines(file):
+    """Yield the text lines of a .docx file (path or file-like object)"""
+    with zipfile.ZipFile(file) as archive:
+        names = set(archive.namelist())
+
+        with archive.open("word/document.xml") as stream:
+            yield from _iter_part_lines(stream, container_tag=BODY)
+
+        for name in NOTE_PARTS:
+            if name in names:
+                with archive.open(name) as stream:
+                    for line in _iter_part_lines(stream):
+                        if line.strip():
+                            yield line
+
+        # Headers and footers repeat on every page; emit each distinct line once
+        seen = set()
+        for name in sorted(n for n in names if HEADER_FOOTER_PART.match(n)):
+            with archive.open(name) as stream:
+                for line in _iter_part_lines(stream):
+                    if line.strip() and line not in seen:
+                        seen.add(line)
+                        yield line
+
+
+def extract_docx(file):
+    """Extract the text of a .docx file, one line per paragraph or table row"""
+    return "".join(line + "\n" for line in iter_docx_lines(file))
@@ -0,0 +1,162 @@
+import os
+import gzip
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Cache of extracted document text keyed by a hash of the uploaded file's
+# bytes, so a file is parsed once no matter how many reruns or users upload
+# it. Entries live in a size-bounded in-memory LRU shared by all sessions and
+# are optionally spilled to gzipped JSON files on disk, which also survive a
+# server restart.
+EXTRACTION_CACHE_MAX_BYTES = int(float(os.getenv("EXTRACTION_CACHE_MAX_MB", "64")) * 1024 * 1024)
+EXTRACTION_CACHE_DISK = os.getenv("EXTRACTION_CACHE_DISK", "true").lower() not in ("0", "false", "no")
+EXTRACTION_CACHE_DIR = os.getenv("EXTRACTION_CACHE_DIR", os.path.join(".cache", "extractions"))
+EXTRACTION_CACHE_DISK_MAX_BYTES = int(float(os.getenv("EXTRACTION_CACHE_DISK_MAX_MB", "512")) * 1024 * 1024)
+
+# Bump when extraction output changes so old entries are not reused
+EXTRACTOR_VERSION = "1"
+
+
+def content_key(sha256_hex, kind):
+    """Cache key for a file of the given kind ("pdf", "docx") whose SHA-256 is already known"""
+    return hashlib.sha256(f"{sha256_hex}\0{kind}\0{EXTRACTOR_VERSION}".encode("utf-8")).hexdigest()
+
+
+class ExtractionCache:
+    """In-memory LRU of (text, page_offsets) bounded by text size, with an optional disk tier"""
+
+    def __init__(self, max_bytes=EXTRACTION_CACHE_MAX_BYTES, disk_dir=None, disk_max_bytes=EXTRACTION_CACHE_DISK_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self.size = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    @staticmethod
+    def _entry_size(text, page_offsets):
+        # str of mostly ASCII text plus 8 bytes per offset is close enough
+        return len(text) + 8 * len(page_offsets or ())
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key + ".json.gz")
+
+    def get(self, key):
+        """Return (text, page_offsets) or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        entry = self._read_disk(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._put(key, entry)
+        return entry
+
+    def set(self, key, text, page_offsets=None):
+        entry = (text, list(page_offsets) if page_offsets else None)
+        with self._lock:
+            self._put(key, entry)
+        self._write_disk(key, entry)
+
+    def _put(self, key, entry):
+        size = self._entry_size(*entry)
+        if size > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.size -= self._entry_size(*old)
+        self._entries[key] = entry
+        self.size += size
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= self._entry_size(*evicted)
+
+    def _read_disk(self, key):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                payload = json.load(f)
+            # Touch the file so disk eviction is least-recently-used
+            os.utime(path)
+            return payload["text"], payload.get("page_offsets")
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Warning: Could not read cached extraction {key[:12]}: {str(e)}")
+            return None
+
+    def _write_disk(self, key, entry):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with gzip.open(temp_path, "wt", encoding="utf-8", compresslevel=5) as f:
+                json.dump({"text": entry[0], "page_offsets": entry[1]}, f)
+            os.replace(temp_path, path)
+            self._evict_disk()
+        except Exception as e:
+            print(f"Warning: Could not write cached extraction {key[:12]}: {str(e)}")
+
+    def _evict_disk(self):
+        """Delete least recently used files until the disk tier fits in disk_max_bytes"""
+        files = []
+        total = 0
+        for entry in os.scandir(self.disk_dir):
+            if entry.name.endswith(".json.gz"):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        for _, size, path in sorted(files):
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "size_bytes": self.size
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_extraction_cache():
+    """Process-wide cache shared by all Streamlit sessions"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            disk_dir = EXTRACTION_CACHE_DIR if EXTRACTION_CACHE_DISK else None
+            try:
+                _cache = ExtractionCache(disk_dir=disk_dir)
+            except Exception as e:
+                print(f"Warning: Could not open extraction cache directory: {str(e)}")
+                _cache = ExtractionCache()
+    return _cache
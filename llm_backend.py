@@ -0,0 +1,371 @@
+import os
+import json
+import time
+import random
+import threading
+
+from rate_limiter import RateLimitError, get_rate_limiter, is_throttled
+from usage_tracker import get_usage_tracker
+
+# Every prompt the app sends goes through an LLMBackend. LLM_BACKEND selects
+# the implementation:
+#   gemini (default)  Google Gemini via google.generativeai
+#   stub              deterministic offline responses with configurable
+#                     latency, for load tests and benchmarks without a key
+# Either way the backend is wrapped in the process-wide rate limiter, and
+# every attempt is recorded in the usage log.
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini").lower()
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-pro")
+STUB_LATENCY_MS = float(os.getenv("STUB_LATENCY_MS", "800"))
+STUB_JITTER_MS = float(os.getenv("STUB_JITTER_MS", "200"))
+STUB_SEED = os.getenv("STUB_SEED")
+# Fraction of stub calls that fail with a 429, to exercise the rate limiter
+STUB_THROTTLE_RATE = float(os.getenv("STUB_THROTTLE_RATE", "0"))
+
+
+class LLMResponse:
+    """Text of a model response plus its token usage"""
+
+    def __init__(self, text, prompt_tokens=0, output_tokens=0, raw=None):
+        self.text = text
+        self.prompt_tokens = prompt_tokens
+        self.output_tokens = output_tokens
+        self.raw = raw
+
+
+class LLMBackend:
+    """Interface every prompt-issuing function goes through"""
+
+    name = "base"
+
+    def generate(self, prompt, task=None):
+        """Return an LLMResponse for prompt. `task` names the calling feature or schema."""
+        raise NotImplementedError
+
+    def generate_stream(self, prompt, task=None):
+        """Yield the response text in pieces as it is produced.
+
+        The generator returns an LLMResponse with the full text and token
+        usage, available to callers that use `yield from`.
+        """
+        response = self.generate(prompt, task)
+        yield response.text
+        return response
+
+    def count_tokens(self, prompt):
+        # Rough estimate, good enough for English legal text
+        return max(1, len(prompt) // 4)
+
+
+class GeminiBackend(LLMBackend):
+    """Google Gemini via the google.generativeai SDK"""
+
+    name = "gemini"
+
+    def __init__(self, model_name=GEMINI_MODEL, api_key=None):
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key or os.getenv("GOOGLE_API_KEY"))
+        self.model_name = model_name
+        self.model = genai.GenerativeModel(model_name)
+
+    @staticmethod
+    def _usage(response):
+        usage = getattr(response, "usage_metadata", None)
+        if usage is None:
+            return 0, 0
+        return getattr(usage, "prompt_token_count", 0) or 0, getattr(usage, "candidates_token_count", 0) or 0
+
+    def generate(self, prompt, task=None):
+        response = self.model.generate_content(prompt)
+        prompt_tokens, output_tokens = self._usage(response)
+        return LLMResponse(response.text, prompt_tokens, output_tokens, raw=response)
+
+    def generate_stream(self, prompt, task=None):
+        pieces = []
+        prompt_tokens = output_tokens = 0
+        for chunk in self.model.generate_content(prompt, stream=True):
+            # Usage is cumulative; the last chunk carries the totals
+            if getattr(chunk, "usage_metadata", None):
+                prompt_tokens, output_tokens = self._usage(chunk)
+            try:
+                text = chunk.text
+            except ValueError:
+                # Chunks without text parts (e.g. the final finish_reason chunk)
+                continue
+            if text:
+                pieces.append(text)
+                yield text
+        return LLMResponse("".join(pieces), prompt_tokens, output_tokens)
+
+    def count_tokens(self, prompt):
+        return self.model.count_tokens(prompt).total_tokens
+
+
+# Canned, schema-valid responses for the stub backend, keyed by task
+STUB_SCORE = {
+    "overall_score": 74,
+    "score_breakdown": {
+        "clarity_and_language": 80,
+        "comprehensiveness": 72,
+        "risk_protection": 65,
+        "balanced_rights": 70,
+        "compliance": 82
+    },
+    "summary": "The agreement is clearly drafted and covers the usual commercial terms. "
+               "Liability and indemnity provisions favour the supplier."
+}
+
+STUB_RISKS_OPPORTUNITIES = {
+    "risks": {
+        "liability_cap": {
+            "level": "High",
+            "description": "Supplier liability is capped at twelve months' fees.",
+            "potential_impact": "Losses above the cap are unrecoverable.",
+            "mitigation_suggestions": "Negotiate a higher cap for data breaches."
+        },
+        "auto_renewal": {
+            "level": "Medium",
+            "description": "The term renews automatically unless notice is given.",
+            "potential_impact": "Unintended renewal for a further term.",
+            "mitigation_suggestions": "Diarise the notice deadline."
+        }
+    },
+    "opportunities": {
+        "service_credits": {
+            "level": "Medium",
+            "description": "Service credits apply when service levels are missed.",
+            "potential_value": "Fee reductions during outages.",
+            "action_items": "Track service level reports monthly."
+        }
+    }
+}
+
+STUB_KEY_CLAUSES = {
+    "key_clauses": [
+        {
+            "clause_type": "Limitation of Liability",
+            "clause_extract": "The Supplier's total aggregate liability shall not exceed the Fees paid in the twelve (12) months preceding the claim.",
+            "explanation": "Caps what the customer can recover.",
+            "concerns": "Low relative to potential losses."
+        },
+        {
+            "clause_type": "Termination",
+            "clause_extract": "Either party may terminate this Agreement on ninety (90) days' written notice.",
+            "explanation": "Either side can exit without cause.",
+            "concerns": ""
+        }
+    ]
+}
+
+STUB_CLAUSE_QUERY = {
+    "found": True,
+    "clause_text": "Either party may terminate this Agreement on ninety (90) days' written notice to the other party.",
+    "explanation": "Either party can end the agreement without cause with three months' notice.",
+    "implications": "Revenue and supply are only secure for the notice period.",
+    "standard_practice": "Common for services agreements; 30-90 days is typical.",
+    "recommendations": "Consider a minimum term before termination for convenience applies."
+}
+
+STUB_KEY_TERMS = {
+    "key_terms": [
+        {
+            "term": "Services",
+            "definition": "The services described in Schedule 1.",
+            "explanation": "What the supplier must deliver.",
+            "importance": "Defines the scope of the supplier's obligations."
+        },
+        {
+            "term": "Fees",
+            "definition": "The charges set out in Schedule 2.",
+            "explanation": "What the customer pays.",
+            "importance": "Also the basis of the liability cap."
+        }
+    ]
+}
+
+STUB_SUMMARY = {
+    "contract_type": "Master Services Agreement",
+    "parties": ["Acme Corp", "Globex Ltd"],
+    "purpose": "Provision of managed services by Globex to Acme.",
+    "key_provisions": ["Monthly fees payable within 30 days", "Liability cap of 12 months' fees"],
+    "important_dates": [{"event": "Initial term ends", "date": "36 months from the Effective Date"}],
+    "notable_aspects": "Termination for convenience on 90 days' notice.",
+    "summary": "A services agreement under which Globex provides managed services to Acme for monthly fees."
+}
+
+STUB_RESPONSES = {
+    "score": STUB_SCORE,
+    "risks_opportunities": STUB_RISKS_OPPORTUNITIES,
+    "key_clauses": STUB_KEY_CLAUSES,
+    "clause_query": STUB_CLAUSE_QUERY,
+    "key_terms": STUB_KEY_TERMS,
+    "summary": STUB_SUMMARY,
+    "combined": {
+        "score": STUB_SCORE,
+        "risks": STUB_RISKS_OPPORTUNITIES["risks"],
+        "opportunities": STUB_RISKS_OPPORTUNITIES["opportunities"],
+        "summary": STUB_SUMMARY,
+        "key_clauses": STUB_KEY_CLAUSES["key_clauses"],
+        "key_terms": STUB_KEY_TERMS["key_terms"]
+    },
+    "chat": "According to Section 4 (Term and Termination), either party may terminate the agreement "
+            "on ninety (90) days' written notice to the other party.",
+    "contract_generation": "\n\n".join(
+        [
+            "SERVICES AGREEMENT",
+            "This Agreement is made between the parties named below."
+        ] + [
+            f"{n}. SECTION {n}\n\n{n}.1 The parties agree to the terms of this section. "
+            "Each party shall perform its obligations with reasonable skill and care."
+            for n in range(1, 21)
+        ]
+    )
+}
+
+
+class StubBackend(LLMBackend):
+    """Offline backend returning canned responses after a simulated delay.
+
+    Latency is drawn from a normal distribution around latency_ms with
+    jitter_ms standard deviation. Streaming splits the canned text into
+    small pieces spread over the same total latency.
+    """
+
+    name = "stub"
+
+    def __init__(self, latency_ms=STUB_LATENCY_MS, jitter_ms=STUB_JITTER_MS, seed=STUB_SEED, responses=None,
+                 throttle_rate=STUB_THROTTLE_RATE):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.throttle_rate = throttle_rate
+        self.responses = responses or STUB_RESPONSES
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _delay(self):
+        with self._lock:
+            delay = self._random.gauss(self.latency_ms, self.jitter_ms) if self.jitter_ms else self.latency_ms
+        return max(0.0, delay) / 1000
+
+    def _maybe_throttle(self):
+        with self._lock:
+            throttled = self.throttle_rate and self._random.random() < self.throttle_rate
+        if throttled:
+            raise RateLimitError("429 Resource has been exhausted (stub)")
+
+    def _text(self, task):
+        response = self.responses.get(task, self.responses["chat"])
+        if isinstance(response, str):
+            return response
+        return json.dumps(response, indent=2)
+
+    def generate(self, prompt, task=None):
+        self._maybe_throttle()
+        time.sleep(self._delay())
+        text = self._text(task)
+        return LLMResponse(text, self.count_tokens(prompt), self.count_tokens(text))
+
+    def generate_stream(self, prompt, task=None):
+        self._maybe_throttle()
+        text = self._text(task)
+        pieces = [text[i:i + 40] for i in range(0, len(text), 40)] or [""]
+        # Time to first token is a third of the total latency, the rest is spread over the pieces
+        total = self._delay()
+        time.sleep(total / 3)
+        per_piece = (total * 2 / 3) / len(pieces)
+        for piece in pieces:
+            yield piece
+            time.sleep(per_piece)
+        return LLMResponse(text, self.count_tokens(prompt), self.count_tokens(text))
+
+
+class TrackedBackend(LLMBackend):
+    """Records tokens, latency and status of every call to the wrapped backend"""
+
+    def __init__(self, backend, tracker=None):
+        self.backend = backend
+        self.tracker = tracker or get_usage_tracker()
+        self.name = backend.name
+
+    @staticmethod
+    def _status(error):
+        return "throttled" if is_throttled(error) else "error"
+
+    def generate(self, prompt, task=None):
+        start = time.perf_counter()
+        try:
+            response = self.backend.generate(prompt, task)
+        except Exception as e:
+            self.tracker.record(task, 0, 0, time.perf_counter() - start, self._status(e))
+            raise
+        self.tracker.record(task, response.prompt_tokens, response.output_tokens, time.perf_counter() - start, "ok")
+        return response
+
+    def generate_stream(self, prompt, task=None):
+        start = time.perf_counter()
+        status = "cancelled"
+        response = None
+        try:
+            response = yield from self.backend.generate_stream(prompt, task)
+            status = "ok"
+            return response
+        except Exception as e:
+            status = self._status(e)
+            raise
+        finally:
+            self.tracker.record(
+                task,
+                response.prompt_tokens if response else 0,
+                response.output_tokens if response else 0,
+                time.perf_counter() - start,
+                status
+            )
+
+    def count_tokens(self, prompt):
+        return self.backend.count_tokens(prompt)
+
+
+class RateLimitedBackend(LLMBackend):
+    """Runs another backend's calls through the shared rate limiter"""
+
+    def __init__(self, backend, limiter=None):
+        self.backend = backend
+        self.limiter = limiter or get_rate_limiter()
+        self.name = backend.name
+
+    def generate(self, prompt, task=None):
+        return self.limiter.call(self.backend.generate, prompt, task)
+
+    def generate_stream(self, prompt, task=None):
+        return (yield from self.limiter.stream(self.backend.generate_stream, prompt, task))
+
+    def count_tokens(self, prompt):
+        return self.backend.count_tokens(prompt)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """Process-wide backend selected by LLM_BACKEND"""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            if LLM_BACKEND == "stub":
+                backend = StubBackend()
+            elif LLM_BACKEND == "gemini":
+                backend = GeminiBackend()
+            else:
+                raise ValueError(f"Unknown LLM_BACKEND: {LLM_BACKEND}")
+            _backend = RateLimitedBackend(TrackedBackend(backend))
+            print(f"Using {_backend.name} LLM backend")
+    return _backend
+
+
+def set_backend(backend):
+    """Replace the process-wide backend (used by benchmarks)"""
+    global _backend
+    with _backend_lock:
+        _backend = backend
@@ -0,0 +1,156 @@
+import io
+import os
+import hashlib
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from PyPDF2 import PdfWriter
+
+from extraction_cache import ExtractionCache
+
+# OCR for scanned pages. Only pages whose text layer is (nearly) empty are
+# OCRed, in a process pool of their own, and every result is cached by a hash
+# of the page's content so a document (or the same scan uploaded again) only
+# pays for OCR once. Tesseract is optional: without pytesseract, Pillow and
+# the tesseract binary, scanned pages simply stay empty as before.
+try:
+    import pytesseract
+    from PIL import Image
+except ImportError:
+    pytesseract = None
+    Image = None
+
+# Pages without embedded images are rasterized with pdf2image (poppler) if installed
+try:
+    from pdf2image import convert_from_bytes
+except ImportError:
+    convert_from_bytes = None
+
+OCR_ENABLED = os.getenv("OCR_ENABLED", "true").lower() not in ("0", "false", "no")
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", str(min(2, os.cpu_count() or 1))))
+OCR_LANG = os.getenv("OCR_LANG", "eng")
+OCR_DPI = int(os.getenv("OCR_DPI", "300"))
+# Pages with fewer extracted characters than this are treated as scanned
+OCR_MIN_CHARS = int(os.getenv("OCR_MIN_CHARS", "16"))
+OCR_CACHE_DIR = os.getenv("OCR_CACHE_DIR", os.path.join(".cache", "ocr"))
+
+_executor = None
+_executor_lock = threading.Lock()
+_cache = None
+_available = None
+
+
+def ocr_available():
+    """True if pytesseract, Pillow and the tesseract binary can be used"""
+    global _available
+    if _available is None:
+        if not OCR_ENABLED or pytesseract is None:
+            _available = False
+        else:
+            try:
+                pytesseract.get_tesseract_version()
+                _available = True
+            except Exception as e:
+                print(f"OCR disabled: {str(e)}")
+                _available = False
+    return _available
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=OCR_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+    return _executor
+
+
+def _get_cache():
+    global _cache
+    with _executor_lock:
+        if _cache is None:
+            _cache = ExtractionCache(max_bytes=16 * 1024 * 1024, disk_dir=OCR_CACHE_DIR)
+    return _cache
+
+
+def _page_images(page):
+    """Encoded bytes of the images embedded in a page (a scan is usually one per page)"""
+    try:
+        return [image.data for image in page.images]
+    except Exception:
+        # Unsupported image filters
+        return []
+
+
+def _single_page_pdf(page):
+    writer = PdfWriter()
+    writer.add_page(page)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+def page_digest(images, page):
+    """Content hash of a page: its images, or its content stream if it has none"""
+    digest = hashlib.sha256(f"{OCR_LANG}\0{OCR_DPI}\0".encode("utf-8"))
+    if images:
+        for data in images:
+            digest.update(data)
+    else:
+        contents = page.get_contents()
+        digest.update(contents.get_data() if contents is not None else b"")
+    return digest.hexdigest()
+
+
+def _ocr_page(images, page_pdf, lang, dpi):
+    """OCR one page from its embedded images or a single-page PDF (runs in a worker process)"""
+    if images:
+        pictures = [Image.open(io.BytesIO(data)) for data in images]
+    elif convert_from_bytes is not None:
+        pictures = convert_from_bytes(page_pdf, dpi=dpi)
+    else:
+        return ""
+    return "\n".join(pytesseract.image_to_string(picture, lang=lang).strip() for picture in pictures).strip()
+
+
+def ocr_blank_pages(reader, pages, first_page=0):
+    """Fill in the text of scanned pages in `pages` (page texts starting at first_page).
+
+    Returns the number of pages that were OCRed or served from the cache.
+    """
+    blank = [i for i, text in enumerate(pages) if len(text.strip()) < OCR_MIN_CHARS]
+    if not blank or not ocr_available():
+        return 0
+
+    cache = _get_cache()
+    pending = {}
+    from_cache = 0
+    for i in blank:
+        page = reader.pages[first_page + i]
+        images = _page_images(page)
+        key = page_digest(images, page)
+        cached = cache.get(key)
+        if cached is not None:
+            pages[i] = cached[0] or pages[i]
+            from_cache += 1
+            continue
+        page_pdf = None if images else _single_page_pdf(page)
+        pending[i] = (key, _get_executor().submit(_ocr_page, images, page_pdf, OCR_LANG, OCR_DPI))
+
+    recognized = 0
+    for i, (key, future) in pending.items():
+        try:
+            text = future.result()
+        except Exception as e:
+            print(f"OCR failed on page {first_page + i + 1}: {str(e)}")
+            continue
+        # Blank results are cached too, so empty pages are not OCRed again
+        cache.set(key, text)
+        pages[i] = text or pages[i]
+        recognized += 1
+
+    print(f"OCR: {recognized} pages recognized, {from_cache} from cache")
+    return recognized + from_cache
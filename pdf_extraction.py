@@ -0,0 +1,245 @@
+import io
+import os
+import mmap
+import time
+import bisect
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from PyPDF2 import PdfReader
+
+from ocr_fallback import ocr_blank_pages
+
+# PDF text extraction. PyPDF2 is pure Python and CPU bound, so large
+# documents are split into contiguous page ranges that are extracted in a
+# shared process pool; small documents are extracted in-process. The pool uses
+# the spawn start method because forking a multi-threaded Streamlit server
+# can deadlock the children.
+#
+# Sources are either bytes or the path of a spooled upload. Paths are read
+# through a read-only memory map and are what gets sent to the workers, so
+# the file bytes are never pickled or copied into every process.
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "24"))
+# Progressive extraction: the first PDF_PREVIEW_PAGES pages are extracted
+# before returning, the rest in the background PDF_BATCH_PAGES at a time
+PDF_PREVIEW_PAGES = int(os.getenv("PDF_PREVIEW_PAGES", "5"))
+PDF_BATCH_PAGES = int(os.getenv("PDF_BATCH_PAGES", "48"))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=PDF_EXTRACT_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+    return _executor
+
+
+def _reset_executor():
+    """Drop a broken pool so the next call starts a fresh one"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def open_pdf(source):
+    """PdfReader over bytes or over a memory map of the file at path"""
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            view = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        # The reader keeps the map open; it is unmapped when the reader is collected
+        return PdfReader(view)
+    return PdfReader(io.BytesIO(source))
+
+
+def _extract_range(source, start, end):
+    """Text of pages [start, end) of the PDF in source (runs in a worker process)"""
+    reader = open_pdf(source)
+    return [(reader.pages[i].extract_text() or "") for i in range(start, end)]
+
+
+def _page_ranges(page_count, parts):
+    """Split page_count pages into at most `parts` contiguous, near-equal ranges"""
+    parts = max(1, min(parts, page_count))
+    size, extra = divmod(page_count, parts)
+    ranges = []
+    start = 0
+    for i in range(parts):
+        end = start + size + (1 if i < extra else 0)
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def join_pages(pages):
+    """Join page texts (each followed by a newline) and return (text, page_offsets).
+
+    page_offsets[i] is the character offset where page i starts.
+    """
+    offsets = []
+    position = 0
+    for page in pages:
+        offsets.append(position)
+        position += len(page) + 1
+    return "".join(page + "\n" for page in pages), offsets
+
+
+def page_at(page_offsets, offset):
+    """1-based page number containing the character at offset"""
+    return max(1, bisect.bisect_right(page_offsets, offset))
+
+
+def read_bytes(file):
+    """Bytes of an uploaded file, path or file-like object"""
+    if isinstance(file, (bytes, bytearray)):
+        return bytes(file)
+    if isinstance(file, str):
+        with open(file, "rb") as f:
+            return f.read()
+    if hasattr(file, "getvalue"):
+        return file.getvalue()
+    file.seek(0)
+    return file.read()
+
+
+def _source(file):
+    """A path stays a path (it is memory mapped); anything else is read into bytes"""
+    return file if isinstance(file, str) else read_bytes(file)
+
+
+def extract_pdf_pages(source, workers=None, first_page=0, last_page=None):
+    """Text of each page in [first_page, last_page), extracted in parallel for large ranges.
+
+    source is the PDF's bytes or path. Pages without a text layer (scans) are
+    OCRed when Tesseract is available.
+    """
+    workers = workers or PDF_EXTRACT_WORKERS
+    reader = open_pdf(source)
+    last_page = len(reader.pages) if last_page is None else min(last_page, len(reader.pages))
+    page_count = last_page - first_page
+
+    if workers <= 1 or page_count < PDF_PARALLEL_MIN_PAGES:
+        pages = [(reader.pages[i].extract_text() or "") for i in range(first_page, last_page)]
+    else:
+        ranges = [(first_page + a, first_page + b) for a, b in _page_ranges(page_count, workers)]
+        try:
+            executor = _get_executor()
+            futures = [executor.submit(_extract_range, source, start, end) for start, end in ranges]
+            pages = []
+            for future in futures:
+                pages.extend(future.result())
+        except Exception as e:
+            # BrokenProcessPool, pickling problems or a worker crash: fall back to this process
+            print(f"Parallel PDF extraction failed ({str(e)}), extracting serially")
+            _reset_executor()
+            pages = [(reader.pages[i].extract_text() or "") for i in range(first_page, last_page)]
+
+    ocr_blank_pages(reader, pages, first_page)
+    return pages
+
+
+def extract_pdf(file, workers=None):
+    """Extract a PDF's text; returns (text, page_offsets)"""
+    return join_pages(extract_pdf_pages(_source(file), workers))
+
+
+class ExtractionJob:
+    """Extracts the pages of a PDF after the preview in a background thread.
+
+    Pages are appended batch by batch so callers can show partial text with
+    snapshot() while the job runs. `source` is the PDF's bytes or path and
+    `key` is an opaque label for the caller (e.g. its cache key). `on_done`
+    is called once the job finishes, succeeded or not.
+    """
+
+    def __init__(self, source, page_count, first_pages, key=None, batch_pages=None, on_done=None):
+        self.source = source
+        self.page_count = page_count
+        self.key = key
+        self.batch_pages = batch_pages or PDF_BATCH_PAGES
+        self.on_done = on_done
+        self.error = None
+        self.started_at = time.perf_counter()
+        self.elapsed = None
+        self._pages = list(first_pages)
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self._done = threading.Event()
+
+        if len(self._pages) >= page_count:
+            self._finish()
+        else:
+            threading.Thread(target=self._run, name="pdf-extract", daemon=True).start()
+
+    def _finish(self):
+        self.elapsed = time.perf_counter() - self.started_at
+        # Drop the file bytes as soon as they are no longer needed
+        self.source = None
+        self._done.set()
+        if self.on_done is not None:
+            try:
+                self.on_done()
+            except Exception as e:
+                print(f"Warning: PDF extraction callback failed: {str(e)}")
+
+    def _run(self):
+        try:
+            while not self._cancelled.is_set():
+                start = self.pages_done
+                if start >= self.page_count:
+                    break
+                batch = extract_pdf_pages(self.source, first_page=start, last_page=start + self.batch_pages)
+                with self._lock:
+                    self._pages.extend(batch)
+        except Exception as e:
+            print(f"Background PDF extraction failed: {str(e)}")
+            self.error = e
+        finally:
+            self._finish()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    @property
+    def pages_done(self):
+        with self._lock:
+            return len(self._pages)
+
+    @property
+    def progress(self):
+        return self.pages_done / self.page_count if self.page_count else 1.0
+
+    def snapshot(self):
+        """(text, page_offsets) of the pages extracted so far"""
+        with self._lock:
+            if self._snapshot is None or len(self._snapshot[1]) != len(self._pages):
+                self._snapshot = join_pages(self._pages)
+            return self._snapshot
+
+    def cancel(self):
+        """Stop after the current batch (e.g. when another file is uploaded)"""
+        self._cancelled.set()
+
+
+def start_pdf_extraction(file, preview_pages=None, key=None, on_done=None):
+    """Extract the first pages of a PDF now and the rest in the background.
+
+    Returns an ExtractionJob; for documents no longer than the preview it is
+    already done.
+    """
+    source = _source(file)
+    preview_pages = PDF_PREVIEW_PAGES if preview_pages is None else preview_pages
+    page_count = len(open_pdf(source).pages)
+    first_pages = extract_pdf_pages(source, last_page=max(preview_pages, 1))
+    return ExtractionJob(source, page_count, first_pages, key=key, on_done=on_done)
@@ -0,0 +1,249 @@
+import os
+import json
+import hashlib
+import threading
+
+import fpdf
+
+# TrueType fonts for reports in scripts the core PDF fonts can't show
+# (Devanagari, CJK, Arabic, ...). A font is chosen per report language from
+# PDF_FONT_DIR or the system font directories. When fontTools is installed,
+# the font is first cut down to the Unicode blocks reports have actually
+# used: the subset only grows a block at a time, is written once per block set
+# under PDF_FONT_CACHE_DIR, recorded in an index there so later processes
+# reuse it, and shared by every later report, so FPDF parses and embeds a
+# fraction of a 10-20 MB CJK font each time. Classic fpdf also caches each
+# font's parsed metrics in that directory, which is trimmed to
+# PDF_FONT_CACHE_MAX_MB by deleting the oldest unused files.
+try:
+    from fontTools import subset as font_subset
+    from fontTools.ttLib import TTFont
+except ImportError:
+    font_subset = None
+    TTFont = None
+
+try:
+    from fpdf.py3k import hashpath
+except ImportError:
+    hashpath = None
+
+PDF_FONT_DIR = os.getenv("PDF_FONT_DIR", "fonts")
+PDF_FONT_CACHE_DIR = os.getenv("PDF_FONT_CACHE_DIR", os.path.join(".cache", "fonts"))
+PDF_FONT_CACHE_MAX_BYTES = int(float(os.getenv("PDF_FONT_CACHE_MAX_MB", "200")) * 1024 * 1024)
+SYSTEM_FONT_DIRS = ("/usr/share/fonts", "/usr/local/share/fonts", "/Library/Fonts", "C:\\Windows\\Fonts")
+
+# Regular font files tried for each report language, in order. FPDF reads
+# TrueType outlines only, so .otf/.ttc collections are not listed.
+LANGUAGE_FONTS = {
+    "hi": ("NotoSansDevanagari-Regular.ttf", "Lohit-Devanagari.ttf", "mangal.ttf"),
+    "zh-CN": ("NotoSansSC-Regular.ttf", "DroidSansFallbackFull.ttf", "simhei.ttf"),
+    "ja": ("NotoSansJP-Regular.ttf", "ipaexg.ttf", "DroidSansFallbackFull.ttf"),
+    "ar": ("NotoSansArabic-Regular.ttf", "NotoNaskhArabic-Regular.ttf", "DejaVuSans.ttf"),
+}
+# Everything else: wide Latin, Greek and Cyrillic coverage
+DEFAULT_FONTS = ("NotoSans-Regular.ttf", "DejaVuSans.ttf", "arialuni.ttf")
+
+# Always kept in a subset, so labels, numbers and punctuation never need a rebuild
+BASE_CODEPOINTS = frozenset(range(0x20, 0x7F)) | frozenset(range(0xA0, 0x100)) | frozenset((0x2013, 0x2014, 0x2018, 0x2019, 0x201C, 0x201D, 0x2022, 0x2026))
+
+# Subsets cover whole blocks of this many codepoints, so a new character
+# rarely means a new subset file
+BLOCK_SIZE = 256
+SUBSET_INDEX = "subsets.json"
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def _blocks(codepoints):
+    return frozenset(codepoint // BLOCK_SIZE for codepoint in codepoints)
+
+
+BASE_BLOCKS = _blocks(BASE_CODEPOINTS)
+
+
+def configure_fpdf_cache(directory=PDF_FONT_CACHE_DIR):
+    """Have classic fpdf pickle parsed font metrics under directory"""
+    if getattr(fpdf, "FPDF_VERSION", "1").startswith("1."):
+        # Mode 2: pickled metrics under FPDF_CACHE_DIR (the default writes next to the font file)
+        fpdf.set_global("FPDF_CACHE_MODE", 2)
+        fpdf.set_global("FPDF_CACHE_DIR", directory)
+
+
+def _font_index():
+    """File name (lowercased) -> path of every .ttf in the font directories, built once"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = {}
+            for directory in (PDF_FONT_DIR,) + SYSTEM_FONT_DIRS:
+                for root, _, files in os.walk(directory):
+                    for name in files:
+                        if name.lower().endswith(".ttf"):
+                            _index.setdefault(name.lower(), os.path.join(root, name))
+    return _index
+
+
+def _bold_variant(path):
+    index = _font_index()
+    name = os.path.basename(path)
+    for candidate in (name.replace("-Regular", "-Bold"), name.replace(".ttf", "-Bold.ttf"), name.replace(".ttf", "bd.ttf")):
+        if candidate != name and candidate.lower() in index:
+            return index[candidate.lower()]
+    return None
+
+
+def find_font(language):
+    """(regular, bold) font paths for a report language; bold may be None, both None if nothing is installed"""
+    index = _font_index()
+    for name in LANGUAGE_FONTS.get(language, ()) + DEFAULT_FONTS:
+        path = index.get(name.lower())
+        if path:
+            return path, _bold_variant(path)
+    return None, None
+
+
+class FontSubsetCache:
+    """Per-font subsets that grow block by block to cover every character requested so far"""
+
+    def __init__(self, directory=PDF_FONT_CACHE_DIR, max_bytes=PDF_FONT_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.builds = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._index_path = os.path.join(directory, SUBSET_INDEX)
+        self._fonts = self._load_index()  # font path -> {"blocks", "path", "mtime"}
+        self._trim()
+
+    def _load_index(self):
+        """Subsets recorded by earlier processes whose file and font are unchanged"""
+        try:
+            with open(self._index_path, encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        fonts = {}
+        for font_path, entry in entries.items():
+            try:
+                current = os.path.getmtime(font_path) == entry["mtime"] and os.path.exists(entry["path"])
+            except (OSError, KeyError, TypeError):
+                continue
+            if current:
+                fonts[font_path] = {"blocks": frozenset(entry["blocks"]), "path": entry["path"], "mtime": entry["mtime"]}
+        return fonts
+
+    def _save_index(self):
+        entries = {
+            font_path: {"blocks": sorted(entry["blocks"]), "path": entry["path"], "mtime": entry["mtime"]}
+            for font_path, entry in self._fonts.items()
+        }
+        partial = f"{self._index_path}.{os.getpid()}.tmp"
+        with open(partial, "w", encoding="utf-8") as f:
+            json.dump(entries, f)
+        os.replace(partial, self._index_path)
+
+    def _trim(self):
+        """Delete the oldest subsets and metric pickles not in use until the directory fits max_bytes"""
+        keep = {SUBSET_INDEX}
+        for entry in self._fonts.values():
+            keep.add(os.path.basename(entry["path"]))
+            if hashpath is not None:
+                keep.update((hashpath(entry["path"]) + ".pkl", hashpath(entry["path"]) + ".cw127.pkl"))
+
+        total = 0
+        candidates = []
+        for entry in os.scandir(self.directory):
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            total += stat.st_size
+            if entry.name not in keep:
+                candidates.append((stat.st_mtime, stat.st_size, entry.path))
+
+        for _, size, path in sorted(candidates):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def _build(self, font_path, blocks):
+        """Write a subset of font_path with the font's characters in blocks; returns (path, font mtime)"""
+        mtime = os.path.getmtime(font_path)
+        digest = hashlib.sha256(f"{font_path}\0{mtime}\0".encode("utf-8"))
+        digest.update(",".join(map(str, sorted(blocks))).encode("ascii"))
+        stem = os.path.splitext(os.path.basename(font_path))[0]
+        path = os.path.join(self.directory, f"{stem}-{digest.hexdigest()[:16]}.ttf")
+        if not os.path.exists(path):
+            options = font_subset.Options()
+            options.layout_features = ["*"]  # keep shaping features (Devanagari conjuncts, Arabic joining)
+            options.notdef_outline = True
+            font = TTFont(font_path)
+            codepoints = [codepoint for codepoint in font.getBestCmap() if codepoint // BLOCK_SIZE in blocks]
+            subsetter = font_subset.Subsetter(options)
+            subsetter.populate(unicodes=codepoints)
+            subsetter.subset(font)
+            partial = f"{path}.{os.getpid()}.tmp"
+            font.save(partial)
+            os.replace(partial, path)
+            self.builds += 1
+        return path, mtime
+
+    def get(self, font_path, codepoints):
+        """Path of a font covering codepoints: a cached subset, or the full font without fontTools"""
+        if font_subset is None or font_path is None:
+            return font_path
+        blocks = _blocks(codepoints)
+        with self._lock:
+            entry = self._fonts.get(font_path)
+            if entry is not None and blocks <= entry["blocks"]:
+                self.hits += 1
+                return entry["path"]
+            needed = (entry["blocks"] if entry else frozenset()) | BASE_BLOCKS | blocks
+            try:
+                subset_path, mtime = self._build(font_path, needed)
+            except Exception as e:
+                print(f"Warning: Could not subset {font_path}: {str(e)}")
+                return font_path
+            self._fonts[font_path] = {"blocks": needed, "path": subset_path, "mtime": mtime}
+            try:
+                self._save_index()
+                self._trim()
+            except OSError as e:
+                print(f"Warning: Could not update the font cache: {str(e)}")
+            return subset_path
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "builds": self.builds, "fonts": len(self._fonts)}
+
+
+_subsets = None
+_subsets_lock = threading.Lock()
+
+
+def get_font_subsets():
+    global _subsets
+    with _subsets_lock:
+        if _subsets is None:
+            _subsets = FontSubsetCache()
+            configure_fpdf_cache(_subsets.directory)
+    return _subsets
+
+
+def report_fonts(language, text):
+    """(regular, bold) font paths able to show text in a report of the given language.
+
+    Returns (None, None) when no Unicode font is installed.
+    """
+    regular, bold = find_font(language)
+    if regular is None:
+        return None, None
+    codepoints = frozenset(ord(c) for c in text if not c.isspace())
+    subsets = get_font_subsets()
+    return subsets.get(regular, codepoints), subsets.get(bold, codepoints) if bold else None
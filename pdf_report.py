@@ -0,0 +1,405 @@
+import json
+from datetime import datetime
+
+import fpdf
+from fpdf import FPDF
+
+from pdf_fonts import report_fonts
+
+# PDF rendering for analysis reports and generated contracts. Documents are
+# rendered straight to bytes in memory (no temporary file) so the caller can
+# hand them to st.download_button, which serves them over HTTP instead of
+# embedding a base64 data URI in the page.
+#
+# Works with the classic fpdf 1.7 package, whose output(dest="S") returns a
+# latin-1 str, and with fpdf2, whose output() returns a bytearray.
+#
+# Text the core fonts can show (latin-1, after SANITIZE_TABLE) is set in
+# Arial as before. Anything else (a Hindi, Chinese, Japanese or Arabic
+# export, a Greek party name) switches the whole document to an embedded
+# TrueType font from pdf_fonts, registered as UNICODE_FAMILY.
+LEGACY_FPDF = getattr(fpdf, "FPDF_VERSION", "1").startswith("1.")
+UNICODE_FAMILY = "ReportSans"
+CORE_FAMILIES = ("arial", "helvetica")
+
+# Typographic characters with no latin-1 equivalent. Applied with str.replace
+# per character present: on CPython that is far faster than str.translate,
+# which has no fast path for non-ASCII text.
+SANITIZE_TABLE = tuple({
+    "\u2022": "-",    # bullet
+    "\u2026": "...",  # ellipsis
+    "\u201c": '"',
+    "\u201d": '"',
+    "\u2018": "'",
+    "\u2019": "'",
+    "\u2014": "-",    # em dash
+    "\u2013": "-",    # en dash
+    "\u00a0": " ",
+}.items())
+
+# Fixed text of the PDF report, translated along with the analysis for non-English exports
+REPORT_LABELS = {
+    "title": "Contract Analysis Report",
+    "page": "Page",
+    "generated_on": "Generated on",
+    "company": "Company",
+    "contract_summary": "Contract Summary",
+    "contract_type": "Contract Type",
+    "parties": "Parties Involved",
+    "purpose": "Purpose",
+    "score_analysis": "Contract Score Analysis",
+    "overall_score": "Overall Score",
+    "score_breakdown": "Score Breakdown",
+    "analysis_summary": "Analysis Summary",
+    "risks": "Risks Analysis",
+    "level": "Level",
+    "High": "High",
+    "Medium": "Medium",
+    "Low": "Low",
+    "description": "Description",
+    "impact": "Impact",
+    "mitigation": "Mitigation",
+    "opportunities": "Opportunities Analysis",
+    "value": "Value",
+    "action_items": "Action Items",
+    "key_provisions": "Key Provisions",
+    "important_dates": "Important Dates",
+    "key_clauses": "Key Clauses Analysis",
+    "extract": "Extract",
+    "explanation": "Explanation",
+    "concerns": "Concerns",
+    "disclaimer": "Disclaimer: This analysis is generated by AI and should not replace professional legal advice. "
+                  "Always consult with a qualified legal professional for important legal matters."
+}
+
+
+def level_label(labels, level):
+    """Display text of a High/Medium/Low level; the level itself stays untranslated in the data"""
+    return labels.get(level, level)
+
+
+def sanitize(text):
+    """Replace the characters of SANITIZE_TABLE in text"""
+    if text.isascii():
+        return text
+    for char, replacement in SANITIZE_TABLE:
+        if char in text:
+            text = text.replace(char, replacement)
+    return text
+
+
+def document_fonts(language, text):
+    """(regular, bold) TrueType fonts needed to render text, or (None, None) when the core fonts will do"""
+    try:
+        sanitize(text).encode("latin-1")
+        return None, None
+    except UnicodeEncodeError:
+        pass
+    regular, bold = report_fonts(language, text)
+    if regular is None:
+        print(f"Warning: No Unicode font installed for '{language}', unsupported characters will be replaced")
+    return regular, bold
+
+
+def pdf_bytes(pdf):
+    """Render an FPDF document to bytes in memory"""
+    if LEGACY_FPDF:
+        return pdf.output(dest="S").encode("latin-1")
+    return bytes(pdf.output())
+
+
+class TextPDF(FPDF):
+    """FPDF that embeds the given TrueType fonts for Arial text, or keeps text latin-1 safe"""
+
+    def __init__(self, fonts=(None, None)):
+        super().__init__()
+        regular, bold = fonts
+        self.unicode_font = regular is not None
+        # Faces actually embedded: italic (and bold, without a bold file) is set
+        # in the regular face rather than embedding the same font file twice
+        self.unicode_styles = {"": regular, "B": bold} if bold else {"": regular}
+        if self.unicode_font:
+            for style, path in self.unicode_styles.items():
+                if LEGACY_FPDF:
+                    self.add_font(UNICODE_FAMILY, style, path, uni=True)
+                else:
+                    self.add_font(UNICODE_FAMILY, style, path)
+            if hasattr(self, "set_text_shaping"):
+                try:
+                    # Joins Arabic letters and Devanagari conjuncts (fpdf2 with uharfbuzz)
+                    self.set_text_shaping(True)
+                except Exception:
+                    pass
+
+    def set_font(self, family, style='', size=0):
+        if self.unicode_font and family.lower() in CORE_FAMILIES:
+            family = UNICODE_FAMILY
+            style = "B" if "B" in style.upper() and "B" in self.unicode_styles else ""
+        super().set_font(family, style, size)
+
+    def prepare_text(self, text):
+        if text is None:
+            return ""
+        if self.unicode_font:
+            return text
+        return sanitize(text).encode("latin-1", "replace").decode("latin-1")
+
+    def cell(self, w, h=0, txt='', *args, **kwargs):
+        return super().cell(w, h, self.prepare_text(txt), *args, **kwargs)
+
+    def multi_cell(self, w, h, txt='', *args, **kwargs):
+        return super().multi_cell(w, h, self.prepare_text(txt), *args, **kwargs)
+
+
+class ReportPDF(TextPDF):
+    """Report page layout: title header and page-numbered footer"""
+
+    def __init__(self, labels, fonts=(None, None)):
+        super().__init__(fonts)
+        self.labels = labels
+
+    def header(self):
+        # Logo (add this later)
+        # self.image('logo.png', 10, 8, 33)
+        # Arial bold 15
+        self.set_font('Arial', 'B', 15)
+        # Title
+        self.cell(0, 10, self.labels['title'], 0, 1, 'C')
+        # Line break
+        self.ln(5)
+
+    def footer(self):
+        # Position at 1.5 cm from bottom
+        self.set_y(-15)
+        # Arial italic 8
+        self.set_font('Arial', 'I', 8)
+        # Page number
+        self.cell(0, 10, f"{self.labels['page']} {self.page_no()}/{{nb}}", 0, 0, 'C')
+
+    def add_figure_row(self, figures, max_height=110):
+        """Place images side by side across the page width.
+
+        figures is a list of (path, width px, height px); the row is scaled
+        down to max_height mm and starts a new page if it doesn't fit.
+        """
+        if not figures:
+            return
+        page_width = self.w - self.l_margin - self.r_margin
+        gap = 5
+        # Scale every image to a common height that fills the row
+        total_ratio = sum(width / height for _, width, height in figures)
+        row_height = min(max_height, (page_width - gap * (len(figures) - 1)) / total_ratio)
+        if self.get_y() + row_height > self.page_break_trigger:
+            self.add_page()
+        x = self.l_margin
+        y = self.get_y()
+        for path, width, height in figures:
+            image_width = row_height * width / height
+            self.image(path, x, y, image_width, row_height)
+            x += image_width + gap
+        self.set_y(y + row_height + 3)
+
+
+def build_report(analysis_data, risks_opportunities, clause_analysis, summary_data, company_name=None, labels=None,
+                 language=None, figures=None):
+    """Lay out the analysis report; returns the FPDF document.
+
+    `labels` overrides entries of REPORT_LABELS, e.g. with their translations;
+    `language` (a LANGUAGES code) picks the embedded font for non-Latin text;
+    `figures` are rendered charts from report_charts.report_figures.
+    """
+    label = dict(REPORT_LABELS, **(labels or {}))
+    figures = figures or {}
+    text = json.dumps([analysis_data, risks_opportunities, clause_analysis, summary_data, label, company_name],
+                      ensure_ascii=False, default=str)
+
+    # Create the PDF object
+    pdf = ReportPDF(label, document_fonts(language, text))
+    pdf.alias_nb_pages()
+    pdf.add_page()
+
+    # Add date and company
+    pdf.set_font("Arial", "", 10)
+    pdf.cell(190, 6, f"{label['generated_on']}: {datetime.now().strftime('%Y-%m-%d %H:%M')}", ln=True, align="R")
+
+    # Add company name if available
+    if company_name:
+        pdf.cell(190, 6, f"{label['company']}: {company_name}", ln=True, align="L")
+
+    # Add divider
+    pdf.line(10, pdf.get_y(), 200, pdf.get_y())
+    pdf.ln(5)
+
+    # Add summary section
+    pdf.set_font("Arial", "B", 14)
+    pdf.cell(190, 10, label['contract_summary'], ln=True)
+    pdf.set_font("Arial", "", 10)
+
+    # Add summary details
+    pdf.set_font("Arial", "B", 11)
+    pdf.cell(190, 7, f"{label['contract_type']}: {summary_data.get('contract_type', 'N/A')}", ln=True)
+    pdf.cell(190, 7, f"{label['parties']}:", ln=True)
+    pdf.set_font("Arial", "", 10)
+    for party in summary_data.get('parties', ['Unknown']):
+        pdf.cell(190, 6, f"- {party}", ln=True)
+
+    pdf.set_font("Arial", "B", 11)    
+    pdf.cell(190, 7, f"{label['purpose']}:", ln=True)
+    pdf.set_font("Arial", "", 10)
+    pdf.multi_cell(190, 6, summary_data.get('purpose', 'Unknown'))
+
+    pdf.ln(5)
+
+    # Add scores section
+    pdf.set_font("Arial", "B", 14)
+    pdf.cell(190, 10, label['score_analysis'], ln=True)
+
+    # Add overall score
+    pdf.set_font("Arial", "B", 12)
+    overall_score = analysis_data.get('overall_score', 0)
+    pdf.cell(190, 8, f"{label['overall_score']}: {overall_score}/100", ln=True)
+
+    # Add score charts
+    pdf.add_figure_row([figures[name] for name in ("gauge", "score_breakdown") if name in figures])
+
+    # Add score breakdown
+    pdf.set_font("Arial", "B", 11)
+    pdf.cell(190, 7, f"{label['score_breakdown']}:", ln=True)
+    pdf.set_font("Arial", "", 10)
+
+    score_breakdown = analysis_data.get('score_breakdown', {})
+    for category, score in score_breakdown.items():
+        pdf.cell(190, 6, f"- {category.replace('_', ' ').title()}: {score}/100", ln=True)
+
+    # Add score explanation
+    pdf.set_font("Arial", "B", 11)
+    pdf.cell(190, 7, f"{label['analysis_summary']}:", ln=True)
+    pdf.set_font("Arial", "", 10)
+    pdf.multi_cell(190, 6, analysis_data.get('summary', 'No analysis available.'))
+
+    pdf.ln(5)
+
+    # Add risks section
+    pdf.set_font("Arial", "B", 14)
+    pdf.cell(190, 10, label['risks'], ln=True)
+
+    # Add risks and opportunities chart
+    if "risks_opportunities" in figures:
+        pdf.add_figure_row([figures["risks_opportunities"]])
+
+    # Add risks
+    pdf.set_font("Arial", "", 10)
+    for risk_name, risk_info in risks_opportunities.get('risks', {}).items():
+        pdf.set_font("Arial", "B", 11)
+        pdf.cell(190, 7, f"{risk_name.replace('_', ' ').title()} ({label['level']}: {level_label(label, risk_info.get('level', 'Medium'))})", ln=True)
+        pdf.set_font("Arial", "", 10)
+        pdf.multi_cell(190, 6, f"{label['description']}: {risk_info.get('description', 'N/A')}")
+        pdf.multi_cell(190, 6, f"{label['impact']}: {risk_info.get('potential_impact', 'N/A')}")
+        pdf.multi_cell(190, 6, f"{label['mitigation']}: {risk_info.get('mitigation_suggestions', 'N/A')}")
+        pdf.ln(3)
+
+    pdf.ln(5)
+
+    # Add new page for opportunities
+    pdf.add_page()
+
+    # Add opportunities section
+    pdf.set_font("Arial", "B", 14)
+    pdf.cell(190, 10, label['opportunities'], ln=True)
+
+    # Add opportunities
+    pdf.set_font("Arial", "", 10)
+    for opp_name, opp_info in risks_opportunities.get('opportunities', {}).items():
+        pdf.set_font("Arial", "B", 11)
+        pdf.cell(190, 7, f"{opp_name.replace('_', ' ').title()} ({label['level']}: {level_label(label, opp_info.get('level', 'Medium'))})", ln=True)
+        pdf.set_font("Arial", "", 10)
+        pdf.multi_cell(190, 6, f"{label['description']}: {opp_info.get('description', 'N/A')}")
+        pdf.multi_cell(190, 6, f"{label['value']}: {opp_info.get('potential_value', 'N/A')}")
+        pdf.multi_cell(190, 6, f"{label['action_items']}: {opp_info.get('action_items', 'N/A')}")
+        pdf.ln(3)
+
+    pdf.ln(5)
+
+    # Add key provisions section
+    pdf.set_font("Arial", "B", 14)
+    pdf.cell(190, 10, label['key_provisions'], ln=True)
+
+    # Add provisions
+    pdf.set_font("Arial", "", 10)
+    for provision in summary_data.get('key_provisions', ['No key provisions identified.']):
+        pdf.multi_cell(190, 6, f"- {provision}")
+
+    pdf.ln(5)
+
+    # Add important dates if available
+    if summary_data.get('important_dates'):
+        pdf.set_font("Arial", "B", 14)
+        pdf.cell(190, 10, label['important_dates'], ln=True)
+        pdf.set_font("Arial", "", 10)
+        for date_item in summary_data.get('important_dates', []):
+            pdf.multi_cell(190, 6, f"- {date_item.get('event', 'Event')}: {date_item.get('date', 'N/A')}")
+        pdf.ln(5)
+
+    # Add key clauses section
+    pdf.add_page()
+    pdf.set_font("Arial", "B", 14)
+    pdf.cell(190, 10, label['key_clauses'], ln=True)
+
+    # Add clauses
+    if 'key_clauses' in clause_analysis:
+        for clause in clause_analysis.get('key_clauses', []):
+            pdf.set_font("Arial", "B", 11)
+            clause_title = clause.get('clause_type', 'Clause')
+            if clause.get('clause_ref'):
+                clause_title = f"{clause_title} ({clause['clause_ref']})"
+            pdf.cell(190, 7, clause_title, ln=True)
+
+            pdf.set_font("Arial", "I", 10)
+            pdf.multi_cell(190, 6, f"{label['extract']}: {clause.get('clause_extract', 'N/A')}")
+
+            pdf.set_font("Arial", "", 10)
+            pdf.multi_cell(190, 6, f"{label['explanation']}: {clause.get('explanation', 'N/A')}")
+
+            if clause.get('concerns'):
+                pdf.set_font("Arial", "B", 10)
+                pdf.cell(190, 6, f"{label['concerns']}:", ln=True)
+                pdf.set_font("Arial", "", 10)
+                pdf.multi_cell(190, 6, clause.get('concerns', 'None'))
+
+            pdf.ln(5)
+
+    # Add disclaimer footer
+    pdf.set_y(-25)
+    pdf.set_font("Arial", "I", 8)
+    pdf.multi_cell(190, 4, label['disclaimer'])
+
+    return pdf
+
+
+def render_report(analysis_data, risks_opportunities, clause_analysis, summary_data, company_name=None, labels=None,
+                  language=None, figures=None):
+    """PDF bytes of the analysis report"""
+    return pdf_bytes(build_report(analysis_data, risks_opportunities, clause_analysis, summary_data, company_name, labels,
+                                  language, figures))
+
+
+def render_contract(title, text, language=None):
+    """PDF bytes of a generated contract: all-caps lines are section headers"""
+    pdf = TextPDF(document_fonts(language, f"{title}\n{text}"))
+    pdf.add_page()
+    pdf.set_font("Arial", "B", 12)
+    pdf.cell(190, 10, title, ln=True, align="C")
+    pdf.ln(5)
+
+    pdf.set_font("Arial", "", 10)
+    for line in text.split("\n"):
+        if not line.strip():
+            continue
+        if line.strip().isupper():
+            pdf.set_font("Arial", "B", 10)
+            pdf.ln(2)
+            pdf.cell(190, 6, line, ln=True)
+            pdf.set_font("Arial", "", 10)
+        else:
+            pdf.multi_cell(190, 5, line)
+    return pdf_bytes(pdf)
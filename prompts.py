@@ -0,0 +1,269 @@
+"""Prompt templates for the contract analysis functions in app.py.
+
+Templates are filled in with str.format, so literal braces in the JSON
+examples are doubled. Changing a template changes its version hash, which
+invalidates cached results produced with the old wording.
+"""
+import hashlib
+
+# Overall and per-category contract score (analyze_contract_score)
+CONTRACT_SCORE_PROMPT = """
+    Analyze this legal contract deeply and provide a scoring analysis with the following:
+
+    1. Calculate an overall contract score (0-100) based on clarity, completeness, fairness, and risk level
+    2. Score the following categories individually (0-100):
+       - Clarity and Language
+       - Comprehensiveness
+       - Risk Protection
+       - Balanced Rights
+       - Compliance
+    3. Provide a brief explanation of the scoring (2-3 paragraphs)
+
+    Return ONLY a JSON object with this exact format:
+    {{
+        "overall_score": <integer 0-100>,
+        "score_breakdown": {{
+            "clarity_and_language": <integer 0-100>,
+            "comprehensiveness": <integer 0-100>,
+            "risk_protection": <integer 0-100>,
+            "balanced_rights": <integer 0-100>,
+            "compliance": <integer 0-100>
+        }},
+        "summary": "<2-3 paragraph explanation>"
+    }}
+
+    Contract text: {text}
+    """
+
+# Risks and opportunities (analyze_risks_and_opportunities)
+RISKS_OPPORTUNITIES_PROMPT = """
+    Perform a comprehensive analysis of risks and opportunities in this legal contract.
+
+    Return ONLY a JSON object with this structure:
+    {{
+        "risks": {{
+            "risk_type_1": {{
+                "level": "<High/Medium/Low>",
+                "description": "<brief description>",
+                "potential_impact": "<impact description>",
+                "mitigation_suggestions": "<suggestions>"
+            }},
+            ... (up to 5 most important risks)
+        }},
+        "opportunities": {{
+            "opportunity_type_1": {{
+                "level": "<High/Medium/Low>",
+                "description": "<brief description>",
+                "potential_value": "<value description>",
+                "action_items": "<action items>"
+            }},
+            ... (up to 5 most important opportunities)
+        }}
+    }}
+
+    Contract text: {text}
+    """
+
+# A single clause or topic the user searched for (analyze_contract_clauses)
+CLAUSE_QUERY_PROMPT = """
+    Analyze the following specific aspect of the legal contract: "{clause_query}"
+
+    Provide a detailed explanation of this clause/aspect, including:
+    1. Where it appears in the contract
+    2. What exactly it means in plain language
+    3. Potential implications or concerns
+    4. How it compares to standard industry practice
+    5. Recommendations for improvements if applicable
+
+    Return ONLY a JSON object with this structure:
+    {{
+        "found": true/false,
+        "clause_text": "<exact text from contract if found>",
+        "explanation": "<plain language explanation>",
+        "implications": "<potential implications>",
+        "standard_practice": "<how it compares to standard practice>",
+        "recommendations": "<recommendations for improvements>"
+    }}
+
+    Contract text: {text}
+    """
+
+# The 5-7 most important clauses (analyze_contract_clauses)
+KEY_CLAUSES_PROMPT = """
+    Provide a comprehensive analysis of the key clauses in this contract. Identify the 5-7 most important clauses and explain them.
+
+    For each important clause, provide:
+    1. Clause name/type
+    2. Brief extract/summary of the clause content (literal text from the contract)
+    3. Plain language explanation of what this clause means
+    4. Any potential issues or concerns
+
+    Return ONLY a JSON object with this structure:
+    {{
+        "key_clauses": [
+            {{
+                "clause_type": "<type of clause>",
+                "clause_extract": "<brief extract or summary>",
+                "explanation": "<plain language explanation>",
+                "concerns": "<potential issues or concerns>"
+            }},
+            ... (for up to 7 most important clauses)
+        ]
+    }}
+
+    Contract text: {text}
+    """
+
+# Key terms and definitions (extract_key_terms)
+KEY_TERMS_PROMPT = """
+    Extract the key terms and definitions from this legal contract.
+
+    For each key term, provide:
+    1. The term itself
+    2. Its definition as provided in the contract
+    3. A plain language explanation
+    4. Potential importance or implications
+
+    Return ONLY a JSON object with this structure:
+    {{
+        "key_terms": [
+            {{
+                "term": "<term name>",
+                "definition": "<definition from contract>",
+                "explanation": "<plain language explanation>",
+                "importance": "<why this term matters>"
+            }},
+            ... (for up to 15 most important terms)
+        ]
+    }}
+
+    Contract text: {text}
+    """
+
+# Contract summary (generate_summary)
+SUMMARY_PROMPT = """
+    Create a concise yet comprehensive summary of this legal contract.
+
+    Include:
+    1. Contract type and parties involved
+    2. Main purpose and scope
+    3. Key rights and obligations
+    4. Important dates or deadlines
+    5. Notable or unusual provisions
+
+    Return ONLY a JSON object with this structure:
+    {{
+        "contract_type": "<type of contract>",
+        "parties": ["<party 1>", "<party 2>", ...],
+        "purpose": "<main purpose of the contract>",
+        "key_provisions": [
+            "<provision 1>",
+            "<provision 2>",
+            ... (up to 5 key provisions)
+        ],
+        "important_dates": [
+            {{
+                "event": "<event description>",
+                "date": "<date or deadline>"
+            }},
+            ... (if applicable)
+        ],
+        "notable_aspects": "<any unusual or noteworthy aspects>",
+        "summary": "<4-5 sentence summary of the entire contract>"
+    }}
+
+    Contract text: {text}
+    """
+
+# Everything above in a single request, so the contract is only sent once
+COMBINED_ANALYSIS_PROMPT = """
+    Analyze this legal contract and return score, risks and opportunities, summary, key clauses and key terms in a single response.
+
+    1. Score the contract overall (0-100) and in each category (0-100): clarity and language, comprehensiveness, risk protection, balanced rights, compliance. Explain the scoring in 2-3 paragraphs.
+    2. Identify up to 5 of the most important risks and up to 5 of the most important opportunities.
+    3. Summarize the contract: type, parties, purpose, up to 5 key provisions, important dates and notable aspects.
+    4. Identify the 5-7 most important clauses with a literal extract, a plain language explanation and any concerns.
+    5. Extract up to 15 key terms with their definition from the contract, a plain language explanation and why they matter.
+
+    Return ONLY a JSON object with this structure:
+    {{
+        "score": {{
+            "overall_score": <integer 0-100>,
+            "score_breakdown": {{
+                "clarity_and_language": <integer 0-100>,
+                "comprehensiveness": <integer 0-100>,
+                "risk_protection": <integer 0-100>,
+                "balanced_rights": <integer 0-100>,
+                "compliance": <integer 0-100>
+            }},
+            "summary": "<2-3 paragraph explanation>"
+        }},
+        "risks": {{
+            "risk_type_1": {{
+                "level": "<High/Medium/Low>",
+                "description": "<brief description>",
+                "potential_impact": "<impact description>",
+                "mitigation_suggestions": "<suggestions>"
+            }}
+        }},
+        "opportunities": {{
+            "opportunity_type_1": {{
+                "level": "<High/Medium/Low>",
+                "description": "<brief description>",
+                "potential_value": "<value description>",
+                "action_items": "<action items>"
+            }}
+        }},
+        "summary": {{
+            "contract_type": "<type of contract>",
+            "parties": ["<party 1>", "<party 2>"],
+            "purpose": "<main purpose of the contract>",
+            "key_provisions": ["<provision 1>", "<provision 2>"],
+            "important_dates": [
+                {{
+                    "event": "<event description>",
+                    "date": "<date or deadline>"
+                }}
+            ],
+            "notable_aspects": "<any unusual or noteworthy aspects>",
+            "summary": "<4-5 sentence summary of the entire contract>"
+        }},
+        "key_clauses": [
+            {{
+                "clause_type": "<type of clause>",
+                "clause_extract": "<brief extract or summary>",
+                "explanation": "<plain language explanation>",
+                "concerns": "<potential issues or concerns>"
+            }}
+        ],
+        "key_terms": [
+            {{
+                "term": "<term name>",
+                "definition": "<definition from contract>",
+                "explanation": "<plain language explanation>",
+                "importance": "<why this term matters>"
+            }}
+        ]
+    }}
+
+    Contract text: {text}
+    """
+
+
+def prompt_version(*templates):
+    """Short, stable version id for one or more prompt templates"""
+    digest = hashlib.sha256()
+    for template in templates:
+        digest.update(template.encode('utf-8'))
+    return digest.hexdigest()[:12]
+
+
+# Prompt version per cached analysis function
+PROMPT_VERSIONS = {
+    'analyze_contract_score': prompt_version(CONTRACT_SCORE_PROMPT),
+    'analyze_risks_and_opportunities': prompt_version(RISKS_OPPORTUNITIES_PROMPT),
+    'analyze_contract_clauses': prompt_version(CLAUSE_QUERY_PROMPT, KEY_CLAUSES_PROMPT),
+    'extract_key_terms': prompt_version(KEY_TERMS_PROMPT),
+    'generate_summary': prompt_version(SUMMARY_PROMPT),
+    'analyze_contract_combined': prompt_version(COMBINED_ANALYSIS_PROMPT)
+}
@@ -0,0 +1,271 @@
+import os
+import time
+import random
+import threading
+from collections import deque
+
+# Process-wide limiter for LLM requests. All Streamlit sessions in one server
+# share one API key, so every call goes through a single token bucket
+# (requests per minute) and a concurrency cap. The cap adapts AIMD-style:
+# it grows by one slot per window of fast successful calls and halves when
+# the API answers 429 or latency goes above the target.
+RATE_LIMIT_ENABLED = os.getenv("LLM_RATE_LIMIT_ENABLED", "true").lower() not in ("0", "false", "no")
+RATE_LIMIT_RPM = float(os.getenv("LLM_RATE_LIMIT_RPM", "60"))
+RATE_LIMIT_BURST = int(os.getenv("LLM_RATE_LIMIT_BURST", "10"))
+MIN_CONCURRENCY = int(os.getenv("LLM_MIN_CONCURRENCY", "1"))
+MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+INITIAL_CONCURRENCY = int(os.getenv("LLM_INITIAL_CONCURRENCY", "4"))
+LATENCY_TARGET_SECONDS = float(os.getenv("LLM_LATENCY_TARGET_SECONDS", "30"))
+MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+BACKOFF_BASE_SECONDS = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", "1"))
+BACKOFF_MAX_SECONDS = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "30"))
+# Give up instead of queueing forever when the process is saturated
+MAX_QUEUE_WAIT_SECONDS = float(os.getenv("LLM_MAX_QUEUE_WAIT_SECONDS", "120"))
+
+# Exception class names used by google.api_core for retryable HTTP statuses
+THROTTLED_ERRORS = ("ResourceExhausted", "TooManyRequests")
+TRANSIENT_ERRORS = ("ServiceUnavailable", "InternalServerError", "DeadlineExceeded", "GatewayTimeout")
+
+
+class RateLimitError(Exception):
+    """The API answered 429 (raised by the stub backend to simulate throttling)"""
+
+    code = 429
+
+
+class RateLimitExceeded(Exception):
+    """A request could not be completed within the rate limit after retrying"""
+
+
+def is_throttled(error):
+    """True for 429 / RESOURCE_EXHAUSTED errors from the API, judged by type and status code"""
+    if type(error).__name__ in THROTTLED_ERRORS or getattr(error, "code", None) == 429:
+        return True
+    status = getattr(error, "grpc_status_code", None)
+    return getattr(status, "name", None) == "RESOURCE_EXHAUSTED"
+
+
+def is_rate_limited(error):
+    """True if a request failed because of throttling, here or at the API"""
+    return isinstance(error, RateLimitExceeded) or is_throttled(error)
+
+
+def is_transient(error):
+    """True for errors worth retrying: throttling and temporary server failures"""
+    return is_throttled(error) or type(error).__name__ in TRANSIENT_ERRORS or getattr(error, "code", None) in (500, 503, 504)
+
+
+class TokenBucket:
+    """Classic token bucket refilled at `rate` tokens per second up to `capacity`"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Take one token and return how long the caller must wait before using it"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+
+class RateLimiter:
+    """Token bucket plus an adaptive concurrency cap shared by all sessions"""
+
+    def __init__(self, rpm=RATE_LIMIT_RPM, burst=RATE_LIMIT_BURST, min_concurrency=MIN_CONCURRENCY,
+                 max_concurrency=MAX_CONCURRENCY, initial_concurrency=INITIAL_CONCURRENCY,
+                 latency_target=LATENCY_TARGET_SECONDS, max_retries=MAX_RETRIES,
+                 max_queue_wait=MAX_QUEUE_WAIT_SECONDS):
+        self.bucket = TokenBucket(rpm / 60.0, burst) if rpm > 0 else None
+        self.min_concurrency = max(1, min_concurrency)
+        self.max_concurrency = max(self.min_concurrency, max_concurrency)
+        self.limit = float(min(max(initial_concurrency, self.min_concurrency), self.max_concurrency))
+        self.latency_target = latency_target
+        self.max_retries = max_retries
+        self.max_queue_wait = max_queue_wait
+
+        self.in_flight = 0
+        self.waiting = 0
+        self.requests = 0
+        self.throttled = 0
+        self.retries = 0
+        self.failures = 0
+        self.wait_times = deque(maxlen=1000)
+        self.latencies = deque(maxlen=1000)
+        self._successes_since_increase = 0
+        self._condition = threading.Condition()
+
+    def _acquire(self):
+        """Wait for a concurrency slot and a bucket token; return the time spent waiting"""
+        start = time.monotonic()
+        with self._condition:
+            self.waiting += 1
+            try:
+                while self.in_flight >= int(self.limit):
+                    remaining = self.max_queue_wait - (time.monotonic() - start)
+                    if remaining <= 0:
+                        raise RateLimitExceeded(
+                            f"No LLM capacity after waiting {self.max_queue_wait:.0f}s "
+                            f"({self.in_flight} requests in flight, {self.waiting} queued)"
+                        )
+                    self._condition.wait(remaining)
+                self.in_flight += 1
+                self.requests += 1
+            finally:
+                self.waiting -= 1
+
+        if self.bucket is not None:
+            delay = self.bucket.reserve()
+            if delay:
+                time.sleep(delay)
+
+        waited = time.monotonic() - start
+        with self._condition:
+            self.wait_times.append(waited)
+        return waited
+
+    def _release(self, latency=None, throttled=False):
+        with self._condition:
+            self.in_flight -= 1
+            if throttled:
+                # Multiplicative decrease
+                self.throttled += 1
+                self.limit = max(self.min_concurrency, self.limit / 2)
+                self._successes_since_increase = 0
+            elif latency is not None:
+                self.latencies.append(latency)
+                if latency > self.latency_target:
+                    self.limit = max(self.min_concurrency, self.limit * 0.9)
+                    self._successes_since_increase = 0
+                else:
+                    # Additive increase: one more slot per `limit` fast successes
+                    self._successes_since_increase += 1
+                    if self._successes_since_increase >= int(self.limit):
+                        self.limit = min(self.max_concurrency, self.limit + 1)
+                        self._successes_since_increase = 0
+            self._condition.notify_all()
+
+    @staticmethod
+    def backoff(attempt):
+        """Full-jitter exponential backoff for the given retry attempt (0-based)"""
+        return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** attempt)))
+
+    def call(self, func, *args, **kwargs):
+        """Run func under the limiter, retrying 429s and transient server errors"""
+        for attempt in range(self.max_retries + 1):
+            self._acquire()
+            start = time.monotonic()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                throttled = is_throttled(e)
+                self._release(throttled=throttled)
+                if not is_transient(e):
+                    raise
+                if attempt == self.max_retries:
+                    self.failures += 1
+                    raise RateLimitExceeded(
+                        f"LLM request failed after {self.max_retries} retries: {str(e)}"
+                    ) from e
+                self.retries += 1
+                delay = self.backoff(attempt)
+                print(f"LLM request {'throttled' if throttled else 'failed'} ({type(e).__name__}), "
+                      f"retrying in {delay:.1f}s (concurrency limit now {int(self.limit)})")
+                time.sleep(delay)
+                continue
+            self._release(latency=time.monotonic() - start)
+            return result
+
+    def stream(self, func, *args, **kwargs):
+        """Iterate func's generator under the limiter and return its return value.
+
+        The slot is held until the stream is exhausted. Failures before the
+        first piece are retried like call(); once text has been yielded the
+        error is raised to the caller.
+        """
+        for attempt in range(self.max_retries + 1):
+            self._acquire()
+            start = time.monotonic()
+            started = False
+            try:
+                stream = func(*args, **kwargs)
+                while True:
+                    try:
+                        piece = next(stream)
+                    except StopIteration as done:
+                        # The generator's return value (e.g. an LLMResponse) goes to the caller
+                        response = done.value
+                        break
+                    started = True
+                    yield piece
+            except Exception as e:
+                throttled = is_throttled(e)
+                self._release(throttled=throttled)
+                if started or not is_transient(e):
+                    raise
+                if attempt == self.max_retries:
+                    self.failures += 1
+                    raise RateLimitExceeded(
+                        f"LLM request failed after {self.max_retries} retries: {str(e)}"
+                    ) from e
+                self.retries += 1
+                time.sleep(self.backoff(attempt))
+                continue
+            except GeneratorExit:
+                # The consumer stopped reading; give the slot back
+                self._release()
+                raise
+            self._release(latency=time.monotonic() - start)
+            return response
+
+    def stats(self):
+        """Queue depth, concurrency and wait time figures for capacity planning"""
+        with self._condition:
+            waits = sorted(self.wait_times)
+            latencies = sorted(self.latencies)
+            return {
+                "concurrency_limit": int(self.limit),
+                "in_flight": self.in_flight,
+                "queue_depth": self.waiting,
+                "requests": self.requests,
+                "throttled": self.throttled,
+                "retries": self.retries,
+                "failures": self.failures,
+                "wait_avg_s": round(sum(waits) / len(waits), 3) if waits else 0.0,
+                "wait_p95_s": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 3) if waits else 0.0,
+                "latency_p50_s": round(latencies[len(latencies) // 2], 3) if latencies else 0.0
+            }
+
+
+class _NoLimit:
+    """Stand-in used when LLM_RATE_LIMIT_ENABLED is off"""
+
+    def call(self, func, *args, **kwargs):
+        return func(*args, **kwargs)
+
+    def stream(self, func, *args, **kwargs):
+        return (yield from func(*args, **kwargs))
+
+    def stats(self):
+        return {}
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """Process-wide limiter shared by all Streamlit sessions"""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter() if RATE_LIMIT_ENABLED else _NoLimit()
+    return _limiter
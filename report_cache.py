@@ -0,0 +1,124 @@
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Rendered PDF reports, keyed by a digest of everything the report is built
+# from (the analysis sections, the language and the company name), in a
+# size-bounded LRU shared by all sessions. Reports can be prerendered in a
+# small background pool as soon as an analysis finishes, so pressing
+# "Generate PDF Report" only has to pick up the bytes; a request for a report
+# that is still rendering waits for that render instead of starting another.
+REPORT_CACHE_MAX_BYTES = int(float(os.getenv("REPORT_CACHE_MAX_MB", "64")) * 1024 * 1024)
+REPORT_PRERENDER = os.getenv("REPORT_PRERENDER", "true").lower() not in ("0", "false", "no")
+REPORT_PRERENDER_WORKERS = int(os.getenv("REPORT_PRERENDER_WORKERS", "2"))
+
+
+def report_key(sections, language, company_name):
+    """Digest of a report's inputs; sections is a dict of name -> JSON-serializable structure"""
+    payload = json.dumps(
+        {"sections": sections, "language": language, "company": company_name or ""},
+        sort_keys=True, ensure_ascii=False, default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ReportCache:
+    """LRU of rendered report bytes bounded by total size, with in-flight render tracking"""
+
+    def __init__(self, max_bytes=REPORT_CACHE_MAX_BYTES, workers=REPORT_PRERENDER_WORKERS):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.prerendered = 0
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report")
+
+    def _store(self, key, data):
+        # Caller holds the lock
+        if key in self._entries:
+            self.size -= len(self._entries.pop(key))
+        if len(data) > self.max_bytes:
+            return
+        self._entries[key] = data
+        self.size += len(data)
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+
+    def get(self, key, timeout=None):
+        """Rendered bytes for key, waiting for a render in progress; None on a miss"""
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return data
+            future = self._pending.get(key)
+        if future is not None:
+            try:
+                data = future.result(timeout)
+            except Exception:
+                data = None
+            if data is not None:
+                with self._lock:
+                    self.hits += 1
+                return data
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, data):
+        with self._lock:
+            self._store(key, data)
+
+    def _render(self, key, render, args):
+        try:
+            data = render(*args)
+            if data:
+                with self._lock:
+                    self._store(key, data)
+                    self.prerendered += 1
+            return data
+        except Exception as e:
+            print(f"Report prerender failed: {str(e)}")
+            return None
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def prerender(self, key, render, *args):
+        """Render a report in the background unless it is cached or already rendering"""
+        with self._lock:
+            if key in self._entries or key in self._pending:
+                return
+            self._pending[key] = self._executor.submit(self._render, key, render, args)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "prerendered": self.prerendered,
+                "entries": len(self._entries),
+                "pending": len(self._pending),
+                "size_bytes": self.size
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_report_cache():
+    """Process-wide report cache shared by all Streamlit sessions"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ReportCache()
+    return _cache
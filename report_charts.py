@@ -0,0 +1,280 @@
+import os
+import time
+import hashlib
+import threading
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io as pio
+
+# Charts of the analysis tab, shared by the app (interactive st.plotly_chart)
+# and the PDF report (static PNG). Static images are rendered offline with
+# kaleido and cached on disk under a digest of the figure's JSON spec plus the
+# image size, so re-exporting a report (another language, another company
+# name, a batch export in a worker process, or after a restart) embeds the
+# cached PNG instead of starting a headless browser again. Kaleido is
+# optional: without it (or without the browser it drives) reports are
+# rendered without charts as before.
+try:
+    import kaleido
+except ImportError:
+    kaleido = None
+
+REPORT_CHARTS = os.getenv("REPORT_CHARTS", "true").lower() not in ("0", "false", "no")
+CHART_CACHE_DIR = os.getenv("CHART_CACHE_DIR", os.path.join(".cache", "charts"))
+CHART_CACHE_TTL_DAYS = float(os.getenv("CHART_CACHE_TTL_DAYS", "30"))
+# Pixel density of rendered charts; 2 keeps them sharp when printed
+CHART_SCALE = float(os.getenv("CHART_SCALE", "2"))
+
+# Image sizes (CSS pixels before scaling) of the report charts
+GAUGE_SIZE = (400, 300)
+BREAKDOWN_SIZE = (600, 300)
+RISK_CHART_WIDTH = 800
+
+LEVEL_MAPPING = {"High": 3, "Medium": 2, "Low": 1}
+
+
+def score_gauge(overall_score):
+    """Gauge chart of the overall contract score"""
+    fig = go.Figure(go.Indicator(
+        mode="gauge+number",
+        value=overall_score,
+        domain={'x': [0, 1], 'y': [0, 1]},
+        title={'text': "Overall Score"},
+        gauge={
+            'axis': {'range': [0, 100]},
+            'bar': {'color': "darkblue"},
+            'steps': [
+                {'range': [0, 40], 'color': "red"},
+                {'range': [40, 70], 'color': "orange"},
+                {'range': [70, 90], 'color': "lightgreen"},
+                {'range': [90, 100], 'color': "green"},
+            ],
+            'threshold': {
+                'line': {'color': "black", 'width': 4},
+                'thickness': 0.75,
+                'value': overall_score
+            }
+        }
+    ))
+
+    fig.update_layout(height=300, margin=dict(l=20, r=20, t=30, b=20))
+    return fig
+
+
+def score_breakdown_chart(score_breakdown):
+    """Horizontal bar chart of the score of each category"""
+    categories = []
+    scores = []
+
+    for category, score in score_breakdown.items():
+        categories.append(category.replace('_', ' ').title())
+        scores.append(score)
+
+    # Create dataframe for the chart
+    df = pd.DataFrame({
+        "Category": categories,
+        "Score": scores
+    })
+
+    # Sort by score
+    df = df.sort_values(by="Score", ascending=True)
+
+    # Create bar chart
+    fig = px.bar(
+        df,
+        y="Category",
+        x="Score",
+        orientation='h',
+        text="Score",
+        range_x=[0, 100],
+        color="Score",
+        color_continuous_scale=["red", "orange", "lightgreen", "green"]
+    )
+
+    fig.update_layout(
+        height=300,
+        margin=dict(l=20, r=20, t=30, b=20),
+        coloraxis_showscale=False
+    )
+
+    fig.update_traces(texttemplate='%{text}', textposition='outside')
+    return fig
+
+
+def create_risk_opportunity_charts(analysis_data):
+    """Create visualizations for risks and opportunities"""
+    # Extract data for visualization
+    risk_names = []
+    risk_levels_numeric = []
+
+    opportunity_names = []
+    opportunity_levels_numeric = []
+
+    # Extract risk data
+    for risk_name, risk_info in analysis_data["risks"].items():
+        risk_names.append(risk_name.replace("_", " ").title())
+        risk_levels_numeric.append(LEVEL_MAPPING.get(risk_info["level"], 2))
+
+    # Extract opportunity data
+    for opp_name, opp_info in analysis_data["opportunities"].items():
+        opportunity_names.append(opp_name.replace("_", " ").title())
+        opportunity_levels_numeric.append(LEVEL_MAPPING.get(opp_info["level"], 2))
+
+    # Combine data for a single chart
+    all_names = risk_names + opportunity_names
+    all_values = risk_levels_numeric + [-val for val in opportunity_levels_numeric]  # Negative for opportunities
+    all_types = ["Risk"] * len(risk_names) + ["Opportunity"] * len(opportunity_names)
+
+    # Create dataframe for the chart
+    df = pd.DataFrame({
+        "Factor": all_names,
+        "Value": all_values,
+        "Type": all_types
+    })
+
+    # Sort by absolute value (impact level)
+    df = df.sort_values(by="Value", key=abs, ascending=False)
+
+    # Create horizontal bar chart
+    fig = px.bar(
+        df,
+        y="Factor",
+        x="Value",
+        color="Type",
+        color_discrete_map={"Risk": "#f44336", "Opportunity": "#4caf50"},
+        title="Risks & Opportunities Analysis",
+        orientation='h',
+        height=max(300, len(all_names) * 50),  # Dynamic height based on number of items
+        labels={"Value": "Impact Level (Higher = Greater Impact)"}
+    )
+
+    # Customize layout
+    fig.update_layout(
+        yaxis_title=None,
+        xaxis_title="Impact Level",
+        legend_title="Type",
+        font=dict(family="Arial", size=12),
+        margin=dict(l=10, r=10, t=40, b=10),
+        plot_bgcolor="white"
+    )
+
+    # Return the figure
+    return fig
+
+
+def figure_key(fig, width, height, scale=CHART_SCALE):
+    """Digest of a figure's spec and the size it is rendered at"""
+    digest = hashlib.sha256(fig.to_json().encode("utf-8"))
+    digest.update(f"\0{width}x{height}@{scale}".encode("ascii"))
+    return digest.hexdigest()
+
+
+class FigureCache:
+    """PNG renders of Plotly figures on disk, keyed by figure_key"""
+
+    def __init__(self, directory=CHART_CACHE_DIR, ttl_days=CHART_CACHE_TTL_DAYS):
+        self.directory = directory
+        self.hits = 0
+        self.renders = 0
+        self.render_seconds = 0.0
+        # Set after the first render fails without any success (no kaleido
+        # browser), so later reports don't pay for the same failure again
+        self.unavailable = kaleido is None
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._sweep(ttl_days * 86400)
+
+    def _sweep(self, max_age):
+        """Drop renders not used for max_age seconds (hits refresh the mtime)"""
+        cutoff = time.time() - max_age
+        for entry in os.scandir(self.directory):
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+            except OSError:
+                pass
+
+    def get(self, fig, width, height):
+        """Path of the PNG of fig at width x height, rendered on a miss; None if it can't be rendered"""
+        key = figure_key(fig, width, height)
+        path = os.path.join(self.directory, f"{key}.png")
+        if os.path.exists(path):
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            with self._lock:
+                self.hits += 1
+            return path
+        if self.unavailable:
+            return None
+
+        start = time.perf_counter()
+        try:
+            data = pio.to_image(fig, format="png", width=width, height=height, scale=CHART_SCALE)
+        except Exception as e:
+            print(f"Warning: Could not render chart: {str(e)}")
+            with self._lock:
+                if self.renders == 0:
+                    self.unavailable = True
+            return None
+        partial = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(partial, "wb") as f:
+            f.write(data)
+        os.replace(partial, path)
+        with self._lock:
+            self.renders += 1
+            self.render_seconds += time.perf_counter() - start
+        return path
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "renders": self.renders,
+                "render_avg_s": self.render_seconds / self.renders if self.renders else 0.0,
+                "available": not self.unavailable
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_figure_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = FigureCache()
+    return _cache
+
+
+def report_figures(analysis_data, risks_opportunities):
+    """Rendered charts for the PDF report: name -> (png path, width, height).
+
+    Takes the untranslated analysis: the charts compare High/Medium/Low
+    levels. Charts that can't be rendered are left out; without kaleido the
+    result is empty.
+    """
+    cache = get_figure_cache()
+    if not REPORT_CHARTS or cache.unavailable:
+        return {}
+
+    figures = [("gauge", score_gauge(analysis_data.get('overall_score', 0)), GAUGE_SIZE)]
+    if analysis_data.get('score_breakdown'):
+        figures.append(("score_breakdown", score_breakdown_chart(analysis_data['score_breakdown']), BREAKDOWN_SIZE))
+    if risks_opportunities.get('risks') or risks_opportunities.get('opportunities'):
+        fig = create_risk_opportunity_charts({
+            "risks": risks_opportunities.get('risks', {}),
+            "opportunities": risks_opportunities.get('opportunities', {})
+        })
+        figures.append(("risks_opportunities", fig, (RISK_CHART_WIDTH, fig.layout.height)))
+
+    rendered = {}
+    for name, fig, (width, height) in figures:
+        path = cache.get(fig, width, height)
+        if path is not None:
+            rendered[name] = (path, width, height)
+    return rendered
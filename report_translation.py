@@ -0,0 +1,99 @@
+from pdf_report import REPORT_LABELS, render_report
+from report_charts import report_figures
+from translation_engine import get_translation_engine
+
+# Translation of an exported report. Every string in the analysis results
+# (plus the report's own labels) is collected, deduplicated and sent to the
+# translation engine as one batch, then written back into copies of the
+# structures the report is rendered from. Segments translated for an earlier
+# report come from the translation memory, so re-exporting the same analysis
+# in the same language makes no provider calls. render_translated_report is
+# the one place a report is translated and rendered, used by the app, its
+# prerender pool and the batch export worker processes.
+
+# Values that are identifiers, names, dates or machine-readable levels
+# (High/Medium/Low, compared by charts and merging) rather than prose. Levels
+# are shown through translated report labels instead.
+SKIP_KEYS = {"clause_id", "date", "parties", "level"}
+# Dicts whose keys are display names (risk and opportunity names, score categories)
+NAMED_KEY_SECTIONS = {"risks", "opportunities", "score_breakdown"}
+
+
+def _display_key(key):
+    return key.replace("_", " ")
+
+
+def collect_strings(value, parent=None, found=None):
+    """Distinct translatable strings in a nested structure, in first-seen order"""
+    found = {} if found is None else found
+    if isinstance(value, str):
+        if value.strip() and parent not in SKIP_KEYS:
+            found[value] = None
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            if parent in NAMED_KEY_SECTIONS and isinstance(key, str):
+                found[_display_key(key)] = None
+            collect_strings(item, key, found)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            collect_strings(item, parent, found)
+    return found
+
+
+def apply_translations(value, translations, parent=None):
+    """Copy of a nested structure with its strings replaced by their translations"""
+    if isinstance(value, str):
+        return value if parent in SKIP_KEYS else translations.get(value, value)
+    if isinstance(value, dict):
+        copy = {}
+        for key, item in value.items():
+            new_key = key
+            if parent in NAMED_KEY_SECTIONS and isinstance(key, str):
+                new_key = translations.get(_display_key(key), key)
+            copy[new_key] = apply_translations(item, translations, key)
+        return copy
+    if isinstance(value, list):
+        return [apply_translations(item, translations, parent) for item in value]
+    return value
+
+
+def translate_report(engine, sections, target_lang, labels=None):
+    """Translate report sections (name -> structure) and labels in one batch.
+
+    Returns (translated sections, translated labels). English is returned
+    unchanged without touching the engine.
+    """
+    labels = labels or {}
+    if target_lang == "en":
+        return sections, labels
+
+    found = {}
+    for structure in sections.values():
+        collect_strings(structure, found=found)
+    collect_strings(labels, found=found)
+
+    texts = list(found)
+    translations = dict(zip(texts, engine.translate_many(texts, target_lang)))
+    translated = {name: apply_translations(structure, translations) for name, structure in sections.items()}
+    return translated, apply_translations(labels, translations)
+
+
+def render_translated_report(sections, lang_code, company_name=None):
+    """Translate the report sections and labels in one batch and render the PDF.
+
+    Makes no Streamlit calls, so it can run in the report prerender pool and
+    in batch export worker processes.
+    """
+    translated, labels = translate_report(get_translation_engine(), sections, lang_code, REPORT_LABELS)
+    # Charts plot the untranslated levels and names, so every language shares the same renders
+    figures = report_figures(sections["analysis_results"], sections["risks_opportunities"])
+    return render_report(
+        translated["analysis_results"],
+        translated["risks_opportunities"],
+        translated["clause_analysis"],
+        translated["summary_data"],
+        company_name,
+        labels,
+        lang_code,
+        figures
+    )
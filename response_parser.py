@@ -0,0 +1,428 @@
+import re
+import json
+
+# Parsing of structured (JSON) model responses for every analysis task.
+#
+# parse_structured_response() finds the first balanced JSON object in the
+# raw text (ignoring code fences and chatter around it), repairs the defects
+# models commonly produce, and validates/coerces the result against the
+# task's schema. When that still fails it raises StructuredOutputError and
+# the caller can make one cheap re-ask with build_repair_prompt(), which
+# sends back only the broken output, not the contract.
+
+
+class StructuredOutputError(ValueError):
+    """Raised when a response can't be turned into a valid result for its task"""
+
+
+# ---------------------------------------------------------------------------
+# Extraction
+# ---------------------------------------------------------------------------
+
+def extract_json_object(text):
+    """Return the first balanced {...} object in text.
+
+    Scans once, tracking string literals and escapes, so braces inside
+    strings don't confuse it. If the object is never closed (a truncated
+    response) the rest of the text is returned for repair_json to close.
+    """
+    start = text.find("{")
+    if start == -1:
+        raise StructuredOutputError("no JSON object in response")
+
+    depth = 0
+    in_string = None
+    escaped = False
+    for position in range(start, len(text)):
+        char = text[position]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == in_string:
+                in_string = None
+        elif char == '"' or char == "'":
+            in_string = char
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return text[start:position + 1]
+    return text[start:]
+
+
+# ---------------------------------------------------------------------------
+# Repair
+# ---------------------------------------------------------------------------
+
+STRING_LITERAL = re.compile(r'("(?:[^"\\]|\\.)*")')
+UNQUOTED_KEY = re.compile(r'([{,]\s*)([A-Za-z_][A-Za-z0-9_\- ]*?)\s*:')
+UNQUOTED_VALUE = re.compile(r'(:\s*)(?!(?:true|false|null)\b)([A-Za-z][^,}\]\n]*?)(\s*)(?=[,}\]\n]|$)')
+PYTHON_LITERALS = re.compile(r'\b(True|False|None)\b')
+TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+LINE_COMMENT = re.compile(r"//[^\n]*")
+ENDS_VALUE = re.compile(r'(?:^|[}\]\d]|true|false|null)(\s*\n\s*)$')
+
+# Opening quote -> characters that close it
+QUOTE_PAIRS = {'"': '"', "'": "'", "\u201c": '"\u201d', "\u2018": "'\u2019"}
+
+
+def _requote_strings(text):
+    """Normalize string literals to double quotes.
+
+    Single-quoted and curly-quoted strings become double-quoted, and raw
+    newlines, tabs and stray double quotes inside strings are escaped.
+    """
+    out = []
+    closers = None
+    escaped = False
+    for char in text:
+        if closers:
+            if escaped:
+                escaped = False
+                out.append(char)
+            elif char == "\\":
+                escaped = True
+                out.append(char)
+            elif char in closers:
+                closers = None
+                out.append('"')
+            elif char == '"':
+                out.append('\\"')
+            elif char == "\n":
+                out.append("\\n")
+            elif char == "\t":
+                out.append("\\t")
+            else:
+                out.append(char)
+        elif char in QUOTE_PAIRS:
+            closers = QUOTE_PAIRS[char]
+            out.append('"')
+        else:
+            out.append(char)
+    if closers:
+        out.append('"')
+    return "".join(out)
+
+
+def _repair_outside_strings(segment, after_string, before_string):
+    """Fix one stretch of JSON structure that lies between string literals"""
+    segment = LINE_COMMENT.sub("", segment)
+    segment = PYTHON_LITERALS.sub(lambda m: {"True": "true", "False": "false", "None": "null"}[m.group(1)], segment)
+    segment = UNQUOTED_KEY.sub(lambda m: f'{m.group(1)}"{m.group(2).strip()}":', segment)
+    segment = UNQUOTED_VALUE.sub(lambda m: f'{m.group(1)}"{m.group(2).strip()}"{m.group(3)}', segment)
+
+    # A value followed by a newline and the next key, with the comma missing
+    if before_string:
+        match = ENDS_VALUE.search(segment)
+        if match and (match.start(1) > 0 or after_string):
+            segment = segment[:match.start(1)] + "," + segment[match.start(1):]
+    return segment
+
+
+def _close_brackets(text):
+    """Append the closing brackets a truncated object is missing"""
+    stack = []
+    in_string = False
+    escaped = False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]" and stack:
+            stack.pop()
+    text = text.rstrip()
+    if text.endswith(","):
+        text = text[:-1]
+    elif text.endswith(":"):
+        text += " null"
+    return text + "".join(reversed(stack))
+
+
+def repair_json(text):
+    """Fix the JSON defects models commonly produce"""
+    parts = STRING_LITERAL.split(_requote_strings(text))
+    # Even indexes are structure, odd indexes are string literals
+    for i in range(0, len(parts), 2):
+        parts[i] = _repair_outside_strings(parts[i], i > 0, i < len(parts) - 1)
+    text = _close_brackets("".join(parts))
+    parts = STRING_LITERAL.split(text)
+    for i in range(0, len(parts), 2):
+        parts[i] = TRAILING_COMMA.sub(r"\1", parts[i])
+    return "".join(parts)
+
+
+def loads_tolerant(text):
+    """Parse the first JSON object in text, repairing it if needed"""
+    candidate = extract_json_object(text)
+    try:
+        return json.loads(candidate)
+    except json.JSONDecodeError:
+        pass
+    try:
+        return json.loads(repair_json(candidate))
+    except json.JSONDecodeError as e:
+        raise StructuredOutputError(f"invalid JSON: {e.msg} at char {e.pos}")
+
+
+# ---------------------------------------------------------------------------
+# Schemas
+# ---------------------------------------------------------------------------
+
+class OptionalField:
+    """Schema wrapper for a field that may be missing"""
+
+    def __init__(self, spec, default):
+        self.spec = spec
+        self.default = default
+
+
+class ListOf:
+    """List whose invalid items are dropped rather than failing the whole result"""
+
+    def __init__(self, item):
+        self.item = item
+
+
+class Section:
+    """Part of a multi-part response that is left out (None) when missing or invalid"""
+
+    def __init__(self, spec):
+        self.spec = spec
+
+
+class MapOf:
+    """Dict of free-form names to values of one schema (e.g. risk_name -> details)"""
+
+    def __init__(self, value):
+        self.value = value
+
+
+def as_score(value):
+    """Coerce to an integer 0-100 (accepts 85, 85.0, "85" and "85/100")"""
+    if isinstance(value, str):
+        match = re.search(r"-?\d+(\.\d+)?", value)
+        if not match:
+            raise StructuredOutputError(f"not a score: {value!r}")
+        value = match.group(0)
+    try:
+        return max(0, min(100, int(round(float(value)))))
+    except (TypeError, ValueError):
+        raise StructuredOutputError(f"not a score: {value!r}")
+
+
+def as_text(value):
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return "; ".join(str(v) for v in value)
+    if isinstance(value, dict):
+        return "; ".join(f"{k}: {v}" for k, v in value.items())
+    return str(value)
+
+
+def as_level(value):
+    normalized = str(value).strip().lower()
+    for name in ("High", "Medium", "Low"):
+        if normalized.startswith(name.lower()):
+            return name
+    return "Medium"
+
+
+def as_bool(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ("true", "yes", "1")
+    return bool(value)
+
+
+SCORE_SCHEMA = {
+    "overall_score": as_score,
+    "score_breakdown": OptionalField(MapOf(as_score), {}),
+    "summary": OptionalField(as_text, "")
+}
+
+RISK_SCHEMA = {
+    "level": OptionalField(as_level, "Medium"),
+    "description": OptionalField(as_text, ""),
+    "potential_impact": OptionalField(as_text, ""),
+    "mitigation_suggestions": OptionalField(as_text, "")
+}
+
+OPPORTUNITY_SCHEMA = {
+    "level": OptionalField(as_level, "Medium"),
+    "description": OptionalField(as_text, ""),
+    "potential_value": OptionalField(as_text, ""),
+    "action_items": OptionalField(as_text, "")
+}
+
+RISKS_OPPORTUNITIES_SCHEMA = {
+    "risks": MapOf(RISK_SCHEMA),
+    "opportunities": MapOf(OPPORTUNITY_SCHEMA)
+}
+
+CLAUSE_SCHEMA = {
+    "clause_type": as_text,
+    "clause_extract": OptionalField(as_text, ""),
+    "explanation": OptionalField(as_text, ""),
+    "concerns": OptionalField(as_text, "")
+}
+
+CLAUSE_QUERY_SCHEMA = {
+    "found": OptionalField(as_bool, False),
+    "clause_text": OptionalField(as_text, ""),
+    "explanation": OptionalField(as_text, ""),
+    "implications": OptionalField(as_text, ""),
+    "standard_practice": OptionalField(as_text, ""),
+    "recommendations": OptionalField(as_text, "")
+}
+
+KEY_TERM_SCHEMA = {
+    "term": as_text,
+    "definition": OptionalField(as_text, ""),
+    "explanation": OptionalField(as_text, ""),
+    "importance": OptionalField(as_text, "")
+}
+
+SUMMARY_SCHEMA = {
+    "contract_type": OptionalField(as_text, "Unknown"),
+    "parties": OptionalField(ListOf(as_text), []),
+    "purpose": OptionalField(as_text, ""),
+    "key_provisions": OptionalField(ListOf(as_text), []),
+    "important_dates": OptionalField(ListOf({"event": OptionalField(as_text, ""), "date": OptionalField(as_text, "")}), []),
+    "notable_aspects": OptionalField(as_text, ""),
+    "summary": as_text
+}
+
+SCHEMAS = {
+    "score": SCORE_SCHEMA,
+    "risks_opportunities": RISKS_OPPORTUNITIES_SCHEMA,
+    "key_clauses": {"key_clauses": ListOf(CLAUSE_SCHEMA)},
+    "clause_query": CLAUSE_QUERY_SCHEMA,
+    "key_terms": {"key_terms": ListOf(KEY_TERM_SCHEMA)},
+    "summary": SUMMARY_SCHEMA,
+    # A section the model left out or got wrong is re-run on its own
+    "combined": {
+        "score": Section(SCORE_SCHEMA),
+        "risks": Section(MapOf(RISK_SCHEMA)),
+        "opportunities": Section(MapOf(OPPORTUNITY_SCHEMA)),
+        "summary": Section(SUMMARY_SCHEMA),
+        "key_clauses": Section(ListOf(CLAUSE_SCHEMA)),
+        "key_terms": Section(ListOf(KEY_TERM_SCHEMA))
+    }
+}
+
+
+def validate(value, spec, path="$"):
+    """Check value against spec, returning a coerced copy"""
+    if isinstance(spec, OptionalField):
+        return validate(value, spec.spec, path)
+
+    if isinstance(spec, Section):
+        try:
+            return validate(value, spec.spec, path)
+        except StructuredOutputError:
+            return None
+
+    if isinstance(spec, dict):
+        if not isinstance(value, dict):
+            raise StructuredOutputError(f"{path}: expected an object")
+        result = {}
+        for key, field_spec in spec.items():
+            if key in value and value[key] is not None:
+                result[key] = validate(value[key], field_spec, f"{path}.{key}")
+            elif isinstance(field_spec, OptionalField):
+                result[key] = field_spec.default
+            elif isinstance(field_spec, Section):
+                result[key] = None
+            else:
+                raise StructuredOutputError(f"{path}.{key}: missing")
+        return result
+
+    if isinstance(spec, ListOf):
+        if isinstance(value, dict):
+            value = list(value.values())
+        if not isinstance(value, list):
+            value = [value]
+        items = []
+        for index, item in enumerate(value):
+            try:
+                items.append(validate(item, spec.item, f"{path}[{index}]"))
+            except StructuredOutputError:
+                continue
+        return items
+
+    if isinstance(spec, MapOf):
+        if isinstance(value, list):
+            # [{"name": ..., ...}] instead of {"name": {...}}
+            value = {
+                str(item.get("name") or item.get("type") or f"item_{i + 1}"): item
+                for i, item in enumerate(value) if isinstance(item, dict)
+            }
+        if not isinstance(value, dict):
+            raise StructuredOutputError(f"{path}: expected an object")
+        return {
+            str(key): validate(item, spec.value, f"{path}.{key}")
+            for key, item in value.items()
+        }
+
+    return spec(value)
+
+
+def parse_structured_response(response_text, task):
+    """Parse and validate a model response for one of the SCHEMAS tasks"""
+    if not response_text or not response_text.strip():
+        raise StructuredOutputError("empty response")
+    return validate(loads_tolerant(response_text), SCHEMAS[task])
+
+
+# ---------------------------------------------------------------------------
+# Re-ask
+# ---------------------------------------------------------------------------
+
+def describe_schema(spec):
+    """JSON skeleton of a schema, used to show the model the expected shape"""
+    if isinstance(spec, (OptionalField, Section)):
+        return describe_schema(spec.spec)
+    if isinstance(spec, dict):
+        return {key: describe_schema(value) for key, value in spec.items()}
+    if isinstance(spec, ListOf):
+        return [describe_schema(spec.item)]
+    if isinstance(spec, MapOf):
+        return {"<name>": describe_schema(spec.value)}
+    return {
+        as_score: "<integer 0-100>",
+        as_level: "<High/Medium/Low>",
+        as_bool: "<true/false>"
+    }.get(spec, "<text>")
+
+
+REPAIR_PROMPT = """
+    The following response was supposed to be a single JSON object but could not be used ({error}).
+
+    Rewrite it as valid JSON with exactly this structure, keeping all of its content. Return ONLY the JSON object.
+
+    Expected structure:
+    {schema}
+
+    Response to fix:
+    {response}
+    """
+
+
+def build_repair_prompt(response_text, task, error):
+    """Prompt for the single re-ask after a response failed to parse"""
+    return REPAIR_PROMPT.format(
+        error=error,
+        schema=json.dumps(describe_schema(SCHEMAS[task]), indent=2),
+        response=response_text
+    )
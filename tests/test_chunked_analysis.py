@@ -0,0 +1,82 @@
+"""Long contracts analyzed in chunks inside the analysis pipeline, on the stub backend"""
+import pytest
+
+from analysis_pipeline import run_analysis_stages
+from chunked_analysis import analyze_in_chunks, merge_scores, split_contract, split_sections
+from llm_backend import StubBackend, STUB_SCORE
+from prompts import CONTRACT_SCORE_PROMPT
+from response_parser import parse_structured_response
+
+CHUNK_CHARS = 500
+
+
+def long_contract(sections):
+    return "".join(
+        f"{n}. SECTION {n}\n\n" + "The parties agree to the terms of this section. " * 8 + "\n\n"
+        for n in range(1, sections + 1)
+    )
+
+
+def score_stage(backend):
+    def analyze_chunk(text):
+        response = backend.generate(CONTRACT_SCORE_PROMPT.format(text=text), task="score")
+        return parse_structured_response(response.text, "score")
+
+    def stage(text):
+        return analyze_in_chunks(text, analyze_chunk, merge_scores, max_chars=CHUNK_CHARS)
+
+    return stage
+
+
+def test_long_contract_gets_a_timeout_per_round_of_chunks():
+    text = long_contract(40)
+    assert len(split_contract(text, CHUNK_CHARS)) >= 20
+
+    # Two chunks at a time at 50ms each is well over the 0.2s single-call timeout
+    backend = StubBackend(latency_ms=50, jitter_ms=0)
+    stage = run_analysis_stages([("score", score_stage(backend), (text,))], timeout=0.2)["score"]
+
+    assert stage.ok, stage.error
+    assert stage.elapsed > 0.2
+    assert stage.result["overall_score"] == STUB_SCORE["overall_score"]
+
+
+def test_hung_chunks_still_time_out():
+    text = long_contract(8)
+    backend = StubBackend(latency_ms=2000, jitter_ms=0)
+    stage = run_analysis_stages([("score", score_stage(backend), (text,))], timeout=0.1)["score"]
+
+    assert stage.status == "timeout"
+    assert stage.elapsed < 2
+
+
+def test_failed_chunk_fails_the_whole_analysis():
+    text = long_contract(8)
+    calls = []
+
+    def analyze_chunk(chunk):
+        calls.append(chunk)
+        if len(calls) == 2:
+            raise ValueError("bad response")
+        return dict(STUB_SCORE)
+
+    with pytest.raises(ValueError):
+        analyze_in_chunks(text, analyze_chunk, merge_scores, max_chars=CHUNK_CHARS)
+    # Chunks queued after the failure were never started
+    assert len(calls) < len(split_contract(text, CHUNK_CHARS))
+
+
+def test_sections_are_the_document_models_top_level_blocks():
+    text = (
+        "1. SERVICES\n\nThe Supplier shall provide the Services.\n"
+        "2. The Customer shall pay the Fees within thirty days.\n\n"
+        "3. TERM\n\nThis agreement lasts two years.\n\n"
+        "IN WITNESS WHEREOF the parties have signed this agreement.\n"
+    )
+
+    assert split_sections(text) == [
+        "1. SERVICES\n\nThe Supplier shall provide the Services.\n"
+        "2. The Customer shall pay the Fees within thirty days.\n\n",
+        "3. TERM\n\nThis agreement lasts two years.\n\n",
+        "IN WITNESS WHEREOF the parties have signed this agreement.\n"
+    ]
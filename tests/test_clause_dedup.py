@@ -0,0 +1,114 @@
+"""Reuse of key term and key clause analyses across uploads"""
+import re
+
+import pytest
+
+from clause_dedup import ClauseIndex, analyze_with_reuse, attribute_items
+from chunked_analysis import merge_key_terms
+
+TERMS = ["Services", "Fees", "Deliverables", "Confidential Information", "Term", "Territory"]
+
+
+def contract(amended=None):
+    """A contract with one section per defined term; `amended` terms get a new definition"""
+    sections = []
+    for number, term in enumerate(TERMS, start=1):
+        definition = f"the {term.lower()} as amended by the first variation" if term in (amended or ()) else \
+            f"the {term.lower()} set out in schedule {number}"
+        sections.append(
+            f"{number}. {term.upper()}\n\n\"{term}\" means {definition}. The parties shall act in good faith "
+            f"in all matters relating to the {term.lower()} under this agreement.\n\n"
+        )
+    return "".join(sections)
+
+
+class FakeTermsModel:
+    """Extracts the defined terms of a text and counts the characters sent"""
+
+    def __init__(self):
+        self.sent = []
+
+    def __call__(self, text):
+        self.sent.append(text)
+        return {"key_terms": [
+            {"term": term, "definition": definition, "explanation": "", "importance": ""}
+            for term, definition in re.findall(r'"([^"]+)" means ([^.]*)\.', text)
+        ]}
+
+
+@pytest.fixture
+def index(tmp_path):
+    return ClauseIndex(path=str(tmp_path / "clause_index.sqlite3"))
+
+
+def key_terms(index, text, model):
+    return analyze_with_reuse(index, "tenant", "key_terms", "v1", text, model, merge_key_terms, "key_terms")
+
+
+def test_amended_contract_reanalyzes_only_the_changed_sections(index):
+    key_terms(index, contract(), FakeTermsModel())
+
+    model = FakeTermsModel()
+    result = key_terms(index, contract(amended=["Fees"]), model)
+
+    assert len(model.sent) == 1
+    assert '"Fees" means' in model.sent[0]
+    assert '"Services" means' not in model.sent[0]
+    assert [item["term"] for item in result["key_terms"]] == TERMS
+    assert result["key_terms"][1]["definition"] == "the fees as amended by the first variation"
+    assert index.stats()["reused_sections"] == len(TERMS) - 1
+
+
+def test_reflowed_reupload_is_fully_reused_after_a_restart(index):
+    key_terms(index, contract(), FakeTermsModel())
+
+    reopened = ClauseIndex(path=index.path)
+    model = FakeTermsModel()
+    result = key_terms(reopened, contract().replace(" in good faith ", "\nin good faith\n"), model)
+
+    assert model.sent == []
+    assert [item["term"] for item in result["key_terms"]] == TERMS
+
+
+def test_other_tenants_analyses_are_not_reused(index):
+    key_terms(index, contract(), FakeTermsModel())
+
+    model = FakeTermsModel()
+    analyze_with_reuse(index, "other", "key_terms", "v1", contract(), model, merge_key_terms, "key_terms")
+
+    assert len(model.sent) == 1
+
+
+def test_terms_are_placed_where_they_are_defined():
+    sections = [
+        "1. SCOPE\n\nThe Fees cover the Services.\n",
+        "2. DEFINITIONS\n\n\"Fees\" means the charges in schedule 2.\n"
+    ]
+    grouped = attribute_items([{"term": "Fees"}, {"term": "Scope"}], "term", sections)
+
+    assert grouped == [[{"term": "Scope"}], [{"term": "Fees"}]]
+    assert attribute_items([{"term": "Fee"}], "term", sections) is None
+
+
+def test_key_clauses_need_a_whole_matching_contract(index):
+    def clauses(text):
+        return {"key_clauses": [
+            {"clause_type": term, "clause_extract": f"\"{term}\" means {definition}", "explanation": "", "concerns": ""}
+            for term, definition in re.findall(r'"([^"]+)" means ([^.]*)\.', text)
+        ]}
+
+    def merge(chunk_results):
+        return {"key_clauses": [item for _, result in chunk_results for item in result["key_clauses"]]}
+
+    sent = []
+
+    def model(text):
+        sent.append(text)
+        return clauses(text)
+
+    analyze_with_reuse(index, "tenant", "key_clauses", "v1", contract(), model, merge, "key_clauses")
+    analyze_with_reuse(index, "tenant", "key_clauses", "v1", contract(), model, merge, "key_clauses")
+    assert len(sent) == 1
+
+    analyze_with_reuse(index, "tenant", "key_clauses", "v1", contract(amended=["Fees"]), model, merge, "key_clauses")
+    assert sent[-1] == contract(amended=["Fees"])
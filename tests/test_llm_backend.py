@@ -0,0 +1,47 @@
+"""Streaming through the rate-limited backend"""
+import pytest
+
+from llm_backend import LLMResponse, RateLimitedBackend, StubBackend, STUB_SCORE
+from rate_limiter import RateLimiter, RateLimitError, _NoLimit
+
+
+def consume(stream):
+    """Pieces yielded by a stream and the value it returns"""
+    pieces = []
+    while True:
+        try:
+            pieces.append(next(stream))
+        except StopIteration as done:
+            return pieces, done.value
+
+
+@pytest.mark.parametrize("limiter", [RateLimiter(rpm=0), _NoLimit()], ids=["limiter", "no limit"])
+def test_stream_returns_the_full_response(limiter):
+    backend = RateLimitedBackend(StubBackend(latency_ms=0, jitter_ms=0), limiter)
+
+    pieces, response = consume(backend.generate_stream("Score this contract", task="score"))
+
+    assert isinstance(response, LLMResponse)
+    assert response.text == "".join(pieces)
+    assert '"overall_score": %d' % STUB_SCORE["overall_score"] in response.text
+    assert response.prompt_tokens > 0 and response.output_tokens > 0
+
+
+def test_stream_retried_before_the_first_piece_returns_the_retry_response(monkeypatch):
+    monkeypatch.setattr(RateLimiter, "backoff", staticmethod(lambda attempt: 0))
+    limiter = RateLimiter(rpm=0)
+    attempts = []
+
+    def flaky_stream():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RateLimitError("429 Resource has been exhausted")
+        yield "Done"
+        return LLMResponse("Done", 1, 1)
+
+    pieces, response = consume(limiter.stream(flaky_stream))
+
+    assert pieces == ["Done"]
+    assert response.text == "Done"
+    assert limiter.retries == 1
+    assert limiter.in_flight == 0
@@ -0,0 +1,118 @@
+"""Structured-output parsing, checked against the corpus of malformed model responses"""
+import os
+import re
+import json
+
+import pytest
+
+from response_parser import (
+    SCHEMAS,
+    ListOf,
+    MapOf,
+    OptionalField,
+    StructuredOutputError,
+    as_score,
+    build_repair_prompt,
+    describe_schema,
+    extract_json_object,
+    loads_tolerant,
+    parse_structured_response,
+    validate
+)
+
+CORPUS_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "data", "malformed_responses.json"
+)
+
+with open(CORPUS_PATH, encoding="utf-8") as f:
+    CORPUS = json.load(f)
+
+RECOVERABLE = [case for case in CORPUS if case["ok"]]
+REJECTED = [case for case in CORPUS if not case["ok"]]
+
+
+def field(value, path):
+    """Value at a dotted path ("risks.ip.level", "key_clauses.0.clause_type")"""
+    for part in path.split("."):
+        value = value[int(part)] if isinstance(value, list) else value[part]
+    return value
+
+
+@pytest.mark.parametrize("case", RECOVERABLE, ids=lambda case: case["name"])
+def test_extracts_only_the_json_object(case):
+    candidate = extract_json_object(case["response"])
+
+    assert candidate.startswith("{")
+    assert candidate in case["response"]
+    assert "```" not in candidate
+
+
+@pytest.mark.parametrize("case", RECOVERABLE, ids=lambda case: case["name"])
+def test_repairs_and_validates_corpus_response(case):
+    raw = loads_tolerant(case["response"])
+    assert isinstance(raw, dict)
+
+    result = validate(raw, SCHEMAS[case["task"]])
+    for path, expected in case["expect"].items():
+        assert field(result, path) == expected, path
+    assert parse_structured_response(case["response"], case["task"]) == result
+
+
+@pytest.mark.parametrize("case", REJECTED, ids=lambda case: case["name"])
+def test_rejects_unusable_corpus_response(case):
+    with pytest.raises(StructuredOutputError, match=re.escape(case["error"])):
+        parse_structured_response(case["response"], case["task"])
+
+
+def test_repair_prompt_carries_the_broken_output_and_expected_shape():
+    broken = '{"overall_score": 71, "summary": "Cut off'
+    prompt = build_repair_prompt(broken, "score", "invalid JSON")
+
+    assert broken in prompt
+    assert "(invalid JSON)" in prompt
+    assert '"overall_score": "<integer 0-100>"' in prompt
+    assert '"score_breakdown": {\n    "<name>": "<integer 0-100>"\n  }' in prompt
+
+
+def test_describe_schema_unwraps_optional_and_combined_sections():
+    skeleton = describe_schema(SCHEMAS["combined"])
+
+    assert skeleton["risks"]["<name>"]["level"] == "<High/Medium/Low>"
+    assert skeleton["key_clauses"] == [{
+        "clause_type": "<text>", "clause_extract": "<text>", "explanation": "<text>", "concerns": "<text>"
+    }]
+    assert skeleton["summary"]["important_dates"] == [{"event": "<text>", "date": "<text>"}]
+
+
+def test_optional_field_defaults_when_missing_or_null_but_not_when_invalid():
+    spec = {"score": OptionalField(as_score, 50), "note": OptionalField(str, "")}
+
+    assert validate({}, spec) == {"score": 50, "note": ""}
+    assert validate({"score": None}, spec) == {"score": 50, "note": ""}
+    with pytest.raises(StructuredOutputError, match="not a score"):
+        validate({"score": "n/a"}, spec)
+
+
+def test_required_field_missing():
+    with pytest.raises(StructuredOutputError, match=re.escape("$.overall_score: missing")):
+        validate({"summary": "No score"}, SCHEMAS["score"])
+
+
+def test_list_of_drops_invalid_items_and_wraps_single_values():
+    spec = ListOf({"term": str})
+
+    assert validate([{"term": "Fees"}, {"definition": "no term"}, "junk"], spec) == [{"term": "Fees"}]
+    assert validate({"a": {"term": "Fees"}, "b": {"term": "Term"}}, spec) == [{"term": "Fees"}, {"term": "Term"}]
+    assert validate("Fees", ListOf(str)) == ["Fees"]
+
+
+def test_map_of_rejects_non_objects_and_invalid_values():
+    spec = MapOf({"level": str})
+
+    assert validate([{"name": "Cap", "level": "High"}, {"level": "Low"}], spec) == {
+        "Cap": {"level": "High"}, "item_2": {"level": "Low"}
+    }
+    with pytest.raises(StructuredOutputError, match="expected an object"):
+        validate("High", spec)
+    with pytest.raises(StructuredOutputError, match=re.escape("$.Cap.level: missing")):
+        validate({"Cap": {"description": "No level"}}, spec)
@@ -0,0 +1,288 @@
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from translate import Translator
+except ImportError:
+    Translator = None
+
+# Translation of report text and UI strings. Text is split into segments no
+# longer than the provider accepts (MyMemory rejects queries over 500
+# characters), on paragraph, then sentence, then word boundaries, so nothing
+# is cut off. Segments are translated concurrently in one bounded pool shared
+# by all sessions, and every translated segment is stored in a persistent
+# translation memory keyed by (language, hash of the segment): boilerplate
+# that recurs across reports, and repeated UI strings, are translated once.
+#
+# TRANSLATION_PROVIDER=stub swaps in an offline provider for tests and
+# benchmarks.
+TRANSLATION_PROVIDER = os.getenv("TRANSLATION_PROVIDER", "mymemory")
+TRANSLATION_EMAIL = os.getenv("TRANSLATION_EMAIL", "")
+TRANSLATION_WORKERS = int(os.getenv("TRANSLATION_WORKERS", "4"))
+TRANSLATION_MAX_CHARS = int(os.getenv("TRANSLATION_MAX_CHARS", "500"))
+TRANSLATION_MEMORY_ENABLED = os.getenv("TRANSLATION_MEMORY_ENABLED", "true").lower() not in ("0", "false", "no")
+TRANSLATION_MEMORY_PATH = os.getenv("TRANSLATION_MEMORY_PATH", os.path.join(".cache", "translation_memory.sqlite3"))
+
+PARAGRAPH_BREAK = re.compile(r"(\n\s*\n)")
+SENTENCE_END = re.compile(r"(?<=[.!?;:])\s+")
+
+
+class TranslationFailed(Exception):
+    """The provider could not translate a segment"""
+
+
+class MyMemoryProvider:
+    """Translations from the MyMemory API via the translate package"""
+
+    name = "mymemory"
+
+    def __init__(self, email=TRANSLATION_EMAIL):
+        if Translator is None:
+            raise ImportError("The translate package is not installed")
+        self.email = email
+        # Translator keeps a requests session; give each worker thread its own
+        self._local = threading.local()
+
+    def _translator(self, target_lang):
+        translators = getattr(self._local, "translators", None)
+        if translators is None:
+            translators = self._local.translators = {}
+        if target_lang not in translators:
+            translators[target_lang] = Translator(to_lang=target_lang, email=self.email)
+        return translators[target_lang]
+
+    def translate(self, text, target_lang):
+        try:
+            result = self._translator(target_lang).translate(text)
+        except Exception as e:
+            raise TranslationFailed(str(e)) from e
+        # Quota warnings sometimes come back as the "translation"
+        if not result or result.upper().startswith(("MYMEMORY WARNING", "QUERY LENGTH LIMIT")):
+            raise TranslationFailed(result or "Empty translation")
+        return result
+
+
+class StubProvider:
+    """Offline provider that tags text with the target language after a simulated delay"""
+
+    name = "stub"
+
+    def __init__(self, latency_ms=0):
+        self.latency_ms = latency_ms
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def translate(self, text, target_lang):
+        with self._lock:
+            self.calls += 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        return f"[{target_lang}] {text}"
+
+
+class TranslationMemory:
+    """SQLite store of translated segments keyed by (language, segment hash)"""
+
+    def __init__(self, path=TRANSLATION_MEMORY_PATH):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS translation_memory (
+                language TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                translation TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (language, text_hash)
+            )
+        """)
+        self._conn.commit()
+
+    @staticmethod
+    def key(text):
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get_many(self, language, texts):
+        """Dict of text -> translation for the texts already in memory"""
+        found = {}
+        with self._lock:
+            for text in texts:
+                row = self._conn.execute(
+                    "SELECT translation FROM translation_memory WHERE language = ? AND text_hash = ?",
+                    (language, self.key(text))
+                ).fetchone()
+                if row is None:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+                    found[text] = row[0]
+        return found
+
+    def set_many(self, language, translations):
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO translation_memory (language, text_hash, translation, created_at) "
+                "VALUES (?, ?, ?, ?)",
+                [(language, self.key(text), translation, now) for text, translation in translations.items()]
+            )
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM translation_memory").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+
+class _NullMemory:
+    """Stand-in used when the translation memory is disabled or can't be opened"""
+
+    def get_many(self, language, texts):
+        return {}
+
+    def set_many(self, language, translations):
+        pass
+
+    def stats(self):
+        return {"hits": 0, "misses": 0, "entries": 0}
+
+
+def _pack(pieces, separator, max_chars):
+    """Join consecutive pieces with separator into strings of at most max_chars"""
+    packed = []
+    current = ""
+    for piece in pieces:
+        candidate = f"{current}{separator}{piece}" if current else piece
+        if len(candidate) <= max_chars:
+            current = candidate
+            continue
+        if current:
+            packed.append(current)
+        current = piece
+    if current:
+        packed.append(current)
+    return packed
+
+
+def split_paragraph(paragraph, max_chars=TRANSLATION_MAX_CHARS):
+    """Split a paragraph into segments of at most max_chars on sentence, then word, boundaries"""
+    if len(paragraph) <= max_chars:
+        return [paragraph]
+    pieces = []
+    for sentence in SENTENCE_END.split(paragraph):
+        if len(sentence) <= max_chars:
+            pieces.append(sentence)
+            continue
+        for words in _pack(sentence.split(" "), " ", max_chars):
+            # A single "word" longer than the limit (a URL, a run of underscores)
+            pieces.extend(words[i:i + max_chars] for i in range(0, len(words), max_chars))
+    return _pack(pieces, " ", max_chars)
+
+
+class TranslationEngine:
+    """Segmenting, concurrent, memory-backed translator"""
+
+    def __init__(self, provider, memory=None, workers=TRANSLATION_WORKERS, max_chars=TRANSLATION_MAX_CHARS):
+        self.provider = provider
+        self.memory = memory or _NullMemory()
+        self.max_chars = max_chars
+        self.failures = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="translate")
+
+    def _segments(self, text):
+        """Paragraph separators and segments of text, in order; separators are kept verbatim"""
+        parts = []
+        for part in PARAGRAPH_BREAK.split(text):
+            if not part.strip():
+                parts.append((part, False))
+            else:
+                parts.append((split_paragraph(part, self.max_chars), True))
+        return parts
+
+    def _translate_segment(self, segment, target_lang):
+        # Leading and trailing whitespace is not sent, so indentation survives
+        stripped = segment.strip()
+        translated = self.provider.translate(stripped, target_lang)
+        start = segment.index(stripped[0])
+        return segment[:start] + translated + segment[start + len(stripped):]
+
+    def translate_many(self, texts, target_lang):
+        """Translate a batch of texts; each distinct segment is translated once.
+
+        Segments that fail keep their original text, so a provider outage
+        degrades to untranslated text instead of an error.
+        """
+        if target_lang == "en":
+            return list(texts)
+
+        layouts = [self._segments(text or "") for text in texts]
+        unique = list(dict.fromkeys(
+            segment for layout in layouts for part, translatable in layout if translatable for segment in part
+        ))
+        translations = self.memory.get_many(target_lang, unique)
+        pending = [segment for segment in unique if segment not in translations]
+
+        futures = {segment: self._executor.submit(self._translate_segment, segment, target_lang) for segment in pending}
+        fresh = {}
+        for segment, future in futures.items():
+            try:
+                fresh[segment] = future.result()
+            except Exception as e:
+                self.failures += 1
+                print(f"Translation to {target_lang} failed for a {len(segment)} char segment: {str(e)}")
+        if fresh:
+            self.memory.set_many(target_lang, fresh)
+        translations.update(fresh)
+
+        results = []
+        for layout in layouts:
+            out = []
+            for part, translatable in layout:
+                if translatable:
+                    out.append(" ".join(translations.get(segment, segment) for segment in part))
+                else:
+                    out.append(part)
+            results.append("".join(out))
+        return results
+
+    def translate(self, text, target_lang):
+        return self.translate_many([text], target_lang)[0]
+
+    def stats(self):
+        stats = dict(self.memory.stats())
+        stats["provider"] = self.provider.name
+        stats["failures"] = self.failures
+        return stats
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_translation_engine():
+    """Process-wide engine shared by all Streamlit sessions"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            provider = StubProvider() if TRANSLATION_PROVIDER == "stub" else MyMemoryProvider()
+            memory = None
+            if TRANSLATION_MEMORY_ENABLED:
+                try:
+                    memory = TranslationMemory()
+                except Exception as e:
+                    print(f"Warning: Could not open translation memory: {str(e)}")
+            _engine = TranslationEngine(provider, memory)
+    return _engine
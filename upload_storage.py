@@ -0,0 +1,123 @@
+import os
+import time
+import uuid
+import hashlib
+import tempfile
+import threading
+import weakref
+
+# Uploaded contracts are written to a spool directory and the extractors read
+# them through a read-only memory map (or by path from worker processes), so
+# extraction makes no in-memory copies of the file bytes. Streamlit's file
+# uploader still keeps its own buffer of the upload while the widget shows
+# the file; that one is outside the app's control. A spooled
+# file is deleted once extraction has finished, or when its SpooledUpload is
+# garbage collected together with the session state that owns it; files left
+# behind by a crashed server are swept after UPLOAD_SPOOL_TTL_HOURS.
+UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "contract_uploads"))
+UPLOAD_SPOOL_TTL_SECONDS = int(float(os.getenv("UPLOAD_SPOOL_TTL_HOURS", "24")) * 3600)
+# Characters of extracted text sent to the browser in the preview text area
+TEXT_PREVIEW_CHARS = int(os.getenv("TEXT_PREVIEW_CHARS", "20000"))
+
+COPY_CHUNK_BYTES = 1024 * 1024
+
+_sweep_lock = threading.Lock()
+_swept = False
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        print(f"Warning: Could not remove spooled upload {path}: {str(e)}")
+
+
+def sweep_spool(max_age=UPLOAD_SPOOL_TTL_SECONDS, directory=UPLOAD_SPOOL_DIR):
+    """Delete spooled files older than max_age seconds; returns how many were removed"""
+    removed = 0
+    cutoff = time.time() - max_age
+    for entry in os.scandir(directory):
+        if entry.is_file() and entry.stat().st_mtime < cutoff:
+            _remove(entry.path)
+            removed += 1
+    return removed
+
+
+def _spool_dir():
+    """Create the spool directory, sweeping stale files once per process"""
+    global _swept
+    os.makedirs(UPLOAD_SPOOL_DIR, exist_ok=True)
+    with _sweep_lock:
+        if not _swept:
+            _swept = True
+            removed = sweep_spool()
+            if removed:
+                print(f"Upload spool: removed {removed} stale files")
+    return UPLOAD_SPOOL_DIR
+
+
+class SpooledUpload:
+    """An uploaded file on disk, removed when released or garbage collected"""
+
+    def __init__(self, path, name, size, sha256):
+        self.path = path
+        self.name = name
+        self.size = size
+        self.sha256 = sha256
+        self._finalizer = weakref.finalize(self, _remove, path)
+
+    def release(self):
+        """Delete the spooled file now"""
+        self._finalizer()
+
+
+def _chunks(file):
+    file.seek(0)
+    while True:
+        chunk = file.read(COPY_CHUNK_BYTES)
+        if not chunk:
+            break
+        yield chunk
+    file.seek(0)
+
+
+def file_sha256(file):
+    """SHA-256 of a file-like object, read in chunks"""
+    digest = hashlib.sha256()
+    for chunk in _chunks(file):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def spool_upload(uploaded_file, sha256=None):
+    """Copy an uploaded file into the spool directory in chunks.
+
+    The file is hashed on the way unless its sha256 is already known.
+    """
+    directory = _spool_dir()
+    extension = os.path.splitext(uploaded_file.name)[1].lower()
+    path = os.path.join(directory, f"{uuid.uuid4().hex}{extension}")
+
+    digest = hashlib.sha256() if sha256 is None else None
+    size = 0
+    try:
+        with open(path, "wb") as f:
+            for chunk in _chunks(uploaded_file):
+                if digest is not None:
+                    digest.update(chunk)
+                f.write(chunk)
+                size += len(chunk)
+    except Exception:
+        _remove(path)
+        raise
+    return SpooledUpload(path, uploaded_file.name, size, sha256 or digest.hexdigest())
+
+
+def text_preview(text, limit=TEXT_PREVIEW_CHARS):
+    """The start of text, cut at a line break, for display"""
+    if len(text) <= limit:
+        return text
+    cut = text.rfind("\n", 0, limit)
+    return text[:cut if cut > limit // 2 else limit]
@@ -0,0 +1,320 @@
+import os
+import json
+import time
+import argparse
+import threading
+
+try:
+    import streamlit as st
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+except ImportError:
+    st = None
+    get_script_run_ctx = None
+
+# Append-only log of every LLM call: who made it, which feature, how many
+# tokens and how long it took. One compact JSON object per line:
+#   {"ts": 1718000000.1, "user": "a@b.com", "plan": "free", "feature": "generate_summary",
+#    "task": "summary", "in": 3120, "out": 410, "ms": 5230, "status": "ok"}
+# The log rotates to <path>.1 once it reaches USAGE_LOG_MAX_MB.
+USAGE_TRACKING_ENABLED = os.getenv("USAGE_TRACKING_ENABLED", "true").lower() not in ("0", "false", "no")
+USAGE_LOG_PATH = os.getenv("USAGE_LOG_PATH", os.path.join(".cache", "llm_usage.jsonl"))
+USAGE_LOG_MAX_BYTES = int(float(os.getenv("USAGE_LOG_MAX_MB", "64")) * 1024 * 1024)
+# Days of per-user totals the in-process usage index keeps for the account page
+USAGE_INDEX_DAYS = int(os.getenv("USAGE_INDEX_DAYS", "30"))
+
+# Backend task -> the app function that issues it
+TASK_FEATURES = {
+    "score": "analyze_contract_score",
+    "risks_opportunities": "analyze_risks_and_opportunities",
+    "key_clauses": "analyze_contract_clauses",
+    "clause_query": "analyze_contract_clauses",
+    "key_terms": "extract_key_terms",
+    "summary": "generate_summary",
+    "combined": "analyze_contract_combined",
+    "chat": "chat_with_contract",
+    "contract_generation": "generate_contract"
+}
+
+
+def current_user():
+    """(email, subscription_type) of the Streamlit session running this thread"""
+    # No script context, e.g. a benchmark or a thread without bind_script_context
+    if get_script_run_ctx is None or get_script_run_ctx(suppress_warning=True) is None:
+        return "anonymous", "unknown"
+    try:
+        return st.session_state.get("email") or "anonymous", st.session_state.get("subscription_type") or "unknown"
+    except Exception:
+        return "anonymous", "unknown"
+
+
+class UsageTracker:
+    """Thread-safe JSONL appender"""
+
+    def __init__(self, path=USAGE_LOG_PATH, max_bytes=USAGE_LOG_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._file = None
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def record(self, task, prompt_tokens, output_tokens, latency, status, user=None, plan=None):
+        if user is None or plan is None:
+            session_user, session_plan = current_user()
+            user = user or session_user
+            plan = plan or session_plan
+
+        line = json.dumps({
+            "ts": round(time.time(), 3),
+            "user": user,
+            "plan": plan,
+            "feature": TASK_FEATURES.get(task, task or "unknown"),
+            "task": task,
+            "in": int(prompt_tokens or 0),
+            "out": int(output_tokens or 0),
+            "ms": int(latency * 1000),
+            "status": status
+        }, separators=(",", ":"))
+
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, "a", encoding="utf-8", buffering=1)
+            self._file.write(line + "\n")
+            if self._file.tell() >= self.max_bytes:
+                self._rotate()
+
+    def _rotate(self):
+        self._file.close()
+        os.replace(self.path, self.path + ".1")
+        self._file = open(self.path, "a", encoding="utf-8", buffering=1)
+
+
+class _NullTracker:
+    """Stand-in used when USAGE_TRACKING_ENABLED is off"""
+
+    path = None
+
+    def record(self, *args, **kwargs):
+        pass
+
+
+_tracker = None
+_tracker_lock = threading.Lock()
+
+
+def get_usage_tracker():
+    """Process-wide tracker shared by all Streamlit sessions"""
+    global _tracker
+    with _tracker_lock:
+        if _tracker is None:
+            if not USAGE_TRACKING_ENABLED:
+                _tracker = _NullTracker()
+            else:
+                try:
+                    _tracker = UsageTracker()
+                except Exception as e:
+                    print(f"Warning: Could not open usage log: {str(e)}")
+                    _tracker = _NullTracker()
+    return _tracker
+
+
+def read_usage(path=USAGE_LOG_PATH, since=None, user=None):
+    """Yield records from the log (and its rotated predecessor), oldest first"""
+    for file_path in (path + ".1", path):
+        if not os.path.exists(file_path):
+            continue
+        with open(file_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Partially written last line
+                    continue
+                if since is not None and record["ts"] < since:
+                    continue
+                if user is not None and record["user"] != user:
+                    continue
+                yield record
+
+
+def _new_group():
+    return {"latencies": [], "calls": 0, "errors": 0, "in": 0, "out": 0, "users": set()}
+
+
+def _add_record(group, record):
+    group["calls"] += 1
+    group["errors"] += record["status"] != "ok"
+    group["in"] += record["in"]
+    group["out"] += record["out"]
+    group["users"].add(record["user"])
+    group["latencies"].append(record["ms"])
+
+
+def _merge_group(group, other):
+    group["calls"] += other["calls"]
+    group["errors"] += other["errors"]
+    group["in"] += other["in"]
+    group["out"] += other["out"]
+    group["users"] |= other["users"]
+    group["latencies"].extend(other["latencies"])
+
+
+def _summary_rows(groups, by):
+    """One row of call, token and latency figures per group, most tokens first"""
+    rows = []
+    for key, group in groups.items():
+        latencies = sorted(group["latencies"])
+        row = dict(zip(by, key))
+        row.update({
+            "calls": group["calls"],
+            "errors": group["errors"],
+            "users": len(group["users"]),
+            "input_tokens": group["in"],
+            "output_tokens": group["out"],
+            "tokens_per_call": round((group["in"] + group["out"]) / group["calls"]),
+            "latency_p50_ms": latencies[len(latencies) // 2],
+            "latency_p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        })
+        rows.append(row)
+    rows.sort(key=lambda row: -(row["input_tokens"] + row["output_tokens"]))
+    return rows
+
+
+def summarize_usage(records, by=("feature",)):
+    """Aggregate records into one row per group with call, token and latency figures"""
+    groups = {}
+    for record in records:
+        key = tuple(record.get(field, "unknown") for field in by)
+        _add_record(groups.setdefault(key, _new_group()), record)
+    return _summary_rows(groups, by)
+
+
+class UsageIndex:
+    """Running per-user, per-day, per-feature totals of the usage log.
+
+    The log is read once, then each refresh only reads the lines appended
+    since the last one (following a rotation to <path>.1), so showing a
+    user's usage doesn't rescan the whole log on every page render.
+    """
+
+    def __init__(self, path=USAGE_LOG_PATH, days=USAGE_INDEX_DAYS):
+        self.path = path
+        self.days = days
+        self._users = {}  # user -> {(day, feature): group}
+        self._loaded = False
+        self._inode = None
+        self._offset = 0
+        self._lock = threading.Lock()
+
+    def _read(self, file_path, offset):
+        """Add the complete lines of file_path after offset; return the offset after them"""
+        first_day = self._today() - self.days
+        with open(file_path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Partially written last line; read it on the next refresh
+                    break
+                offset += len(line)
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                day = int(record["ts"] // 86400)
+                if day > first_day:
+                    groups = self._users.setdefault(record["user"], {})
+                    _add_record(groups.setdefault((day, record.get("feature", "unknown")), _new_group()), record)
+        return offset
+
+    @staticmethod
+    def _today():
+        return int(time.time() // 86400)
+
+    def refresh(self):
+        """Add the lines logged since the last refresh"""
+        with self._lock:
+            try:
+                inode = os.stat(self.path).st_ino
+            except OSError:
+                inode = None
+            rotated = self.path + ".1"
+            if not self._loaded or inode != self._inode:
+                try:
+                    if not self._loaded:
+                        self._read(rotated, 0)
+                    elif os.stat(rotated).st_ino == self._inode:
+                        # The file being followed was rotated; pick up its last lines
+                        self._read(rotated, self._offset)
+                except OSError:
+                    pass
+                self._loaded = True
+                self._inode, self._offset = inode, 0
+            if inode is not None:
+                self._offset = self._read(self.path, self._offset)
+
+            first_day = self._today() - self.days
+            for groups in self._users.values():
+                for key in [key for key in groups if key[0] <= first_day]:
+                    del groups[key]
+
+    def summary(self, user, days=USAGE_INDEX_DAYS):
+        """summarize_usage rows by feature of user's calls in the last `days` days"""
+        self.refresh()
+        first_day = self._today() - min(days, self.days)
+        merged = {}
+        with self._lock:
+            for (day, feature), group in self._users.get(user, {}).items():
+                if day > first_day:
+                    _merge_group(merged.setdefault((feature,), _new_group()), group)
+        return _summary_rows(merged, ("feature",))
+
+
+class _NullIndex:
+    """Stand-in used when usage tracking is off"""
+
+    def summary(self, user, days=USAGE_INDEX_DAYS):
+        return []
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_usage_index():
+    """Process-wide index of the usage log shared by all Streamlit sessions"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            path = get_usage_tracker().path
+            _index = UsageIndex(path) if path else _NullIndex()
+    return _index
+
+
+def print_report(rows):
+    if not rows:
+        print("No usage recorded")
+        return
+    columns = list(rows[0].keys())
+    widths = [max(len(column), *(len(str(row[column])) for row in rows)) for column in columns]
+    print("  ".join(column.ljust(width) for column, width in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(str(row[column]).ljust(width) for column, width in zip(columns, widths)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize the LLM usage log")
+    parser.add_argument("--path", default=USAGE_LOG_PATH)
+    parser.add_argument("--days", type=float, default=7, help="Only include the last N days (0 = everything)")
+    parser.add_argument("--by", default="feature", help="Comma-separated fields: feature, task, user, plan, status")
+    parser.add_argument("--user", help="Only include this user's calls")
+    args = parser.parse_args()
+
+    since = time.time() - args.days * 86400 if args.days else None
+    records = read_usage(args.path, since=since, user=args.user)
+    print_report(summarize_usage(records, by=tuple(field.strip() for field in args.by.split(","))))
+
+
+if __name__ == "__main__":
+    main()